@@ -0,0 +1,388 @@
+"""
+Benchmark del OCR de facturas sobre un corpus de recibos
+
+Mide, por recibo, la latencia de cada etapa (decodificar, preprocesar, OCR y
+extracción), el rendimiento de `procesar_factura` de extremo a extremo en
+recibos por segundo, la memoria pico y la precisión de los campos extraídos
+frente a los valores esperados. El reporte se guarda en JSON y se puede
+comparar con uno anterior para detectar regresiones.
+
+Corpus: un directorio con, por cada recibo, una imagen `nombre.jpg` (o png,
+webp...) y un `nombre.json` con los campos esperados:
+
+    {"monto_total": 80.0, "fecha": "29/11/2024", "vendedor": "TIENDA EJEMPLO",
+     "categoría": "Compras", "moneda": "S/."}
+
+Solo se comparan los campos presentes. Si el JSON incluye "texto" (la salida
+de Tesseract ya guardada), con --solo-extraccion se mide únicamente la
+extracción, sin necesitar Tesseract.
+
+Uso:
+    python -m benchmarks.benchmark_ocr corpus/ --salida reporte.json
+    python -m benchmarks.benchmark_ocr corpus/ --comparar base.json --tolerancia 0.15
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+RAIZ = Path(__file__).parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from src import factura_processor
+from src.config import OCR_IDIOMAS, detectar_tesseract
+from src.factura_processor import procesar_factura, _extraer_informacion
+from src.ocr_executor import ocr_executor, _reconocer_texto
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+EXTENSIONES_IMAGEN = ('.jpg', '.jpeg', '.png', '.webp', '.bmp', '.tif', '.tiff')
+
+# Campos de _extraer_informacion que se comparan con lo esperado
+CAMPOS = ('monto_total', 'moneda', 'vendedor', 'fecha', 'categoría')
+
+ETAPAS = ('decodificar', 'preprocesar', 'ocr', 'extraccion')
+
+
+# ================================================================
+# CORPUS
+# ================================================================
+def cargar_corpus(directorio) -> list:
+    """
+    Lee los recibos del corpus
+
+    Returns:
+        list: Diccionarios con nombre, imagen (Path o None), esperado y texto
+    """
+    casos = []
+    for archivo_json in sorted(Path(directorio).glob('*.json')):
+        esperado = json.loads(archivo_json.read_text(encoding='utf-8'))
+        imagen = next(
+            (archivo_json.with_suffix(ext) for ext in EXTENSIONES_IMAGEN
+             if archivo_json.with_suffix(ext).exists()),
+            None
+        )
+        casos.append({
+            'nombre': archivo_json.stem,
+            'imagen': imagen,
+            'texto': esperado.pop('texto', None),
+            'esperado': {campo: valor for campo, valor in esperado.items() if campo in CAMPOS},
+        })
+    return casos
+
+
+# ================================================================
+# MÉTRICAS
+# ================================================================
+def percentiles(valores) -> dict:
+    """p50, p90, p95, p99, media y máximo (interpolación lineal)"""
+    if not valores:
+        return {}
+    ordenados = sorted(valores)
+
+    def percentil(p):
+        posicion = (len(ordenados) - 1) * p / 100
+        inferior = int(posicion)
+        superior = min(inferior + 1, len(ordenados) - 1)
+        return ordenados[inferior] + (ordenados[superior] - ordenados[inferior]) * (posicion - inferior)
+
+    return {
+        'p50': round(percentil(50), 3),
+        'p90': round(percentil(90), 3),
+        'p95': round(percentil(95), 3),
+        'p99': round(percentil(99), 3),
+        'media': round(sum(ordenados) / len(ordenados), 3),
+        'max': round(ordenados[-1], 3),
+        'n': len(ordenados),
+    }
+
+
+def memoria_pico_mb() -> dict:
+    """RSS pico del proceso y de sus hijos ya terminados, p. ej. los workers OCR (None si no se puede medir)"""
+    if resource is None:
+        return {'proceso': None, 'hijos': None}
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return {
+        'proceso': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / divisor, 1),
+        'hijos': round(resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / divisor, 1),
+    }
+
+
+def _normalizar(valor):
+    return ' '.join(str(valor).split()).lower() if valor is not None else None
+
+
+def comparar_campos(esperado: dict, obtenido: dict) -> dict:
+    """Campo -> acierto; el monto admite una diferencia de un céntimo"""
+    aciertos = {}
+    for campo, valor in esperado.items():
+        extraido = obtenido.get(campo)
+        if campo == 'monto_total':
+            aciertos[campo] = extraido is not None and valor is not None and abs(float(extraido) - float(valor)) < 0.01
+        else:
+            aciertos[campo] = _normalizar(extraido) == _normalizar(valor)
+    return aciertos
+
+
+def _precision(resultados) -> dict:
+    """Precisión por campo, global y de recibos con todos los campos correctos"""
+    por_campo = {}
+    for aciertos, _ in resultados:
+        for campo, acierto in aciertos.items():
+            por_campo.setdefault(campo, []).append(acierto)
+    total = [acierto for lista in por_campo.values() for acierto in lista]
+    return {
+        'campos': {campo: round(sum(lista) / len(lista), 4) for campo, lista in sorted(por_campo.items())},
+        'global': round(sum(total) / len(total), 4) if total else None,
+        'recibos_exactos': round(
+            sum(all(aciertos.values()) for aciertos, _ in resultados) / len(resultados), 4
+        ) if resultados else None,
+    }
+
+
+# ================================================================
+# MEDICIONES
+# ================================================================
+def medir_etapas(caso: dict, pasos, idiomas=OCR_IDIOMAS, solo_extraccion=False):
+    """
+    Procesa un recibo en este proceso midiendo cada etapa
+
+    Returns:
+        tuple: (dict etapa -> ms, campos extraídos)
+    """
+    if solo_extraccion:
+        texto, tiempos = caso['texto'], {}
+    else:
+        datos_imagen = caso['imagen'].read_bytes()
+        texto, detalle = _reconocer_texto(datos_imagen, idiomas, detectar_tesseract().comando, pasos)
+        tiempos = {
+            'decodificar': detalle.pop('decodificar'),
+            'ocr': detalle.pop('ocr'),
+            # El resto son los pasos de preprocesamiento configurados
+            'preprocesar': sum(detalle.values()),
+        }
+
+    inicio = time.perf_counter()
+    campos = _extraer_informacion(texto)
+    tiempos['extraccion'] = (time.perf_counter() - inicio) * 1000
+    return tiempos, campos
+
+
+async def medir_extremo_a_extremo(casos: list) -> dict:
+    """
+    Ejecuta procesar_factura sobre todos los recibos a la vez (sin caché OCR)
+
+    Usa el ocr_executor global con su configuración (modo, workers, cola).
+    """
+    imagenes = [caso['imagen'].read_bytes() for caso in casos]
+    en_paralelo = asyncio.Semaphore(ocr_executor.capacidad)
+    latencias = []
+
+    async def procesar(datos_imagen):
+        async with en_paralelo:
+            inicio = time.perf_counter()
+            resultado = await procesar_factura(datos_imagen)
+            latencias.append((time.perf_counter() - inicio) * 1000)
+            return resultado
+
+    inicio = time.perf_counter()
+    resultados = await asyncio.gather(*(procesar(datos) for datos in imagenes))
+    duracion = time.perf_counter() - inicio
+
+    return {
+        'latencia_ms': percentiles(latencias),
+        'recibos_por_segundo': round(len(imagenes) / duracion, 3) if duracion else None,
+        'duracion_s': round(duracion, 3),
+        'errores': sum('error' in resultado for resultado in resultados),
+        'modo': ocr_executor.modo,
+        'workers': ocr_executor.max_workers,
+    }
+
+
+def ejecutar(directorio, repeticiones: int = 1, solo_extraccion: bool = False,
+             extremo_a_extremo: bool = True) -> dict:
+    """
+    Ejecuta el benchmark completo sobre un corpus
+
+    Args:
+        directorio: Carpeta del corpus
+        repeticiones (int): Pasadas por recibo para las latencias por etapa
+        solo_extraccion (bool): Medir solo la extracción con el "texto" del JSON
+        extremo_a_extremo (bool): Medir también procesar_factura en el pool
+
+    Returns:
+        dict: Reporte serializable a JSON
+    """
+    casos = cargar_corpus(directorio)
+    if solo_extraccion:
+        casos = [caso for caso in casos if caso['texto'] is not None]
+        extremo_a_extremo = False
+    else:
+        casos = [caso for caso in casos if caso['imagen'] is not None]
+    if not casos:
+        raise ValueError(f"No hay recibos utilizables en {directorio}")
+
+    pasos = ocr_executor.pasos
+    tiempos = {etapa: [] for etapa in ETAPAS}
+    resultados = []
+    fallos = []
+
+    for caso in casos:
+        for repeticion in range(repeticiones):
+            medidos, campos = medir_etapas(caso, pasos, solo_extraccion=solo_extraccion)
+            for etapa, ms in medidos.items():
+                tiempos[etapa].append(ms)
+        # La extracción es determinista: la precisión sale de la última pasada
+        aciertos = comparar_campos(caso['esperado'], campos)
+        resultados.append((aciertos, campos))
+        fallos.extend(
+            {
+                'recibo': caso['nombre'],
+                'campo': campo,
+                'esperado': caso['esperado'][campo],
+                'obtenido': campos.get(campo),
+            }
+            for campo, acierto in aciertos.items() if not acierto
+        )
+
+    reporte = {
+        'fecha': datetime.now().isoformat(timespec='seconds'),
+        'version': (RAIZ / 'VERSION').read_text().strip() if (RAIZ / 'VERSION').exists() else None,
+        'python': platform.python_version(),
+        'plataforma': platform.platform(),
+        'corpus': str(directorio),
+        'recibos': len(casos),
+        'repeticiones': repeticiones,
+        'solo_extraccion': solo_extraccion,
+        'pasos': list(pasos),
+        'etapas_ms': {etapa: percentiles(valores) for etapa, valores in tiempos.items() if valores},
+        'precision': _precision(resultados),
+        'fallos': fallos,
+    }
+
+    if extremo_a_extremo:
+        # Medir el OCR real, no la caché de una pasada anterior
+        cache_original = factura_processor.OCR_CACHE_HABILITADO
+        factura_processor.OCR_CACHE_HABILITADO = False
+        try:
+            reporte['extremo_a_extremo'] = asyncio.run(medir_extremo_a_extremo(casos))
+        finally:
+            factura_processor.OCR_CACHE_HABILITADO = cache_original
+            # Cerrar el pool para que cuente la memoria pico de los workers
+            ocr_executor.cerrar(esperar=True)
+
+    reporte['memoria_pico_mb'] = memoria_pico_mb()
+    return reporte
+
+
+# ================================================================
+# COMPARACIÓN
+# ================================================================
+def comparar(reporte: dict, base: dict, tolerancia: float = 0.1) -> list:
+    """
+    Regresiones del reporte respecto a uno base
+
+    Args:
+        reporte (dict): Reporte actual
+        base (dict): Reporte de referencia
+        tolerancia (float): Empeoramiento relativo admitido en tiempos y rendimiento
+
+    Returns:
+        list: Descripciones de las regresiones (vacía si no hay)
+    """
+    regresiones = []
+
+    for etapa, actual in reporte.get('etapas_ms', {}).items():
+        anterior = base.get('etapas_ms', {}).get(etapa)
+        if anterior and anterior.get('p95') and actual['p95'] > anterior['p95'] * (1 + tolerancia):
+            regresiones.append(
+                f"{etapa}: p95 {anterior['p95']:.1f}ms -> {actual['p95']:.1f}ms"
+            )
+
+    actual = (reporte.get('extremo_a_extremo') or {}).get('recibos_por_segundo')
+    anterior = (base.get('extremo_a_extremo') or {}).get('recibos_por_segundo')
+    if actual and anterior and actual < anterior * (1 - tolerancia):
+        regresiones.append(f"rendimiento: {anterior:.2f} -> {actual:.2f} recibos/s")
+
+    campos_base = base.get('precision', {}).get('campos', {})
+    for campo, precision in reporte.get('precision', {}).get('campos', {}).items():
+        if campo in campos_base and precision < campos_base[campo]:
+            regresiones.append(f"precisión {campo}: {campos_base[campo]:.2%} -> {precision:.2%}")
+
+    return regresiones
+
+
+def _imprimir_resumen(reporte: dict):
+    print(f"\n📊 Benchmark OCR — {reporte['recibos']} recibos ({reporte['corpus']})")
+    for etapa, valores in reporte['etapas_ms'].items():
+        print(f"  ⏱️ {etapa:<12} p50={valores['p50']:>9.2f}ms  p95={valores['p95']:>9.2f}ms  max={valores['max']:>9.2f}ms")
+    extremo = reporte.get('extremo_a_extremo')
+    if extremo:
+        print(
+            f"  🚀 procesar_factura: {extremo['recibos_por_segundo']} recibos/s, "
+            f"p95={extremo['latencia_ms'].get('p95')}ms, {extremo['errores']} errores"
+        )
+    precision = reporte['precision']
+    print(f"  🎯 Precisión global: {precision['global']}  (recibos exactos: {precision['recibos_exactos']})")
+    for campo, valor in precision['campos'].items():
+        print(f"     {campo:<12} {valor:.2%}")
+    memoria = reporte['memoria_pico_mb']
+    print(f"  💾 RSS pico: proceso={memoria['proceso']} MB, hijos={memoria['hijos']} MB\n")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark del OCR de facturas")
+    parser.add_argument('corpus', help="Carpeta con imágenes y JSON de valores esperados")
+    parser.add_argument('--salida', help="Archivo JSON del reporte")
+    parser.add_argument('--repeticiones', type=int, default=1, help="Pasadas por recibo (latencias)")
+    parser.add_argument('--solo-extraccion', action='store_true',
+                        help="Medir solo la extracción con el texto OCR guardado en el JSON")
+    parser.add_argument('--sin-extremo-a-extremo', action='store_true',
+                        help="No medir procesar_factura en el pool")
+    parser.add_argument('--comparar', help="Reporte base para detectar regresiones")
+    parser.add_argument('--tolerancia', type=float, default=0.1,
+                        help="Empeoramiento relativo admitido (0.1 = 10%%)")
+    parser.add_argument('--logs', action='store_true', help="Mostrar los logs del procesador")
+    args = parser.parse_args(argv)
+
+    if not args.logs:
+        # Los logs por recibo distorsionan las latencias y ensucian la salida
+        logging.disable(logging.INFO)
+
+    try:
+        reporte = ejecutar(
+            args.corpus,
+            repeticiones=max(1, args.repeticiones),
+            solo_extraccion=args.solo_extraccion,
+            extremo_a_extremo=not args.sin_extremo_a_extremo,
+        )
+    finally:
+        logging.disable(logging.NOTSET)
+    _imprimir_resumen(reporte)
+
+    if args.salida:
+        Path(args.salida).write_text(json.dumps(reporte, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"💾 Reporte guardado en {args.salida}")
+
+    if args.comparar:
+        base = json.loads(Path(args.comparar).read_text(encoding='utf-8'))
+        regresiones = comparar(reporte, base, args.tolerancia)
+        for regresion in regresiones:
+            print(f"❌ Regresión: {regresion}")
+        if regresiones:
+            return 1
+        print("✅ Sin regresiones respecto a la base")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
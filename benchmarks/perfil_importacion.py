@@ -0,0 +1,167 @@
+"""
+Perfil del tiempo de importación del bot
+
+Importa cada módulo en un intérprete nuevo con `python -X importtime` y
+reporta el tiempo total (reloj de pared del proceso y acumulado del módulo),
+los módulos más costosos y el tiempo propio agrupado por paquete
+(discord, sqlalchemy, jinja2...). Sirve para comprobar que importar la
+configuración no arrastra dependencias pesadas ni busca Tesseract.
+
+Con --sin-diferir se repite la medición con TESSERACT_DETECCION_DIFERIDA=false
+(la búsqueda de Tesseract al importar, como antes) para comparar.
+
+Uso:
+    python -m benchmarks.perfil_importacion
+    python -m benchmarks.perfil_importacion src.config src.bot --top 20 --salida perfil.json
+    python -m benchmarks.perfil_importacion src.config --limite-ms 500   # sale con 1 si se supera
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+RAIZ = Path(__file__).parent.parent
+
+MODULOS_DEFECTO = ('src', 'src.config', 'src.factura_processor')
+
+# "import time:   self [us] | cumulative | imported package"
+_LINEA_IMPORTTIME = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)\s*$')
+
+
+def parsear_importtime(texto: str) -> list:
+    """
+    Convierte la salida de -X importtime en una lista de módulos
+
+    Returns:
+        list: dicts con 'modulo', 'propio_ms', 'acumulado_ms' y 'nivel'
+        (profundidad en el árbol de importaciones, 0 = importado directamente)
+    """
+    modulos = []
+    for linea in texto.splitlines():
+        coincidencia = _LINEA_IMPORTTIME.match(linea)
+        if not coincidencia:
+            continue
+        propio, acumulado, sangria, modulo = coincidencia.groups()
+        modulos.append({
+            'modulo': modulo,
+            'propio_ms': int(propio) / 1000,
+            'acumulado_ms': int(acumulado) / 1000,
+            'nivel': (len(sangria) - 1) // 2,
+        })
+    return modulos
+
+
+def agrupar_por_paquete(modulos: list) -> dict:
+    """Tiempo propio sumado por paquete de primer nivel, de mayor a menor (ms)"""
+    paquetes = {}
+    for modulo in modulos:
+        paquete = modulo['modulo'].split('.')[0]
+        paquetes[paquete] = paquetes.get(paquete, 0.0) + modulo['propio_ms']
+    return {
+        paquete: round(ms, 2)
+        for paquete, ms in sorted(paquetes.items(), key=lambda par: par[1], reverse=True)
+    }
+
+
+def medir(modulo: str, repeticiones: int = 3, entorno: dict = None, top: int = 10) -> dict:
+    """
+    Importa `modulo` en procesos nuevos y se queda con la pasada más rápida
+
+    Args:
+        modulo (str): Módulo a importar (p. ej. 'src.config')
+        repeticiones (int): Procesos lanzados; la mínima reduce el ruido
+        entorno (dict): Variables de entorno extra para el proceso
+        top (int): Cuántos módulos más costosos incluir
+
+    Returns:
+        dict: Reporte del módulo
+    """
+    env = dict(os.environ, **(entorno or {}))
+    mejor = None
+    for _ in range(max(1, repeticiones)):
+        inicio = time.perf_counter()
+        resultado = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+            cwd=RAIZ, env=env, capture_output=True, text=True
+        )
+        pared_ms = (time.perf_counter() - inicio) * 1000
+        if resultado.returncode != 0:
+            raise RuntimeError(f"No se pudo importar {modulo}:\n{resultado.stderr[-2000:]}")
+        if mejor is None or pared_ms < mejor[0]:
+            mejor = (pared_ms, resultado.stderr)
+
+    pared_ms, salida = mejor
+    modulos = parsear_importtime(salida)
+    objetivo = next((m for m in modulos if m['modulo'] == modulo), None)
+    return {
+        'modulo': modulo,
+        'pared_ms': round(pared_ms, 1),
+        'importacion_ms': objetivo['acumulado_ms'] if objetivo else None,
+        'modulos_cargados': len(modulos),
+        'mas_costosos': [
+            {'modulo': m['modulo'], 'acumulado_ms': m['acumulado_ms']}
+            for m in sorted(modulos, key=lambda m: m['acumulado_ms'], reverse=True)
+            if m['modulo'] != modulo
+        ][:top],
+        'por_paquete': dict(list(agrupar_por_paquete(modulos).items())[:top]),
+    }
+
+
+def _imprimir_resumen(reporte: dict):
+    print(f"\n📦 {reporte['modulo']}: {reporte['importacion_ms']}ms importando, "
+          f"{reporte['pared_ms']}ms de proceso, {reporte['modulos_cargados']} módulos")
+    for paquete, ms in reporte['por_paquete'].items():
+        print(f"  {paquete:<24} {ms:>9.2f}ms")
+    print("  Más costosos (acumulado):")
+    for modulo in reporte['mas_costosos']:
+        print(f"    {modulo['modulo']:<40} {modulo['acumulado_ms']:>9.2f}ms")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Perfil del tiempo de importación")
+    parser.add_argument('modulos', nargs='*', default=list(MODULOS_DEFECTO),
+                        help="Módulos a importar (por defecto: %(default)s)")
+    parser.add_argument('--repeticiones', type=int, default=3, help="Procesos por módulo (se toma el mínimo)")
+    parser.add_argument('--top', type=int, default=10, help="Módulos y paquetes a listar")
+    parser.add_argument('--sin-diferir', action='store_true',
+                        help="Medir también con la búsqueda de Tesseract al importar")
+    parser.add_argument('--limite-ms', type=float, help="Falla si algún módulo tarda más (reloj de pared)")
+    parser.add_argument('--salida', help="Archivo JSON del reporte")
+    args = parser.parse_args(argv)
+
+    # El log de arranque no forma parte de la medida
+    entorno = {'LOG_ASINCRONO': 'false'}
+    variantes = {'diferida': entorno}
+    if args.sin_diferir:
+        variantes['al_importar'] = dict(entorno, TESSERACT_DETECCION_DIFERIDA='false')
+
+    reporte = {}
+    for variante, env in variantes.items():
+        if len(variantes) > 1:
+            print(f"\n🔧 Detección de Tesseract: {variante}")
+        reporte[variante] = []
+        for modulo in args.modulos:
+            medida = medir(modulo, args.repeticiones, env, args.top)
+            _imprimir_resumen(medida)
+            reporte[variante].append(medida)
+
+    if args.salida:
+        Path(args.salida).write_text(json.dumps(reporte, ensure_ascii=False, indent=2), encoding='utf-8')
+        print(f"💾 Reporte guardado en {args.salida}")
+
+    if args.limite_ms is not None:
+        lentos = [m for m in reporte['diferida'] if m['pared_ms'] > args.limite_ms]
+        for medida in lentos:
+            print(f"❌ {medida['modulo']}: {medida['pared_ms']}ms > {args.limite_ms}ms")
+        if lentos:
+            return 1
+        print(f"✅ Todos los módulos por debajo de {args.limite_ms}ms")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
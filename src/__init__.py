@@ -1,23 +1,54 @@
 """
 Bot Personal de Discord - Módulo Principal
 """
-# Configuración
+import importlib
+
+# Configuración (ligera: no importa discord ni SQLAlchemy). Se carga primero
+# porque src.logger y los módulos de config dependen de ella.
 from src.config import *
 
-# Modelos
-from src.models import Gasto, Base, engine, SessionLocal, init_db
+# Los submódulos (discord, SQLAlchemy, Jinja2...) se importan al usar el
+# nombre por primera vez, no al importar el paquete: así `import src.config`
+# o `from src.cache_lru import CacheLRU` no arrastran el bot completo.
+_PEREZOSOS = {
+    # Models
+    'Gasto': 'src.models',
+    'Base': 'src.models',
+    'engine': 'src.models',
+    'SessionLocal': 'src.models',
+    'init_db': 'src.models',
+
+    # DAO
+    'GastoDAO': 'src.dao',
+
+    # Repository
+    'GastoRepository': 'src.repository',
+
+    # Services
+    'GastoService': 'src.services',
+    'DiscordService': 'src.services',
+
+    # Controllers
+    'ComandoController': 'src.controller',
+    'EventoController': 'src.controller',
+}
+
 
-# DAO
-from src.dao import GastoDAO
+def __getattr__(nombre):
+    modulo = _PEREZOSOS.get(nombre)
+    if modulo is None:
+        if nombre in ('TESSERACT_CMD', 'TESSERACT_ENCONTRADO'):
+            # Se calculan al leerlos (ver src.config.tesseract_config)
+            return getattr(importlib.import_module('src.config'), nombre)
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+    valor = getattr(importlib.import_module(modulo), nombre)
+    globals()[nombre] = valor
+    return valor
 
-# Repository
-from src.repository import GastoRepository
 
-# Services
-from src.services import GastoService, DiscordService
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
 
-# Controllers
-from src.controller import ComandoController, EventoController
 
 __all__ = [
     # Config
@@ -8,7 +8,7 @@ import discord
 from discord.ext import commands
 from dotenv import load_dotenv
 
-from src.config import DISCORD_TOKEN, COMMAND_PREFIX, LoggerConfig
+from src.config import DISCORD_TOKEN, COMMAND_PREFIX, LoggerConfig, detectar_tesseract_en_segundo_plano
 from src.models import init_db
 from src.config.db_persistence import (
     verify_db_exists,
@@ -16,6 +16,8 @@ from src.config.db_persistence import (
     check_db_permissions
 )
 from src.controller import registrar_comandos_en_controller, registrar_eventos_en_controller
+from src.ocr_executor import ocr_executor
+from src.repository import cerrar_executor_db
 from src.utils import get_logger
 
 # Cargar variables de entorno
@@ -38,14 +40,18 @@ if not check_db_permissions():
 # Verificar que BD existe
 verify_db_exists()
 
-# Crear tabla si no existen
-init_db()
-
-# Habilitar WAL mode y persistencia
+# Habilitar WAL mode y persistencia antes de lanzar el hilo de migraciones:
+# con sus escrituras en curso el PRAGMA puede fallar por "database is locked"
 ensure_db_persistence()
 
+# Crear tablas si no existen y aplicar migraciones (rellenos en segundo plano)
+init_db(en_segundo_plano=True)
+
 logger.info("✅ BD lista para persistencia\n")
 
+# Buscar Tesseract mientras el bot se conecta (no retrasa el arranque)
+detectar_tesseract_en_segundo_plano()
+
 # Configurar intents
 intents = discord.Intents.default()
 intents.message_content = True
@@ -71,7 +77,12 @@ def run_bot():
         raise ValueError('DISCORD_TOKEN no está configurado en .env')
 
     logger.info('🚀 Iniciando Bot Personal de Discord...')
-    bot.run(DISCORD_TOKEN)
+    try:
+        bot.run(DISCORD_TOKEN)
+    finally:
+        ocr_executor.cerrar(esperar=False)
+        cerrar_executor_db(esperar=False)
+        LoggerConfig.detener()
 
 
 if __name__ == '__main__':
@@ -0,0 +1,89 @@
+"""
+Cache LRU en memoria
+Caché acotada por número de entradas, con TTL opcional y contadores de aciertos
+"""
+import threading
+import time
+from collections import OrderedDict
+
+_NO_ENCONTRADO = object()
+
+
+class CacheLRU:
+    """Caché LRU thread-safe con expiración opcional"""
+
+    def __init__(self, max_entradas: int = 256, ttl: float = None):
+        """
+        Args:
+            max_entradas (int): Entradas máximas antes de expulsar la menos usada
+            ttl (float): Segundos de vida de cada entrada (None = sin expiración)
+        """
+        self.max_entradas = max(1, max_entradas)
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.expulsiones = 0
+
+    def obtener(self, clave, defecto=None):
+        """Obtiene un valor y lo marca como usado recientemente"""
+        with self._lock:
+            entrada = self._datos.get(clave, _NO_ENCONTRADO)
+            if entrada is not _NO_ENCONTRADO:
+                valor, expira = entrada
+                if expira is None or expira > time.monotonic():
+                    self._datos.move_to_end(clave)
+                    self.aciertos += 1
+                    return valor
+                del self._datos[clave]
+            self.fallos += 1
+            return defecto
+
+    def guardar(self, clave, valor):
+        """Guarda un valor, expulsando el menos usado si se supera el límite"""
+        expira = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._datos[clave] = (valor, expira)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_entradas:
+                self._datos.popitem(last=False)
+                self.expulsiones += 1
+
+    def invalidar(self, clave) -> bool:
+        """Elimina una entrada"""
+        with self._lock:
+            return self._datos.pop(clave, _NO_ENCONTRADO) is not _NO_ENCONTRADO
+
+    def limpiar(self):
+        """Elimina todas las entradas (los contadores se conservan)"""
+        with self._lock:
+            self._datos.clear()
+
+    def __len__(self):
+        return len(self._datos)
+
+    def __contains__(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave, _NO_ENCONTRADO)
+            if entrada is _NO_ENCONTRADO:
+                return False
+            expira = entrada[1]
+            return expira is None or expira > time.monotonic()
+
+    @property
+    def ratio_aciertos(self) -> float:
+        """Proporción de aciertos sobre el total de consultas"""
+        consultas = self.aciertos + self.fallos
+        return self.aciertos / consultas if consultas else 0.0
+
+    def estadisticas(self) -> dict:
+        """Contadores para monitoreo"""
+        return {
+            'entradas': len(self._datos),
+            'max_entradas': self.max_entradas,
+            'aciertos': self.aciertos,
+            'fallos': self.fallos,
+            'expulsiones': self.expulsiones,
+            'ratio_aciertos': self.ratio_aciertos,
+        }
@@ -10,5 +10,12 @@ from .db_persistence import (
     verify_db_exists,
     check_db_permissions
 )
-from .logging_config import LoggerConfig, LOGS_DIR
+from .logging_config import LoggerConfig, LOGS_DIR, contexto_log
 from .exception_handler import ExceptionHandler, exception_handler
+
+
+def __getattr__(nombre):
+    # Resultado de la búsqueda de Tesseract: se calcula al leerlo (ver tesseract_config)
+    if nombre in ('TESSERACT_CMD', 'TESSERACT_ENCONTRADO'):
+        return getattr(tesseract_config, nombre)
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
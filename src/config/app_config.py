@@ -19,6 +19,47 @@ COMMAND_PREFIX = '!'
 # ============================================================
 WEB_HOST = 'localhost'
 WEB_PORT = 8080
+METRICAS_HABILITADAS = os.getenv('METRICAS_HABILITADAS', 'true').lower() in ('true', '1', 'si')  # Endpoint /metrics
+
+# ============================================================
+# LOGGING
+# ============================================================
+# Escritura de logs en un hilo aparte (QueueHandler + QueueListener)
+LOG_ASINCRONO = os.getenv('LOG_ASINCRONO', 'true').lower() in ('true', '1', 'si')
+# Formato de consola y archivo: 'texto' (legible) o 'json' (una línea JSON por registro)
+LOG_FORMATO = os.getenv('LOG_FORMATO', 'texto').lower()
+# Muestreo por logger de los registros bajo WARNING ("logger=tasa,..."), p. ej.
+# "src.factura_processor=0.01" conserva 1 de cada 100 trazas de OCR completas
+LOG_MUESTREO = os.getenv('LOG_MUESTREO', '')
+# Máximo de registros por segundo por logger bajo WARNING ("logger=n,...")
+LOG_LIMITE_POR_SEGUNDO = os.getenv('LOG_LIMITE_POR_SEGUNDO', '')
+# Un mismo error (tipo, contexto y línea) se escribe como mucho una vez por ventana
+ERRORES_VENTANA_SEGUNDOS = float(os.getenv('ERRORES_VENTANA_SEGUNDOS', '60'))
+
+# ============================================================
+# EXPORTACIÓN
+# ============================================================
+EXPORTAR_TAM_LOTE = int(os.getenv('EXPORTAR_TAM_LOTE', '500'))  # Filas leídas del cursor por vez (yield_per)
+EXPORTAR_TAM_BLOQUE = int(os.getenv('EXPORTAR_TAM_BLOQUE', str(64 * 1024)))  # Bytes por bloque enviado
+# Enlaces firmados para descargar desde el servidor web (sin secreto no se generan)
+EXPORTAR_SECRETO = os.getenv('EXPORTAR_SECRETO', '')
+EXPORTAR_TOKEN_TTL = int(os.getenv('EXPORTAR_TOKEN_TTL', '3600'))  # Segundos de validez del enlace
+EXPORTAR_URL_BASE = os.getenv('EXPORTAR_URL_BASE', f'http://{WEB_HOST}:{WEB_PORT}')
+
+# ============================================================
+# IMPORTACIÓN
+# ============================================================
+IMPORTAR_TAM_LOTE = int(os.getenv('IMPORTAR_TAM_LOTE', '200'))  # Filas por transacción
+IMPORTAR_MAX_BYTES = int(os.getenv('IMPORTAR_MAX_BYTES', str(20 * 1024 * 1024)))  # Tamaño máximo del CSV
+
+# ============================================================
+# PLANTILLAS
+# ============================================================
+# Bytecode compilado de Jinja2 (se reutiliza entre reinicios)
+PLANTILLAS_CACHE_DIR = Path(
+    os.getenv('PLANTILLAS_CACHE_DIR', str(Path(__file__).parent.parent.parent / '.cache' / 'plantillas'))
+)
+EMBEDS_CACHE_MAX = int(os.getenv('EMBEDS_CACHE_MAX', '512'))  # Embeds de resumen en RAM (LRU)
 
 # ============================================================
 # MONEDA
@@ -30,4 +71,35 @@ SIMBOLO_MONEDA = "S/."
 # IDIOMA OCR
 # ============================================================
 OCR_IDIOMAS = 'spa+eng'  # Español + Inglés
+# Buscar Tesseract en el primer OCR / en segundo plano en vez de al importar
+TESSERACT_DETECCION_DIFERIDA = os.getenv('TESSERACT_DETECCION_DIFERIDA', 'true').lower() in ('true', '1', 'si')
+
+
+# ============================================================
+# EJECUTOR OCR
+# ============================================================
+OCR_EXECUTOR_MODO = os.getenv('OCR_EXECUTOR_MODO', 'proceso')  # 'proceso' o 'hilo'
+OCR_MAX_WORKERS = int(os.getenv('OCR_MAX_WORKERS', '2'))  # Tesseract en paralelo
+OCR_MAX_COLA = int(os.getenv('OCR_MAX_COLA', '8'))  # Trabajos en espera
+OCR_TIMEOUT_COLA = float(os.getenv('OCR_TIMEOUT_COLA', '15'))  # Segundos esperando hueco
+OCR_BUFFER_MEMORYVIEW = os.getenv('OCR_BUFFER_MEMORYVIEW', 'true').lower() in ('true', '1', 'si')  # Solo modo 'hilo'
 
+# ============================================================
+# CACHE OCR
+# ============================================================
+OCR_CACHE_HABILITADO = os.getenv('OCR_CACHE_HABILITADO', 'true').lower() in ('true', '1', 'si')
+OCR_CACHE_MAX_MEMORIA = int(os.getenv('OCR_CACHE_MAX_MEMORIA', '256'))  # Entradas en RAM
+OCR_CACHE_MAX_DISCO = int(os.getenv('OCR_CACHE_MAX_DISCO', '5000'))  # Filas en SQLite
+OCR_CACHE_TTL = int(os.getenv('OCR_CACHE_TTL', str(30 * 24 * 3600)))  # Segundos (30 días)
+
+# ============================================================
+# PREPROCESAMIENTO DE IMAGEN OCR
+# ============================================================
+# Pasos en orden, separados por coma (ver src/image_preprocessor.py)
+# Disponibles: reducir, orientar, escala_grises, recortar, binarizar
+OCR_PREPROCESAMIENTO = [
+    paso.strip()
+    for paso in os.getenv('OCR_PREPROCESAMIENTO', 'reducir,orientar,escala_grises').split(',')
+    if paso.strip()
+]
+OCR_MAX_LADO = int(os.getenv('OCR_MAX_LADO', '2200'))  # Píxeles del lado mayor tras reducir
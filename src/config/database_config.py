@@ -1,6 +1,7 @@
 """
 Configuración de base de datos
 """
+import os
 from pathlib import Path
 
 # ============================================================
@@ -9,3 +10,26 @@ from pathlib import Path
 BASE_DIR = Path(__file__).parent.parent.parent
 DB_PATH = BASE_DIR / 'gastos.db'
 
+OCR_CACHE_DB_PATH = BASE_DIR / 'ocr_cache.db'
+
+# ============================================================
+# ACCESO ASÍNCRONO
+# ============================================================
+# Hilos dedicados a consultas de BD (fuera del event loop del bot)
+DB_MAX_WORKERS = int(os.getenv('DB_MAX_WORKERS', '2'))
+
+# ============================================================
+# POOL DE CONEXIONES Y PRAGMAS
+# ============================================================
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))  # Conexiones reutilizadas
+DB_POOL_MAX_OVERFLOW = int(os.getenv('DB_POOL_MAX_OVERFLOW', '5'))  # Extra en picos
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))  # Segundos esperando conexión
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '-1'))  # Segundos (-1 = nunca)
+DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', '5000'))  # Espera por locks
+DB_CACHE_SIZE = int(os.getenv('DB_CACHE_SIZE', '10000'))  # Páginas de caché por conexión
+
+# ============================================================
+# MIGRACIONES
+# ============================================================
+MIGRACION_TAM_LOTE = int(os.getenv('MIGRACION_TAM_LOTE', '500'))  # Filas por transacción de relleno
+MIGRACION_PAUSA = float(os.getenv('MIGRACION_PAUSA', '0.05'))  # Segundos entre lotes
@@ -4,9 +4,7 @@ Este módulo asegura que los datos persistan correctamente
 """
 import os
 from pathlib import Path
-from sqlalchemy import event, text
-from sqlalchemy.engine import Engine
-from src.config import DB_PATH
+from src.config import DB_PATH, DB_BUSY_TIMEOUT_MS, DB_CACHE_SIZE
 from src.logger import get_logger
 from src.config.exception_handler import ExceptionHandler
 
@@ -24,16 +22,16 @@ def ensure_db_persistence():
     - Timeout para locks
     """
     try:
+        from sqlalchemy import text
         from src.models.base import engine
 
         # Habilitar WAL mode (Write-Ahead Logging)
         # Mejor para concurrencia y evita locks
+        # journal_mode es persistente en el archivo: basta con fijarlo una vez.
+        # Los PRAGMAs por conexión (synchronous, busy_timeout...) los aplica
+        # set_sqlite_pragma al abrir cada conexión del pool.
         with engine.connect() as conn:
             conn.execute(text("PRAGMA journal_mode=WAL"))
-            conn.execute(text("PRAGMA synchronous=NORMAL"))  # FULL para máxima seguridad
-            conn.execute(text("PRAGMA foreign_keys=ON"))
-            conn.execute(text("PRAGMA cache_size=10000"))
-            conn.execute(text("PRAGMA busy_timeout=5000"))  # 5 segundos timeout
             conn.commit()
 
         logger.info("✅ Modo WAL habilitado")
@@ -116,13 +114,17 @@ def check_db_permissions():
         raise
 
 
-@event.listens_for(Engine, "connect")
 def set_sqlite_pragma(dbapi_conn, connection_record):
-    """Event listener para configurar SQLite en cada conexión"""
+    """
+    Configura cada conexión SQLite nueva del engine de la aplicación
+
+    Se registra solo sobre nuestro engine (ver src/models/base.py) y se
+    ejecuta una vez por conexión física; el pool las reutiliza después.
+    """
     cursor = dbapi_conn.cursor()
-    cursor.execute("PRAGMA journal_mode=WAL")
-    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")  # FULL para máxima seguridad
     cursor.execute("PRAGMA foreign_keys=ON")
     cursor.execute("PRAGMA temp_store=MEMORY")
+    cursor.execute(f"PRAGMA cache_size={DB_CACHE_SIZE}")
+    cursor.execute(f"PRAGMA busy_timeout={DB_BUSY_TIMEOUT_MS}")
     cursor.close()
-
@@ -2,14 +2,57 @@
 Manejador centralizado de excepciones
 Gestiona errores con logging, embeds Discord y plantillas Markdown
 """
+import threading
+import time
 import traceback
-import discord
+from collections.abc import Mapping
 from datetime import datetime
-from typing import Optional, Dict, Any
+from functools import cached_property
+from pathlib import Path
+from typing import TYPE_CHECKING, Optional, Dict, Any
+from src.cache_lru import CacheLRU
+from src.metrics import errores_manejados
 from src.logger import get_logger
+from .app_config import ERRORES_VENTANA_SEGUNDOS
+
+if TYPE_CHECKING:
+    import discord
 
 logger = get_logger(__name__)
 
+PLANTILLA_ERROR_MD = Path(__file__).parent.parent / 'templates' / 'error.md'
+PLANTILLA_ERROR_MD_DEFECTO = """# ❌ ERROR - {{ contexto }}
+
+## 🔴 Tipo de Error
+```
+{{ tipo_error }}
+```
+
+## 💬 Mensaje
+{{ mensaje }}
+
+## ⏰ Información de Tiempo
+**{{ timestamp }}**
+
+{% if datos_adicionales %}
+## 📊 Datos Adicionales
+{% for clave, valor in datos_adicionales.items() %}
+- **{{ clave }}:** `{{ valor }}`
+{% endfor %}
+{% endif %}
+
+## 📋 Traceback Completo
+```
+{{ traceback }}
+```
+
+---
+*Sistema de manejo de errores centralizado - BotPersonal*
+"""
+
+# Plantilla compilada la primera vez que se necesita
+_plantilla_markdown = None
+
 
 class ExceptionHandler:
     """Manejador centralizado de excepciones con Discord y logging"""
@@ -26,44 +69,72 @@ class ExceptionHandler:
         'Exception': '❌',
     }
 
-    # Mapeo de tipos de error a colores Discord
+    # Mapeo de tipos de error a colores Discord (valores de discord.Color;
+    # discord se importa al crear el primer embed, no al cargar la configuración)
     ERROR_COLORS = {
-        'ValueError': discord.Color.orange(),
-        'TypeError': discord.Color.red(),
-        'KeyError': discord.Color.dark_orange(),
-        'FileNotFoundError': discord.Color.dark_red(),
-        'PermissionError': discord.Color.dark_red(),
-        'ConnectionError': discord.Color.red(),
-        'TimeoutError': discord.Color.orange(),
-        'Exception': discord.Color.red(),
+        'ValueError': 0xE67E22,         # orange
+        'TypeError': 0xE74C3C,          # red
+        'KeyError': 0xA84300,           # dark_orange
+        'FileNotFoundError': 0x992D22,  # dark_red
+        'PermissionError': 0x992D22,    # dark_red
+        'ConnectionError': 0xE74C3C,    # red
+        'TimeoutError': 0xE67E22,       # orange
+        'Exception': 0xE74C3C,          # red
     }
 
+    # Última vez que se escribió cada error (ver _firma) y repeticiones omitidas
+    _recientes = CacheLRU(max_entradas=256)
+    _lock = threading.Lock()
+
     @classmethod
     def _obtener_emoji(cls, tipo_error: str) -> str:
         """Obtiene emoji para un tipo de error"""
         return cls.ERROR_EMOJIS.get(tipo_error, '❌')
 
     @classmethod
-    def _obtener_color(cls, tipo_error: str) -> discord.Color:
+    def _obtener_color(cls, tipo_error: str) -> 'discord.Color':
         """Obtiene color para un tipo de error"""
-        return cls.ERROR_COLORS.get(tipo_error, discord.Color.red())
+        import discord
+        return discord.Color(cls.ERROR_COLORS.get(tipo_error, cls.ERROR_COLORS['Exception']))
 
     @classmethod
     def _extraer_info_error(cls, excepcion: Exception) -> Dict[str, Any]:
         """Extrae información detallada del error"""
-        tipo_error = type(excepcion).__name__
-        mensaje_error = str(excepcion)
-        traceback_str = traceback.format_exc()
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        return RegistroError(excepcion).info_error
 
-        return {
-            'tipo': tipo_error,
-            'mensaje': mensaje_error,
-            'traceback': traceback_str,
-            'timestamp': timestamp,
-            'emoji': cls._obtener_emoji(tipo_error),
-            'color': cls._obtener_color(tipo_error),
-        }
+    @classmethod
+    def _firma(cls, excepcion: Exception, contexto: str) -> tuple:
+        """
+        Identifica errores repetidos: tipo, contexto y línea donde se lanzó
+
+        No formatea el traceback; solo recorre los frames hasta el último.
+        Sin traceback (excepción no lanzada) se usa el mensaje.
+        """
+        tb = excepcion.__traceback__
+        if tb is None:
+            return type(excepcion).__name__, contexto, str(excepcion)[:200]
+        while tb.tb_next is not None:
+            tb = tb.tb_next
+        return type(excepcion).__name__, contexto, tb.tb_frame.f_code.co_filename, tb.tb_lineno
+
+    @classmethod
+    def _registrar_repeticion(cls, firma: tuple):
+        """
+        Cuenta una aparición del error y decide si se escribe
+
+        Returns:
+            int | None: Repeticiones omitidas desde el último log de este error
+            (el error se escribe), o None si está dentro de la ventana y se omite
+        """
+        ahora = time.monotonic()
+        with cls._lock:
+            estado = cls._recientes.obtener(firma)
+            if estado is not None and ahora - estado[0] < ERRORES_VENTANA_SEGUNDOS:
+                estado[1] += 1
+                return None
+            omitidos = estado[1] if estado is not None else 0
+            cls._recientes.guardar(firma, [ahora, 0])
+            return omitidos
 
     @classmethod
     def log_error(cls, excepcion: Exception, contexto: str = "Error") -> Dict[str, Any]:
@@ -77,25 +148,28 @@ class ExceptionHandler:
         Returns:
             dict: Información del error extraída
         """
-        info_error = cls._extraer_info_error(excepcion)
+        registro = RegistroError(excepcion, contexto)
+        cls._escribir_log(registro, omitidos=0)
+        return registro.info_error
 
+    @classmethod
+    def _escribir_log(cls, registro: 'RegistroError', omitidos: int):
+        """Log del error; el traceback lo formatea el handler (una vez, en el hilo escritor)"""
+        excepcion = registro.excepcion
+        separador = '=' * 60
+        repeticiones = f"\nRepeticiones omitidas: {omitidos}" if omitidos else ''
         logger.error(
-            f"\n{'='*60}\n"
-            f"🚨 ERROR: {contexto}\n"
-            f"{'='*60}\n"
-            f"Tipo: {info_error['tipo']}\n"
-            f"Mensaje: {info_error['mensaje']}\n"
-            f"Timestamp: {info_error['timestamp']}\n"
-            f"{'='*60}\n"
-            f"Traceback:\n{info_error['traceback']}\n"
-            f"{'='*60}\n"
+            "\n%s\n🚨 ERROR: %s\n%s\nTipo: %s\nMensaje: %s\nTimestamp: %s%s\n%s",
+            separador, registro.contexto, separador, registro.tipo, excepcion,
+            registro.timestamp, repeticiones, separador,
+            exc_info=(type(excepcion), excepcion, excepcion.__traceback__),
+            extra={'tipo_error': registro.tipo, 'contexto': registro.contexto,
+                   'repeticiones_omitidas': omitidos}
         )
 
-        return info_error
-
     @classmethod
     def crear_embed_error(cls, excepcion: Exception, contexto: str = "Error",
-                         datos_adicionales: Optional[Dict] = None) -> discord.Embed:
+                         datos_adicionales: Optional[Dict] = None) -> 'discord.Embed':
         """
         Crea un embed de Discord con información del error
 
@@ -107,10 +181,17 @@ class ExceptionHandler:
         Returns:
             discord.Embed: Embed configurado
         """
-        info_error = cls._extraer_info_error(excepcion)
+        return RegistroError(excepcion, contexto, datos_adicionales).embed
+
+    @classmethod
+    def _construir_embed(cls, registro: 'RegistroError') -> 'discord.Embed':
+        """Embed de Discord a partir de un RegistroError"""
+        import discord
+
+        info_error = registro.info_error
 
         embed = discord.Embed(
-            title=f"{info_error['emoji']} ERROR - {contexto}",
+            title=f"{info_error['emoji']} ERROR - {registro.contexto}",
             description=info_error['mensaje'],
             color=info_error['color'],
             timestamp=datetime.now()
@@ -130,8 +211,8 @@ class ExceptionHandler:
         )
 
         # Datos adicionales si existen
-        if datos_adicionales:
-            for clave, valor in datos_adicionales.items():
+        if registro.datos_adicionales:
+            for clave, valor in registro.datos_adicionales.items():
                 embed.add_field(
                     name=f"📌 {clave}",
                     value=f"`{str(valor)[:256]}`",
@@ -155,10 +236,16 @@ class ExceptionHandler:
     @classmethod
     def manejar_error(cls, excepcion: Exception, contexto: str = "Error",
                      datos_adicionales: Optional[Dict] = None,
-                     callback_discord=None) -> Dict[str, Any]:
+                     callback_discord=None) -> 'RegistroError':
         """
         Maneja un error de forma centralizada: logging + Discord
 
+        El traceback, el embed y el Markdown se generan solo si se consultan
+        (resultado['embed'], resultado.markdown...). Un mismo error repetido
+        (mismo tipo, contexto y línea) se escribe una vez por ventana de
+        ERRORES_VENTANA_SEGUNDOS; las repeticiones se cuentan y se indican en
+        el siguiente log, y bot_errores_total las incluye todas.
+
         Args:
             excepcion: Excepción capturada
             contexto: Contexto del error
@@ -166,20 +253,16 @@ class ExceptionHandler:
             callback_discord: Función async para enviar embed a Discord
 
         Returns:
-            dict: Información del error y embed
+            RegistroError: Dict de solo lectura con 'info_error', 'embed' y 'callback_discord'
         """
-        # Log en consola
-        info_error = cls.log_error(excepcion, contexto)
+        registro = RegistroError(excepcion, contexto, datos_adicionales, callback_discord)
+        errores_manejados.incrementar(tipo=registro.tipo)
 
-        # Crear embed
-        embed = cls.crear_embed_error(excepcion, contexto, datos_adicionales)
+        omitidos = cls._registrar_repeticion(cls._firma(excepcion, contexto))
+        if omitidos is not None:
+            cls._escribir_log(registro, omitidos)
 
-        # Retornar información
-        return {
-            'info_error': info_error,
-            'embed': embed,
-            'callback_discord': callback_discord
-        }
+        return registro
 
     @classmethod
     def crear_plantilla_error_markdown(cls, excepcion: Exception, contexto: str = "Error",
@@ -195,62 +278,92 @@ class ExceptionHandler:
         Returns:
             str: Markdown con información del error
         """
-        from pathlib import Path
-        from jinja2 import Template
+        return RegistroError(excepcion, contexto, datos_adicionales).markdown
 
-        info_error = cls._extraer_info_error(excepcion)
+    @classmethod
+    def _renderizar_markdown(cls, registro: 'RegistroError') -> str:
+        """Plantilla Markdown a partir de un RegistroError"""
+        global _plantilla_markdown
+        if _plantilla_markdown is None:
+            from jinja2 import Template
+
+            try:
+                template_content = PLANTILLA_ERROR_MD.read_text(encoding='utf-8')
+            except FileNotFoundError:
+                # Plantilla por defecto si no existe
+                template_content = PLANTILLA_ERROR_MD_DEFECTO
+            _plantilla_markdown = Template(template_content)
+
+        info_error = registro.info_error
+        return _plantilla_markdown.render(
+            contexto=registro.contexto,
+            tipo_error=info_error['tipo'],
+            mensaje=info_error['mensaje'],
+            timestamp=info_error['timestamp'],
+            traceback=info_error['traceback'],
+            datos_adicionales=registro.datos_adicionales or {}
+        )
 
-        # Cargar plantilla Markdown
-        template_path = Path(__file__).parent.parent / 'templates' / 'error.md'
 
-        try:
-            with open(template_path, 'r', encoding='utf-8') as f:
-                template_content = f.read()
-        except FileNotFoundError:
-            # Plantilla por defecto si no existe
-            template_content = """# ❌ ERROR - {{ contexto }}
+class RegistroError(Mapping):
+    """
+    Resultado de ExceptionHandler.manejar_error
 
-## 🔴 Tipo de Error
-```
-{{ tipo_error }}
-```
+    Se usa como el dict de antes (resultado['embed'], resultado['info_error'])
+    pero cada parte se calcula la primera vez que se consulta: quien solo
+    quiere el log no paga el formateo del traceback, el embed ni la plantilla.
+    """
 
-## 💬 Mensaje
-{{ mensaje }}
+    CLAVES = ('info_error', 'embed', 'callback_discord')
 
-## ⏰ Información de Tiempo
-**{{ timestamp }}**
+    def __init__(self, excepcion: Exception, contexto: str = "Error",
+                 datos_adicionales: Optional[Dict] = None, callback_discord=None):
+        self.excepcion = excepcion
+        self.contexto = contexto
+        self.datos_adicionales = datos_adicionales
+        self.callback_discord = callback_discord
+        self.tipo = type(excepcion).__name__
+        self.timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
-{% if datos_adicionales %}
-## 📊 Datos Adicionales
-{% for clave, valor in datos_adicionales.items() %}
-- **{{ clave }}:** `{{ valor }}`
-{% endfor %}
-{% endif %}
+    def __getitem__(self, clave):
+        if clave not in self.CLAVES:
+            raise KeyError(clave)
+        return getattr(self, clave)
 
-## 📋 Traceback Completo
-```
-{{ traceback }}
-```
+    def __iter__(self):
+        return iter(self.CLAVES)
 
----
-*Sistema de manejo de errores centralizado - BotPersonal*
-"""
+    def __len__(self):
+        return len(self.CLAVES)
 
-        # Compilar plantilla
-        template = Template(template_content)
+    def __repr__(self):
+        return f"RegistroError({self.tipo}: {self.contexto})"
 
-        # Renderizar con datos
-        markdown_content = template.render(
-            contexto=contexto,
-            tipo_error=info_error['tipo'],
-            mensaje=info_error['mensaje'],
-            timestamp=info_error['timestamp'],
-            traceback=info_error['traceback'],
-            datos_adicionales=datos_adicionales or {}
-        )
+    @cached_property
+    def traceback(self) -> str:
+        """Traceback completo de la excepción (no depende de sys.exc_info)"""
+        return ''.join(traceback.format_exception(
+            type(self.excepcion), self.excepcion, self.excepcion.__traceback__
+        ))
+
+    @cached_property
+    def info_error(self) -> Dict[str, Any]:
+        return {
+            'tipo': self.tipo,
+            'mensaje': str(self.excepcion),
+            'traceback': self.traceback,
+            'timestamp': self.timestamp,
+            'emoji': ExceptionHandler._obtener_emoji(self.tipo),
+            'color': ExceptionHandler._obtener_color(self.tipo),
+        }
+
+    @cached_property
+    def embed(self) -> 'discord.Embed':
+        return ExceptionHandler._construir_embed(self)
 
-        return markdown_content
+    @cached_property
+    def markdown(self) -> str:
+        return ExceptionHandler._renderizar_markdown(self)
 
 
 # Instancia global para usar en toda la app
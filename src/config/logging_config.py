@@ -1,11 +1,33 @@
 """
 Configuración centralizada de logging
 Sistema profesional de logs con archivos rotatorios y niveles configurables
+
+Con LOG_ASINCRONO (por defecto) los handlers de consola y archivo corren en
+un hilo escritor: quien loguea solo encola el registro y el formateo y la
+escritura a disco no bloquean el event loop.
+
+Con LOG_FORMATO=json cada registro es una línea JSON con los campos de
+contexto (request_id, usuario_id, etapa, duracion_ms...) para poder
+consultarlos. LOG_MUESTREO y LOG_LIMITE_POR_SEGUNDO reducen por logger el
+volumen de los registros por debajo de WARNING; los avisos y errores se
+conservan siempre.
 """
+import atexit
+import json
 import logging
+import os
 import logging.handlers
+import queue
+import random
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from contextvars import ContextVar
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timezone
+
+from .app_config import LOG_ASINCRONO, LOG_FORMATO, LOG_MUESTREO, LOG_LIMITE_POR_SEGUNDO
 
 # Directorio de logs
 LOGS_DIR = Path(__file__).parent.parent / 'logs'
@@ -29,15 +51,206 @@ LOG_LEVELS = {
     'CRITICAL': logging.CRITICAL
 }
 
+# Atributos propios de LogRecord: el resto son campos añadidos con extra= o contexto
+_CAMPOS_RECORD = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+# Campos de contexto de la tarea actual (ver contexto_log)
+_contexto = ContextVar('contexto_log', default={})
+
+
+@contextmanager
+def contexto_log(**campos):
+    """
+    Añade campos a todos los logs emitidos dentro del bloque
+
+    El contexto sigue a la tarea de asyncio (y a las tareas que cree),
+    así que basta con abrirlo al recibir el mensaje.
+
+    Ejemplo:
+        with contexto_log(request_id=message.id, usuario_id=message.author.id):
+            ...
+    """
+    token = _contexto.set({**_contexto.get(), **campos})
+    try:
+        yield
+    finally:
+        _contexto.reset(token)
+
+
+def parsear_reglas(texto: str) -> dict:
+    """
+    Convierte "logger=valor,logger=valor" en {logger: float}
+
+    Las entradas mal formadas se ignoran.
+    """
+    reglas = {}
+    for parte in (texto or '').split(','):
+        nombre, _, valor = parte.partition('=')
+        try:
+            reglas[nombre.strip()] = float(valor)
+        except ValueError:
+            continue
+    return {nombre: valor for nombre, valor in reglas.items() if nombre}
+
+
+def _buscar_regla(nombre: str, reglas: dict):
+    """Regla del prefijo de logger más largo que coincide, o (None, None)"""
+    while nombre:
+        if nombre in reglas:
+            return nombre, reglas[nombre]
+        nombre = nombre.rpartition('.')[0]
+    return None, None
+
+
+class FiltroContexto(logging.Filter):
+    """
+    Copia los campos de contexto_log en el registro
+
+    Debe correr en el hilo que loguea (filtro del handler raíz), antes de
+    que el registro pase a la cola.
+    """
+
+    def filter(self, record):
+        for clave, valor in _contexto.get().items():
+            if not hasattr(record, clave):
+                setattr(record, clave, valor)
+        return True
+
+
+class FiltroMuestreo(logging.Filter):
+    """
+    Muestreo y límite de frecuencia por logger
+
+    Solo afecta a registros por debajo de `nivel_minimo` (WARNING): los
+    avisos y errores pasan siempre. La decisión de muestreo se toma por
+    request_id, de forma que una petición muestreada conserva su traza
+    completa en vez de líneas sueltas. El límite es una cubeta de tokens
+    por regla (hasta `n` registros por segundo).
+    """
+
+    def __init__(self, muestreo=None, limites=None, nivel_minimo=logging.WARNING):
+        super().__init__()
+        self.muestreo = dict(muestreo or {})
+        self.limites = dict(limites or {})
+        self.nivel_minimo = nivel_minimo
+        self.descartados = 0
+        self._cubetas = {}
+        self._lock = threading.Lock()
+
+    def _muestreado(self, record, tasa: float) -> bool:
+        request_id = getattr(record, 'request_id', None)
+        if request_id is None:
+            return random.random() < tasa
+        return zlib.crc32(str(request_id).encode()) % 10000 < tasa * 10000
+
+    def _dentro_del_limite(self, regla: str, por_segundo: float) -> bool:
+        ahora = time.monotonic()
+        with self._lock:
+            tokens, ultimo = self._cubetas.get(regla, (por_segundo, ahora))
+            tokens = min(por_segundo, tokens + (ahora - ultimo) * por_segundo)
+            permitido = tokens >= 1
+            self._cubetas[regla] = (tokens - 1 if permitido else tokens, ahora)
+        return permitido
+
+    def filter(self, record):
+        if record.levelno >= self.nivel_minimo:
+            return True
+
+        _, tasa = _buscar_regla(record.name, self.muestreo)
+        conservar = tasa is None or self._muestreado(record, tasa)
+        if conservar:
+            regla, por_segundo = _buscar_regla(record.name, self.limites)
+            conservar = regla is None or self._dentro_del_limite(regla, por_segundo)
+
+        if not conservar:
+            self.descartados += 1
+        return conservar
+
+
+class FormateadorJSON(logging.Formatter):
+    """Una línea JSON por registro, con los campos de extra= y de contexto"""
+
+    def format(self, record):
+        datos = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'nivel': record.levelname,
+            'logger': record.name,
+            'mensaje': record.getMessage().strip(),
+        }
+        for clave, valor in record.__dict__.items():
+            if clave not in _CAMPOS_RECORD and not clave.startswith('_'):
+                datos[clave] = valor
+        if record.exc_info:
+            datos['excepcion'] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            datos['excepcion'] = record.exc_text
+        if record.stack_info:
+            datos['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(datos, ensure_ascii=False, default=str)
+
+
+def _despachar(record, handlers):
+    """Entrega el registro a los handlers de salida que aceptan su nivel"""
+    for handler in handlers:
+        if record.levelno >= handler.level:
+            handler.handle(record)
+
+
+class DespachoLogHandler(logging.Handler):
+    """
+    Único handler del logger raíz en modo síncrono
+
+    Los filtros de contexto y muestreo van en este handler, así que cada
+    registro pasa por ellos una sola vez y después llega a todos los
+    handlers de salida (consola y archivo) o a ninguno.
+    """
+
+    def __init__(self, handlers):
+        super().__init__()
+        self._handlers = handlers
+
+    def emit(self, record):
+        _despachar(record, self._handlers)
+
+
+class ColaLogHandler(logging.handlers.QueueHandler):
+    """
+    Encola los registros sin formatearlos
+
+    QueueHandler.prepare formatea el mensaje en el hilo que loguea. El
+    listener corre en un hilo del mismo proceso, así que el registro puede
+    pasar tal cual y el formateo %-style se hace también en el hilo escritor.
+    Por eso los argumentos del log no deben mutarse después de loguearlos.
+    """
+
+    def __init__(self, cola, handlers):
+        super().__init__(cola)
+        self._pid = os.getpid()
+        self._handlers = handlers
+
+    def prepare(self, record):
+        return record
+
+    def emit(self, record):
+        if os.getpid() != self._pid:
+            # Proceso hijo (fork de un worker OCR): no tiene hilo escritor
+            _despachar(record, self._handlers)
+            return
+        super().emit(record)
+
 
 class LoggerConfig:
     """Configuración centralizada de logging"""
 
     _initialized = False
     _root_logger = None
+    _handlers = []
+    _listener = None
+    _filtros = []
 
     @classmethod
-    def initialize(cls, level='INFO', enable_file=True, enable_console=True):
+    def initialize(cls, level='INFO', enable_file=True, enable_console=True,
+                   asincrono=LOG_ASINCRONO, formato=LOG_FORMATO):
         """
         Inicializa el sistema de logging centralizado
 
@@ -45,6 +258,8 @@ class LoggerConfig:
             level (str): Nivel de logging (DEBUG, INFO, WARNING, ERROR, CRITICAL)
             enable_file (bool): Habilitar logs a archivo
             enable_console (bool): Habilitar logs a consola
+            asincrono (bool): Escribir los logs desde un hilo aparte (QueueListener)
+            formato (str): 'texto' o 'json'
         """
         if cls._initialized:
             return
@@ -56,15 +271,20 @@ class LoggerConfig:
         for handler in cls._root_logger.handlers[:]:
             cls._root_logger.removeHandler(handler)
 
+        handlers = []
+
         # Handler para consola
         if enable_console:
             console_handler = logging.StreamHandler()
             console_handler.setLevel(LOG_LEVELS.get(level, logging.INFO))
-            console_formatter = logging.Formatter(
-                LOG_FORMATS['console']
-            )
+            if formato == 'json':
+                console_formatter = FormateadorJSON()
+            else:
+                console_formatter = logging.Formatter(
+                    LOG_FORMATS['console']
+                )
             console_handler.setFormatter(console_formatter)
-            cls._root_logger.addHandler(console_handler)
+            handlers.append(console_handler)
 
         # Handler para archivo con rotación
         if enable_file:
@@ -76,15 +296,61 @@ class LoggerConfig:
                 encoding='utf-8'
             )
             file_handler.setLevel(LOG_LEVELS.get(level, logging.INFO))
-            file_formatter = logging.Formatter(
-                LOG_FORMATS['file'],
-                datefmt=LOG_DATE_FORMAT
-            )
+            if formato == 'json':
+                file_formatter = FormateadorJSON()
+            else:
+                file_formatter = logging.Formatter(
+                    LOG_FORMATS['file'],
+                    datefmt=LOG_DATE_FORMAT
+                )
             file_handler.setFormatter(file_formatter)
-            cls._root_logger.addHandler(file_handler)
+            handlers.append(file_handler)
+
+        # Contexto y muestreo se aplican una vez por registro, en el único
+        # handler del logger raíz (cola o despacho) y en el hilo que loguea
+        cls._filtros = [
+            FiltroContexto(),
+            FiltroMuestreo(parsear_reglas(LOG_MUESTREO), parsear_reglas(LOG_LIMITE_POR_SEGUNDO)),
+        ]
+
+        cls._handlers = handlers
+        if asincrono and handlers:
+            # El hilo que loguea solo encola; el listener escribe en los handlers reales
+            cola = queue.SimpleQueue()
+            cls._listener = logging.handlers.QueueListener(
+                cola, *handlers, respect_handler_level=True
+            )
+            cls._listener.start()
+            cls._agregar_handler(ColaLogHandler(cola, handlers))
+            atexit.register(cls.detener)
+        elif handlers:
+            cls._agregar_handler(DespachoLogHandler(handlers))
 
         cls._initialized = True
 
+    @classmethod
+    def detener(cls):
+        """
+        Vacía la cola de logs y detiene el hilo escritor
+
+        Los logs posteriores se escriben directamente (sin cola).
+        """
+        if cls._listener is None:
+            return
+        cls._listener.stop()
+        cls._listener = None
+        for handler in cls._root_logger.handlers[:]:
+            if isinstance(handler, ColaLogHandler):
+                cls._root_logger.removeHandler(handler)
+        cls._agregar_handler(DespachoLogHandler(cls._handlers))
+
+    @classmethod
+    def _agregar_handler(cls, handler):
+        """Añade al logger raíz el handler de entrada, con los filtros de contexto y muestreo"""
+        for filtro in cls._filtros:
+            handler.addFilter(filtro)
+        cls._root_logger.addHandler(handler)
+
     @classmethod
     def get_logger(cls, module_name: str) -> logging.Logger:
         """
@@ -107,7 +373,7 @@ class LoggerConfig:
         log_level = LOG_LEVELS.get(level, logging.INFO)
         if cls._root_logger:
             cls._root_logger.setLevel(log_level)
-            for handler in cls._root_logger.handlers:
+            for handler in cls._handlers:
                 handler.setLevel(log_level)
 
     @classmethod
@@ -6,6 +6,7 @@ import json
 from pathlib import Path
 from src.logger import get_logger
 from src.config.exception_handler import ExceptionHandler
+from src.keyword_matcher import KeywordMatcher
 
 logger = get_logger(__name__)
 
@@ -17,6 +18,7 @@ class OCRConfig:
         """Inicializa la configuración desde JSON"""
         self.config_path = Path(__file__).parent / 'ocr_keywords.json'
         self.config = self._cargar_config()
+        self.matcher = self._construir_matcher()
 
     def _cargar_config(self):
         """Carga la configuración desde JSON"""
@@ -61,7 +63,19 @@ class OCRConfig:
             ],
             'palabras_fecha': [
                 'fecha', 'día', 'emisión', 'expedición'
-            ]
+            ],
+            'palabras_negocio': [
+                'tienda', 'comercio', 'empresa', 'establecimiento', 'negocio', 'supermercado', 'mercado'
+            ],
+            'categorias': {
+                'Alimentación': ['supermercado', 'mercado', 'panadería', 'carnicería', 'verdulería', 'tienda de alimentos', 'restaurante', 'comida'],
+                'Transporte': ['gasolina', 'uber', 'taxi', 'bus', 'pasaje', 'tren', 'auto', 'combustible'],
+                'Salud': ['farmacia', 'medicina', 'doctor', 'hospital', 'médico', 'salud'],
+                'Electrónica': ['electrónica', 'tienda tech', 'computadora', 'teléfono', 'laptop'],
+                'Entretenimiento': ['cine', 'teatro', 'juegos', 'música', 'entretenimiento'],
+                'Servicios': ['servicio', 'reparación', 'plomería', 'electricidad', 'mantenimiento'],
+                'Compras': ['compras', 'tienda', 'ropa', 'calzado', 'boutique']
+            }
         }
 
     def get_palabras_total(self):
@@ -76,11 +90,54 @@ class OCRConfig:
         """Obtiene palabras clave para detectar la fecha"""
         return self.config.get('palabras_fecha', self._config_por_defecto()['palabras_fecha'])
 
+    def get_palabras_negocio(self):
+        """Obtiene palabras clave que identifican al vendedor"""
+        return self.config.get('palabras_negocio', self._config_por_defecto()['palabras_negocio'])
+
+    def get_categorias(self):
+        """Obtiene las categorías (en orden de prioridad) con sus palabras clave"""
+        return self.config.get('categorias', self._config_por_defecto()['categorias'])
+
+    def detectar_categoria(self, texto):
+        """
+        Primera categoría (en el orden de ocr_keywords.json) con alguna
+        palabra clave en el texto, buscadas en una sola pasada del autómata
+
+        Returns:
+            str: Nombre de la categoría, o 'Otros' si ninguna coincide
+        """
+        etiquetas = self.matcher.etiquetas(texto.lower())
+        for categoria in self.get_categorias():
+            if ('categoria', categoria) in etiquetas:
+                return categoria
+        return 'Otros'
+
+    def _construir_matcher(self):
+        """
+        Compila un único autómata con todas las palabras clave
+
+        Etiquetas: 'total', 'negocio' y ('categoria', nombre)
+        """
+        palabras = {}
+        for palabra in self.get_palabras_total():
+            palabras.setdefault(palabra, set()).add('total')
+        for palabra in self.get_palabras_negocio():
+            palabras.setdefault(palabra, set()).add('negocio')
+        for categoria, palabras_clave in self.get_categorias().items():
+            for palabra in palabras_clave:
+                palabras.setdefault(palabra, set()).add(('categoria', categoria))
+
+        matcher = KeywordMatcher(palabras)
+        logger.debug(f"🔤 Autómata de palabras clave: {len(matcher)} palabras")
+        return matcher
+
     def agregar_palabra_total(self, palabra):
         """Agrega una palabra clave para total"""
         palabras = self.get_palabras_total()
         if palabra not in palabras:
             palabras.append(palabra)
+            self.config['palabras_total'] = palabras
+            self.matcher = self._construir_matcher()
             self._guardar_config()
             logger.info(f"📝 Palabra agregada: '{palabra}'")
 
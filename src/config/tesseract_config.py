@@ -1,17 +1,25 @@
 """
 Configuración automática de Tesseract OCR
+
+La búsqueda del ejecutable (que lanza `tesseract --version` por cada ruta)
+no se hace al importar: detectar_tesseract() la ejecuta una sola vez, en el
+primer OCR o en segundo plano al arrancar el bot. TESSERACT_CMD y
+TESSERACT_ENCONTRADO siguen disponibles como atributos del módulo y se
+calculan al leerlos por primera vez.
 """
 import os
 import json
+import shutil
 import subprocess
+import threading
 from pathlib import Path
+from typing import NamedTuple, Optional
 from src.logger import get_logger
 from src.config.exception_handler import ExceptionHandler
+from .app_config import TESSERACT_DETECCION_DIFERIDA
 
 logger = get_logger(__name__)
 
-logger.info("🔧 ============ CONFIGURANDO TESSERACT ============")
-
 # ============================================================
 # TESSERACT OCR - Configuración automática
 # ============================================================
@@ -30,7 +38,7 @@ def _cargar_rutas_tesseract():
             contexto="Cargando rutas de Tesseract",
             datos_adicionales={'Archivo': str(ruta_config)}
         )
-        logger.info(f"Usando rutas por defecto")
+        logger.info("Usando rutas por defecto")
         return [
             r'C:\Users\Yemi Genderson\AppData\Local\Programs\Tesseract-OCR\tesseract.exe',
             r'C:\Program Files\Tesseract-OCR\tesseract.exe',
@@ -54,48 +62,90 @@ def _cargar_rutas_tesseract():
 
 TESSERACT_RUTAS = _cargar_rutas_tesseract()
 
-TESSERACT_CMD = None
-TESSERACT_ENCONTRADO = False
-
-# Buscar Tesseract en rutas locales
-for ruta in TESSERACT_RUTAS:
-    if os.path.exists(ruta):
-        try:
-            resultado = subprocess.run([ruta, '--version'], capture_output=True, text=True, timeout=5)
-            if resultado.returncode == 0:
-                TESSERACT_CMD = ruta
-                TESSERACT_ENCONTRADO = True
-                version = resultado.stdout.split('\n')[0]
-                logger.info(f"✅ Tesseract encontrado en: {ruta}")
-                logger.info(f"Versión: {version}")
-                break
-        except Exception as e:
-            logger.warning(f"⚠️ Error verificando {ruta}: {e}")
-
-# Si no se encontró en rutas locales, buscar en PATH
-if not TESSERACT_ENCONTRADO:
+
+class DeteccionTesseract(NamedTuple):
+    """Resultado de buscar Tesseract: ejecutable (None = 'tesseract' del PATH) y si funciona"""
+    comando: Optional[str]
+    encontrado: bool
+
+
+_deteccion = None
+_lock_deteccion = threading.Lock()
+
+
+def _buscar_tesseract() -> DeteccionTesseract:
+    """Prueba las rutas configuradas y después el PATH (lanza `tesseract --version`)"""
+    logger.info("🔧 ============ CONFIGURANDO TESSERACT ============")
+
+    # Buscar Tesseract en rutas locales
+    for ruta in TESSERACT_RUTAS:
+        if os.path.exists(ruta):
+            try:
+                resultado = subprocess.run([ruta, '--version'], capture_output=True, text=True, timeout=5)
+                if resultado.returncode == 0:
+                    version = resultado.stdout.split('\n')[0]
+                    logger.info("✅ Tesseract encontrado en: %s", ruta)
+                    logger.info("Versión: %s", version)
+                    return DeteccionTesseract(ruta, True)
+            except Exception as e:
+                logger.warning("⚠️ Error verificando %s: %s", ruta, e)
+
+    # Si no se encontró en rutas locales, buscar en PATH
     try:
         resultado = subprocess.run(['tesseract', '--version'], capture_output=True, text=True, timeout=5)
         if resultado.returncode == 0:
-            TESSERACT_ENCONTRADO = True
             version = resultado.stdout.split('\n')[0]
-            logger.info(f"✅ Tesseract encontrado en PATH")
-            logger.info(f"Versión: {version}")
-            # Obtener ruta completa
-            try:
-                resultado_where = subprocess.run(['where', 'tesseract'], capture_output=True, text=True)
-                if resultado_where.returncode == 0:
-                    TESSERACT_CMD = resultado_where.stdout.strip().split('\n')[0]
-            except:
-                pass
+            logger.info("✅ Tesseract encontrado en PATH")
+            logger.info("Versión: %s", version)
+            # Obtener ruta completa (sin lanzar otro proceso)
+            return DeteccionTesseract(shutil.which('tesseract'), True)
     except Exception as e:
-        logger.warning(f"⚠️ Error buscando Tesseract en PATH: {e}")
+        logger.warning("⚠️ Error buscando Tesseract en PATH: %s", e)
+
+    logger.error("❌ ADVERTENCIA: Tesseract no encontrado")
+    logger.error("Descargalo desde: https://github.com/UB-Mannheim/tesseract/wiki")
+    return DeteccionTesseract(None, False)
+
+
+def detectar_tesseract() -> DeteccionTesseract:
+    """
+    Busca Tesseract la primera vez que se llama y guarda el resultado
+
+    Las llamadas siguientes (o concurrentes) devuelven el mismo resultado
+    sin lanzar procesos.
+    """
+    global _deteccion
+    if _deteccion is None:
+        with _lock_deteccion:
+            if _deteccion is None:
+                _deteccion = _buscar_tesseract()
+                if _deteccion.encontrado:
+                    logger.info("✅ Tesseract configurado correctamente")
+                logger.info("🔧 ============ CONFIGURACION COMPLETADA ============\n")
+    return _deteccion
+
+
+def tesseract_detectado() -> bool:
+    """Indica si la búsqueda ya terminó (detectar_tesseract no bloqueará)"""
+    return _deteccion is not None
+
+
+def detectar_tesseract_en_segundo_plano() -> threading.Thread:
+    """Lanza la búsqueda en un hilo para tenerla lista antes de la primera factura"""
+    hilo = threading.Thread(target=detectar_tesseract, name='detectar-tesseract', daemon=True)
+    hilo.start()
+    return hilo
+
 
-if TESSERACT_ENCONTRADO:
-    logger.info(f"✅ Tesseract configurado correctamente")
-else:
-    logger.error(f"❌ ADVERTENCIA: Tesseract no encontrado")
-    logger.error(f"Descargalo desde: https://github.com/UB-Mannheim/tesseract/wiki")
+def __getattr__(nombre):
+    # TESSERACT_CMD y TESSERACT_ENCONTRADO se calculan al leerlos por primera vez
+    if nombre == 'TESSERACT_CMD':
+        return detectar_tesseract().comando
+    if nombre == 'TESSERACT_ENCONTRADO':
+        return detectar_tesseract().encontrado
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
 
-logger.info("🔧 ============ CONFIGURACION COMPLETADA ============\n")
 
+# Sin detección diferida se busca al importar, como antes
+if not TESSERACT_DETECCION_DIFERIDA:
+    detectar_tesseract()
@@ -2,10 +2,12 @@
 Controlador de Comandos
 Manejadores de comandos del bot
 """
+import tempfile
 import discord
 from discord.ext import commands
-from src.services import GastoService, DiscordService
-from src.config import COMMAND_PREFIX
+from src.services import GastoService, DiscordService, ExportService, ImportService
+from src.config import COMMAND_PREFIX, IMPORTAR_MAX_BYTES, ExceptionHandler
+from src.controller.paginador_gastos import PaginadorGastos
 from src.utils import get_logger
 
 logger = get_logger(__name__)
@@ -35,6 +37,15 @@ def registrar_comandos_en_controller(bot):
         """Ver por categoría"""
         await controller.ver_categorias(ctx, dias)
 
+    @bot.command(name='exportar')
+    async def exportar(ctx, formato: str = 'csv'):
+        """Exportar gastos (csv o ndjson)"""
+        await controller.exportar(ctx, formato)
+
+    @bot.command(name='importar')
+    async def importar(ctx):
+        """Importar gastos desde un CSV adjunto"""
+        await controller.importar(ctx)
 
 
 class ComandoController:
@@ -46,18 +57,98 @@ class ComandoController:
     async def ver_gastos(self, ctx, dias: int = 30):
         """Comando gastos"""
         logger.info(f"💰 Comando !gastos ejecutado por {ctx.author}")
-        embed = GastoService.crear_embed_gastos(ctx.author.id, dias)
-        await ctx.send(embed=embed)
+        embed, resumen = await GastoService.crear_vista_gastos(ctx.author.id, dias)
+        pagina = resumen['pagina']
+        if not pagina['hay_siguiente']:
+            await ctx.send(embed=embed)
+            return
+
+        paginador = PaginadorGastos(ctx.author.id, dias, resumen['cantidad'], pagina)
+        paginador.mensaje = await ctx.send(embed=embed, view=paginador)
 
     async def ver_total(self, ctx, dias: int = 30):
         """Comando total"""
         logger.info(f"📊 Comando !total ejecutado por {ctx.author}")
-        embed = GastoService.crear_embed_total(ctx.author.id, dias)
+        embed = await GastoService.crear_embed_total(ctx.author.id, dias)
         await ctx.send(embed=embed)
 
     async def ver_categorias(self, ctx, dias: int = 30):
         """Comando categorias"""
         logger.info(f"📈 Comando !categorias ejecutado por {ctx.author}")
-        embed = GastoService.crear_embed_categorias(ctx.author.id, dias)
+        embed = await GastoService.crear_embed_categorias(ctx.author.id, dias)
         await ctx.send(embed=embed)
 
+    async def exportar(self, ctx, formato: str = 'csv'):
+        """Comando exportar"""
+        logger.info(f"📤 Comando !exportar ejecutado por {ctx.author}")
+        formato = formato.lower()
+        if formato not in ExportService.FORMATOS:
+            await ctx.send(f"❌ Formato no soportado. Usa: {', '.join(ExportService.FORMATOS)}")
+            return
+
+        # El archivo se escribe en disco por bloques y se sube leyendo del archivo
+        archivo, tamano = await ExportService.exportar_archivo(ctx.author.id, formato)
+        try:
+            limite = ctx.guild.filesize_limit if ctx.guild else discord.utils.DEFAULT_FILE_SIZE_LIMIT_BYTES
+            if tamano <= limite:
+                await ctx.send(
+                    "📤 Aquí tienes tus gastos:",
+                    file=discord.File(archivo, filename=f"gastos.{formato}")
+                )
+                return
+        finally:
+            archivo.close()
+
+        # Demasiado grande para un adjunto: enlace firmado por mensaje privado
+        url = ExportService.url_descarga(ctx.author.id, formato)
+        if url is None:
+            await ctx.send("⚠️ La exportación supera el tamaño máximo de un adjunto en Discord.")
+            return
+        try:
+            await ctx.author.send(f"📤 Descarga tus gastos aquí (el enlace caduca pronto):\n{url}")
+        except discord.Forbidden:
+            # Mensajes privados desactivados: el enlace firmado no se publica en el canal
+            logger.warning(f"⚠️ No se pudo enviar el enlace de exportación por privado a {ctx.author}")
+            await ctx.send(
+                "⚠️ La exportación es grande y se envía por mensaje privado, pero no puedo escribirte. "
+                "Activa los mensajes directos de este servidor y vuelve a usar el comando."
+            )
+            return
+        await ctx.send("📬 La exportación es grande: te envié un enlace de descarga por mensaje privado.")
+
+    async def importar(self, ctx):
+        """Comando importar"""
+        logger.info(f"📥 Comando !importar ejecutado por {ctx.author}")
+        adjuntos = [a for a in ctx.message.attachments if a.filename.lower().endswith('.csv')]
+        if not adjuntos:
+            await ctx.send("❌ Adjunta un archivo `.csv` con columnas de descripción y monto (y opcionalmente fecha y categoría).")
+            return
+        adjunto = adjuntos[0]
+        if adjunto.size > IMPORTAR_MAX_BYTES:
+            await ctx.send(f"❌ El archivo supera el máximo de {IMPORTAR_MAX_BYTES // (1024 * 1024)} MB.")
+            return
+
+        resultado = ImportService.nuevo_resultado()
+        msg = await ctx.send(embed=ImportService.crear_embed(resultado, adjunto.filename))
+
+        async def progreso(resultado):
+            await msg.edit(embed=ImportService.crear_embed(resultado, adjunto.filename))
+
+        # Se descarga a disco y se lee fila a fila
+        with tempfile.TemporaryFile() as archivo:
+            try:
+                await adjunto.save(archivo)
+                resultado = await ImportService.importar(
+                    ctx.author.id, archivo, progreso=ImportService.limitador_progreso(progreso)
+                )
+                await msg.edit(embed=ImportService.crear_embed(resultado, adjunto.filename, terminado=True))
+            except Exception as e:
+                error = ExceptionHandler.manejar_error(
+                    excepcion=e,
+                    contexto="Importación de CSV",
+                    datos_adicionales={
+                        'Usuario': str(ctx.author),
+                        'Archivo': adjunto.filename
+                    }
+                )
+                await msg.edit(embed=error['embed'])
@@ -2,11 +2,13 @@
 Controlador de Eventos
 Manejadores de eventos del bot
 """
+import asyncio
 import discord
-from src.repository import GastoRepository
+from src.repository import AsyncGastoRepository
 from src.factura_processor import procesar_factura
+from src.ocr_executor import ocr_executor
 from src.services import GastoService, DiscordService
-from src.config import ExceptionHandler
+from src.config import ExceptionHandler, contexto_log
 from src.utils import get_logger
 
 logger = get_logger(__name__)
@@ -40,12 +42,18 @@ class EventoController:
 
     async def on_ready(self):
         """Bot conectado"""
-        logger.info(f"🤖 Bot conectado como {self.bot.user}")
-        logger.info(f"⏱️ Latencia: {round(self.bot.latency * 1000)}ms")
+        logger.info("🤖 Bot conectado como %s", self.bot.user)
+        logger.info("⏱️ Latencia: %sms", round(self.bot.latency * 1000))
 
     async def on_message(self, message):
         """Procesar mensajes"""
-        logger.debug(f"📬 Mensaje de {message.author}: {message.content}")
+        # Todos los logs del mensaje (OCR, BD, comandos) llevan su id y el del autor
+        with contexto_log(request_id=message.id, usuario_id=message.author.id):
+            await self._atender_mensaje(message)
+
+    async def _atender_mensaje(self, message):
+        """Procesa imágenes adjuntas y comandos de un mensaje"""
+        logger.debug("📬 Mensaje de %s: %s", message.author, message.content)
 
         # Ignorar mensajes del bot
         if message.author == self.bot.user:
@@ -53,32 +61,28 @@ class EventoController:
             return
 
         # Procesar imágenes (facturas)
-        if message.attachments:
-            for attachment in message.attachments:
-                if attachment.content_type.startswith('image/'):
-                    logger.info(f"📸 Imagen detectada: {attachment.filename}")
-                    await self._procesar_factura(message, attachment)
+        imagenes = [
+            attachment for attachment in message.attachments
+            if (attachment.content_type or '').startswith('image/')
+        ]
+        if len(imagenes) == 1:
+            logger.info("📸 Imagen detectada: %s", imagenes[0].filename)
+            await self._procesar_factura(message, imagenes[0])
+        elif imagenes:
+            logger.info("📸 %s imágenes detectadas, procesando en lote", len(imagenes))
+            await self._procesar_lote(message, imagenes)
 
         # Procesar comandos normales
         await self.bot.process_commands(message)
 
     async def _procesar_factura(self, message, attachment):
         """Procesa una factura"""
-        logger.info(f"⏳ Procesando factura...")
+        logger.info("⏳ Procesando factura...")
 
         try:
-            # Descargar imagen
-            import io
-            import tempfile
-            from PIL import Image
-
+            # Descargar imagen (se mantiene en memoria)
             imagen_data = await attachment.read()
 
-            # Guardar en archivo temporal
-            with tempfile.NamedTemporaryFile(delete=False, suffix='.png') as tmp:
-                tmp.write(imagen_data)
-                ruta_temporal = tmp.name
-
             # Procesar OCR
             embed = discord.Embed(
                 title="⏳ Procesando factura...",
@@ -87,17 +91,13 @@ class EventoController:
             msg = await message.reply(embed=embed, mention_author=False)
 
             # Llamar a procesar_factura con await
-            datos = await procesar_factura(ruta_temporal)
+            datos = await procesar_factura(imagen_data)
 
             if 'error' not in datos:
                 # Crear gasto
-                gasto = GastoRepository.crear_gasto(
+                gasto = await AsyncGastoRepository.crear_gasto(
                     usuario_id=message.author.id,
-                    descripcion=datos.get('descripcion', 'Factura'),
-                    monto=datos.get('monto_total', 0),
-                    categoria=datos.get('categoria', 'Otros'),
-                    imagen_url=attachment.url,
-                    datos_ocr=datos
+                    **self._datos_gasto(datos, attachment)
                 )
 
                 # Mostrar éxito
@@ -115,12 +115,12 @@ class EventoController:
 
                 embed_exito.add_field(
                     name="📅 FECHA",
-                    value=gasto.fecha,
+                    value=gasto.fecha.strftime('%d/%m/%Y'),
                     inline=True
                 )
 
                 await msg.edit(embed=embed_exito)
-                logger.info(f"✅ Factura procesada exitosamente - ID: {gasto.id}")
+                logger.info("✅ Factura procesada exitosamente - ID: %s", gasto.id)
 
             else:
                 # Error en OCR
@@ -129,7 +129,7 @@ class EventoController:
                     datos['error']
                 )
                 await msg.edit(embed=embed_error)
-                logger.error(f"❌ Error en OCR: {datos['error']}")
+                logger.error("❌ Error en OCR: %s", datos['error'])
 
         except Exception as e:
             # Usar manejador centralizado de excepciones
@@ -147,3 +147,92 @@ class EventoController:
             embed_error = resultado['embed']
             await message.reply(embed=embed_error, mention_author=False)
 
+
+    @staticmethod
+    def _datos_gasto(datos, attachment):
+        """Campos del gasto a partir del resultado del OCR"""
+        return {
+            'descripcion': datos.get('descripción') or datos.get('descripcion') or 'Factura',
+            'monto': datos.get('monto_total') or 0,
+            'categoria': datos.get('categoría') or datos.get('categoria') or 'Otros',
+            'imagen_url': attachment.url,
+            'datos_ocr': datos
+        }
+
+    async def _procesar_lote(self, message, attachments):
+        """
+        Procesa varias facturas de un mismo mensaje
+
+        Descarga todas las imágenes a la vez, ejecuta el OCR en paralelo
+        (limitado al número de workers para no acaparar la cola compartida),
+        registra los gastos en una sola transacción y responde con un único embed.
+        """
+        embed = discord.Embed(
+            title=f"⏳ Procesando {len(attachments)} facturas...",
+            color=discord.Color.blue()
+        )
+        msg = await message.reply(embed=embed, mention_author=False)
+
+        try:
+            descargas = await asyncio.gather(
+                *(attachment.read() for attachment in attachments),
+                return_exceptions=True
+            )
+
+            en_paralelo = asyncio.Semaphore(ocr_executor.max_workers)
+
+            async def procesar(datos_imagen):
+                if isinstance(datos_imagen, Exception):
+                    return {'error': f'Error descargando imagen: {datos_imagen}'}
+                async with en_paralelo:
+                    return await procesar_factura(datos_imagen)
+
+            resultados = await asyncio.gather(*(procesar(d) for d in descargas))
+
+            exitosos = [
+                (attachment, self._datos_gasto(datos, attachment))
+                for attachment, datos in zip(attachments, resultados)
+                if 'error' not in datos
+            ]
+            ids = []
+            if exitosos:
+                ids = await AsyncGastoRepository.crear_lote(
+                    message.author.id, [gasto for _, gasto in exitosos]
+                )
+            gastos = {
+                attachment.id: dict(gasto, id=gasto_id)
+                for (attachment, gasto), gasto_id in zip(exitosos, ids)
+            }
+
+            lineas = []
+            for attachment, datos in zip(attachments, resultados):
+                gasto = gastos.get(attachment.id)
+                if gasto:
+                    lineas.append(
+                        f"✅ `{attachment.filename}` → **S/. {gasto['monto']:.2f}** · "
+                        f"{gasto['categoria']} (ID: {gasto['id']})"
+                    )
+                else:
+                    lineas.append(f"❌ `{attachment.filename}` → {datos['error']}")
+
+            total = sum(gasto['monto'] for gasto in gastos.values())
+            embed_resumen = discord.Embed(
+                title=f"🧾 {len(gastos)}/{len(attachments)} gastos registrados",
+                description='\n'.join(lineas)[:4000],
+                color=discord.Color.green() if len(gastos) == len(attachments) else discord.Color.orange()
+            )
+            embed_resumen.add_field(name="💰 TOTAL", value=f"S/. {total:.2f}", inline=True)
+
+            await msg.edit(embed=embed_resumen)
+            logger.info("✅ Lote procesado: %s/%s facturas", len(gastos), len(attachments))
+
+        except Exception as e:
+            resultado = ExceptionHandler.manejar_error(
+                excepcion=e,
+                contexto="Procesamiento de lote de facturas",
+                datos_adicionales={
+                    'Usuario': str(message.author),
+                    'Archivos': len(attachments)
+                }
+            )
+            await msg.edit(embed=resultado['embed'])
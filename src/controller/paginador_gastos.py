@@ -0,0 +1,95 @@
+"""
+Paginador de gastos con botones de Discord
+Cada botón pide una sola página al repository (paginación por clave)
+"""
+import discord
+from src.repository import AsyncGastoRepository
+from src.services import GastoService
+from src.config import ExceptionHandler
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class PaginadorGastos(discord.ui.View):
+    """Vista con botones ◀️ / ▶️ para recorrer los gastos de un usuario"""
+
+    def __init__(self, usuario_id: int, dias: int, cantidad: int, pagina: dict,
+                 timeout: float = 180):
+        """
+        Args:
+            usuario_id (int): Dueño de los gastos (único que puede paginar)
+            dias (int): Ventana de días
+            cantidad (int): Gastos del período
+            pagina (dict): Primera página (GastoRepository.obtener_pagina_gastos)
+            timeout (float): Segundos sin uso antes de desactivar los botones
+        """
+        super().__init__(timeout=timeout)
+        self.usuario_id = usuario_id
+        self.dias = dias
+        self.cantidad = cantidad
+        self.pagina = pagina
+        self.numero = 1
+        self.mensaje = None
+        self._actualizar_botones()
+
+    def _actualizar_botones(self):
+        self.anterior.disabled = not self.pagina['hay_anterior']
+        self.siguiente.disabled = not self.pagina['hay_siguiente']
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """Solo el autor del comando puede cambiar de página"""
+        if interaction.user.id != self.usuario_id:
+            await interaction.response.send_message(
+                "⚠️ Solo quien ejecutó el comando puede cambiar de página", ephemeral=True
+            )
+            return False
+        return True
+
+    async def _mover(self, interaction: discord.Interaction, hacia_atras: bool):
+        """Carga la página vecina y actualiza el mensaje"""
+        cursor = self.pagina['primero'] if hacia_atras else self.pagina['ultimo']
+        try:
+            pagina = await AsyncGastoRepository.obtener_pagina_gastos(
+                self.usuario_id, self.dias, GastoService.LIMITE_LISTADO, cursor, hacia_atras
+            )
+        except Exception as e:
+            resultado = ExceptionHandler.manejar_error(
+                excepcion=e,
+                contexto="Paginando gastos",
+                datos_adicionales={
+                    'Usuario ID': self.usuario_id,
+                    'Página': self.numero
+                }
+            )
+            await interaction.response.send_message(embed=resultado['embed'], ephemeral=True)
+            return
+
+        if not pagina['gastos']:
+            # Los gastos cambiaron desde que se mostró la página: quedarse aquí
+            self.pagina['hay_anterior' if hacia_atras else 'hay_siguiente'] = False
+        else:
+            self.pagina = pagina
+            self.numero += -1 if hacia_atras else 1
+        self._actualizar_botones()
+
+        embed = GastoService.crear_embed_pagina(self.pagina, self.dias, self.cantidad, self.numero)
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="Anterior", emoji="◀️", style=discord.ButtonStyle.secondary)
+    async def anterior(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._mover(interaction, hacia_atras=True)
+
+    @discord.ui.button(label="Siguiente", emoji="▶️", style=discord.ButtonStyle.secondary)
+    async def siguiente(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._mover(interaction, hacia_atras=False)
+
+    async def on_timeout(self):
+        """Desactiva los botones cuando la vista expira"""
+        for boton in self.children:
+            boton.disabled = True
+        if self.mensaje is not None:
+            try:
+                await self.mensaje.edit(view=self)
+            except discord.HTTPException:
+                pass
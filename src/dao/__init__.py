@@ -3,6 +3,6 @@ Módulo DAO (Data Access Object)
 Acceso directo a datos sin lógica de negocio
 """
 from .gasto_dao import GastoDAO
+from .gasto_diario_dao import GastoDiarioDAO
 
-__all__ = ['GastoDAO']
-
+__all__ = ['GastoDAO', 'GastoDiarioDAO']
@@ -2,20 +2,31 @@
 DAO (Data Access Object) para Gasto
 Operaciones CRUD básicas sin lógica de negocio
 """
-from sqlalchemy.orm import Session
-from sqlalchemy import desc, func
-from datetime import datetime, timedelta
+from sqlalchemy.orm import Session, defer
+from sqlalchemy import asc, desc, insert, select, tuple_
+from datetime import date, datetime, timedelta
 from src.models import Gasto, SessionLocal
 
 
+def inicio_ventana(dias: int) -> datetime:
+    """Inicio (00:00 UTC) del primer día de una ventana de N días, como el agregado diario"""
+    return datetime.combine((datetime.utcnow() - timedelta(days=dias)).date(), datetime.min.time())
+
+
 class GastoDAO:
     """Data Access Object para operaciones CRUD de Gasto"""
 
     @staticmethod
     def crear(db: Session, usuario_id: int, descripcion: str, monto: float,
-              categoria: str = 'Otros', imagen_url: str = None, datos_ocr: dict = None) -> Gasto:
-        """Inserta un nuevo gasto"""
-        fecha = datetime.now().strftime('%Y-%m-%d')
+              categoria: str = 'Otros', imagen_url: str = None, datos_ocr: dict = None,
+              commit: bool = True) -> Gasto:
+        """
+        Inserta un nuevo gasto
+
+        Con commit=False solo hace flush (asigna el ID) y deja la transacción
+        abierta para que el llamador confirme varias inserciones juntas.
+        """
+        fecha = date.today()
         gasto = Gasto(
             usuario_id=usuario_id,
             descripcion=descripcion,
@@ -26,10 +37,55 @@ class GastoDAO:
             datos_ocr=datos_ocr
         )
         db.add(gasto)
-        db.commit()
-        db.refresh(gasto)
+        if commit:
+            db.commit()
+            db.refresh(gasto)
+        else:
+            db.flush()
         return gasto
 
+    @staticmethod
+    def crear_lote(db: Session, usuario_id: int, gastos: list, commit: bool = True) -> list:
+        """
+        Inserta varios gastos con un único INSERT ... RETURNING (executemany)
+
+        Args:
+            db (Session): Sesión activa
+            usuario_id (int): Usuario dueño de los gastos
+            gastos (list): Diccionarios con descripcion y monto, y opcionalmente
+                categoria, fecha, timestamp, imagen_url y datos_ocr
+            commit (bool): Confirmar la transacción al terminar
+
+        Returns:
+            list: IDs generados, en el mismo orden que `gastos`
+        """
+        if not gastos:
+            return []
+
+        fecha = date.today()
+        ahora = datetime.utcnow()
+        filas = [
+            {
+                'usuario_id': usuario_id,
+                'descripcion': gasto['descripcion'],
+                'monto': gasto['monto'],
+                'categoria': gasto.get('categoria') or 'Otros',
+                'fecha': gasto.get('fecha') or fecha,
+                'timestamp': gasto.get('timestamp') or ahora,
+                'imagen_url': gasto.get('imagen_url'),
+                'datos_ocr': gasto.get('datos_ocr'),
+            }
+            for gasto in gastos
+        ]
+        # RETURNING con sort_by_parameter_order requiere SQLAlchemy >= 2.0.10
+        ids = db.scalars(
+            insert(Gasto).returning(Gasto.id, sort_by_parameter_order=True),
+            filas
+        ).all()
+        if commit:
+            db.commit()
+        return list(ids)
+
     @staticmethod
     def obtener_por_id(db: Session, gasto_id: int) -> Gasto:
         """Obtiene un gasto por ID"""
@@ -38,71 +94,144 @@ class GastoDAO:
     @staticmethod
     def obtener_todos(db: Session, usuario_id: int = None) -> list:
         """Obtiene todos los gastos, opcionalmente filtrados por usuario"""
-        query = db.query(Gasto)
+        query = db.query(Gasto).options(defer(Gasto.datos_ocr))
         if usuario_id:
             query = query.filter(Gasto.usuario_id == usuario_id)
         return query.order_by(desc(Gasto.fecha)).all()
 
     @staticmethod
-    def obtener_por_rango_fechas(db: Session, usuario_id: int, dias: int = 30) -> list:
-        """Obtiene gastos de los últimos N días"""
-        fecha_limite = datetime.now() - timedelta(days=dias)
-        return db.query(Gasto).filter(
+    def iterar(db: Session, usuario_id: int, tam_lote: int = 500):
+        """
+        Recorre todos los gastos de un usuario sin cargarlos en memoria
+
+        Usa yield_per: las filas se leen del cursor de a `tam_lote`, en orden
+        cronológico (timestamp, id) y sin datos_ocr.
+
+        Yields:
+            Row: id, fecha, descripcion, categoria, monto, timestamp
+        """
+        consulta = (
+            select(
+                Gasto.id, Gasto.fecha, Gasto.descripcion,
+                Gasto.categoria, Gasto.monto, Gasto.timestamp
+            )
+            .where(Gasto.usuario_id == usuario_id)
+            .order_by(asc(Gasto.timestamp), asc(Gasto.id))
+            .execution_options(yield_per=tam_lote)
+        )
+        resultado = db.execute(consulta)
+        try:
+            yield from resultado
+        finally:
+            resultado.close()
+
+    @staticmethod
+    def obtener_por_rango_fechas(db: Session, usuario_id: int, dias: int = 30,
+                                 limite: int = None) -> list:
+        """Obtiene gastos de los últimos N días (sin cargar datos_ocr)"""
+        query = db.query(Gasto).options(defer(Gasto.datos_ocr)).filter(
             Gasto.usuario_id == usuario_id,
-            Gasto.timestamp >= fecha_limite
-        ).order_by(desc(Gasto.fecha)).all()
+            Gasto.timestamp >= inicio_ventana(dias)
+        ).order_by(desc(Gasto.timestamp))
+        if limite:
+            query = query.limit(limite)
+        return query.all()
+
+    @staticmethod
+    def obtener_recientes(db: Session, usuario_id: int, dias: int = 30, limite: int = 10) -> list:
+        """
+        Obtiene los últimos gastos con solo las columnas que se muestran
+
+        La ventana empieza al inicio del día UTC, igual que el agregado diario,
+        para que el listado y los totales cuenten los mismos gastos.
+
+        Returns:
+            list: Filas con id, descripcion, monto, categoria y fecha
+        """
+        return db.execute(
+            select(Gasto.id, Gasto.descripcion, Gasto.monto, Gasto.categoria, Gasto.fecha)
+            .where(Gasto.usuario_id == usuario_id, Gasto.timestamp >= inicio_ventana(dias))
+            .order_by(desc(Gasto.timestamp), desc(Gasto.id))
+            .limit(limite)
+        ).all()
 
     @staticmethod
-    def actualizar(db: Session, gasto_id: int, **kwargs) -> Gasto:
-        """Actualiza un gasto existente"""
+    def obtener_pagina(db: Session, usuario_id: int, dias: int = 30, limite: int = 10,
+                       cursor: tuple = None, hacia_atras: bool = False) -> list:
+        """
+        Obtiene una página de gastos con paginación por clave (timestamp, id)
+
+        Las páginas van de más reciente a más antiguo. Cada consulta lee como
+        máximo limite + 1 entradas del índice cubriente de listado, ya en
+        orden (timestamp, id) y sin OFFSET ni acceso a la tabla, así que el
+        costo no depende de la página ni del historial del usuario.
+
+        Args:
+            db (Session): Sesión activa
+            usuario_id (int): Usuario
+            dias (int): Ventana de días
+            limite (int): Gastos por página
+            cursor (tuple): (timestamp, id) del borde de la página actual;
+                None para la primera página
+            hacia_atras (bool): False = gastos más antiguos que el cursor,
+                True = más recientes (página anterior)
+
+        Returns:
+            list: Hasta limite + 1 filas (id, descripcion, monto, categoria,
+                fecha, timestamp) ordenadas de más reciente a más antiguo;
+                la fila extra indica que hay más en esa dirección
+        """
+        consulta = select(
+            Gasto.id, Gasto.descripcion, Gasto.monto, Gasto.categoria, Gasto.fecha, Gasto.timestamp
+        ).where(Gasto.usuario_id == usuario_id, Gasto.timestamp >= inicio_ventana(dias))
+
+        if cursor is not None:
+            timestamp, gasto_id = cursor
+            if hacia_atras:
+                consulta = consulta.where(
+                    Gasto.timestamp >= timestamp,
+                    tuple_(Gasto.timestamp, Gasto.id) > tuple_(timestamp, gasto_id)
+                )
+            else:
+                consulta = consulta.where(
+                    Gasto.timestamp <= timestamp,
+                    tuple_(Gasto.timestamp, Gasto.id) < tuple_(timestamp, gasto_id)
+                )
+
+        orden = asc if hacia_atras else desc
+        filas = db.execute(
+            consulta.order_by(orden(Gasto.timestamp), orden(Gasto.id)).limit(limite + 1)
+        ).all()
+        if hacia_atras:
+            # La fila extra (la más reciente) queda al principio
+            filas.reverse()
+        return filas
+
+    @staticmethod
+    def actualizar(db: Session, gasto_id: int, commit: bool = True, **kwargs) -> Gasto:
+        """Actualiza un gasto existente (con commit=False solo hace flush)"""
         gasto = db.query(Gasto).filter(Gasto.id == gasto_id).first()
         if gasto:
             for key, value in kwargs.items():
                 if hasattr(gasto, key):
                     setattr(gasto, key, value)
-            db.commit()
-            db.refresh(gasto)
+            if commit:
+                db.commit()
+                db.refresh(gasto)
+            else:
+                db.flush()
         return gasto
 
     @staticmethod
-    def eliminar(db: Session, gasto_id: int) -> bool:
-        """Elimina un gasto"""
+    def eliminar(db: Session, gasto_id: int, commit: bool = True) -> bool:
+        """Elimina un gasto (con commit=False solo hace flush)"""
         gasto = db.query(Gasto).filter(Gasto.id == gasto_id).first()
         if gasto:
             db.delete(gasto)
-            db.commit()
+            if commit:
+                db.commit()
+            else:
+                db.flush()
             return True
         return False
 
-    @staticmethod
-    def contar_por_usuario(db: Session, usuario_id: int, dias: int = 30) -> int:
-        """Cuenta gastos de un usuario"""
-        fecha_limite = datetime.now() - timedelta(days=dias)
-        return db.query(Gasto).filter(
-            Gasto.usuario_id == usuario_id,
-            Gasto.timestamp >= fecha_limite
-        ).count()
-
-    @staticmethod
-    def suma_total(db: Session, usuario_id: int, dias: int = 30) -> float:
-        """Suma total de gastos de un usuario"""
-        fecha_limite = datetime.now() - timedelta(days=dias)
-        resultado = db.query(func.sum(Gasto.monto)).filter(
-            Gasto.usuario_id == usuario_id,
-            Gasto.timestamp >= fecha_limite
-        ).scalar()
-        return float(resultado or 0.0)
-
-    @staticmethod
-    def agrupar_por_categoria(db: Session, usuario_id: int, dias: int = 30) -> list:
-        """Agrupa gastos por categoría"""
-        fecha_limite = datetime.now() - timedelta(days=dias)
-        return db.query(
-            Gasto.categoria,
-            func.sum(Gasto.monto).label('total'),
-            func.count(Gasto.id).label('cantidad')
-        ).filter(
-            Gasto.usuario_id == usuario_id,
-            Gasto.timestamp >= fecha_limite
-        ).group_by(Gasto.categoria).order_by(desc('total')).all()
-
@@ -0,0 +1,126 @@
+"""
+DAO (Data Access Object) para GastoDiario
+Mantenimiento y lectura del agregado diario por usuario y categoría
+"""
+from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, desc, func, select, delete
+from sqlalchemy.dialects.sqlite import insert
+from datetime import datetime, timedelta
+from src.models import Gasto, GastoDiario
+
+
+def dia_limite(dias: int) -> str:
+    """Primer día (UTC, YYYY-MM-DD) incluido en una ventana de N días"""
+    return (datetime.utcnow() - timedelta(days=dias)).strftime('%Y-%m-%d')
+
+
+class GastoDiarioDAO:
+    """Data Access Object para el agregado diario de gastos"""
+
+    @staticmethod
+    def acumular(db: Session, condicion, signo: int = 1) -> None:
+        """
+        Suma (o resta, con signo=-1) al agregado los gastos que cumplen la condición
+
+        Agrupa los gastos afectados por usuario, día y categoría y hace un
+        upsert por grupo; no confirma la transacción.
+
+        Args:
+            db (Session): Sesión activa
+            condicion: Expresión de filtro sobre Gasto (p. ej. Gasto.id.in_(ids))
+            signo (int): 1 al crear, -1 al eliminar
+        """
+        dia = func.date(Gasto.timestamp)
+        categoria = func.coalesce(Gasto.categoria, 'Otros')
+        origen = select(
+            Gasto.usuario_id,
+            dia,
+            categoria,
+            func.sum(Gasto.monto) * signo,
+            func.count(Gasto.id) * signo
+        ).where(condicion).group_by(Gasto.usuario_id, dia, categoria)
+
+        sentencia = insert(GastoDiario).from_select(
+            ['usuario_id', 'dia', 'categoria', 'total', 'cantidad'], origen
+        )
+        sentencia = sentencia.on_conflict_do_update(
+            index_elements=['usuario_id', 'dia', 'categoria'],
+            set_={
+                'total': GastoDiario.total + sentencia.excluded.total,
+                'cantidad': GastoDiario.cantidad + sentencia.excluded.cantidad,
+            }
+        )
+        db.execute(sentencia)
+
+        if signo < 0:
+            # Borrar los grupos que quedaron vacíos, por clave primaria completa
+            # (solo los afectados, sin recorrer el agregado)
+            grupos = db.execute(
+                select(Gasto.usuario_id, dia, categoria).where(condicion).distinct()
+            ).all()
+            if grupos:
+                tabla = GastoDiario.__table__
+                db.connection().execute(
+                    delete(tabla).where(
+                        tabla.c.usuario_id == bindparam('u'),
+                        tabla.c.dia == bindparam('d'),
+                        tabla.c.categoria == bindparam('c'),
+                        tabla.c.cantidad <= 0
+                    ),
+                    [{'u': u, 'd': d, 'c': c} for u, d, c in grupos]
+                )
+
+    @staticmethod
+    def reconstruir(db: Session, usuario_id: int = None) -> int:
+        """
+        Recalcula el agregado desde la tabla gastos
+
+        Args:
+            db (Session): Sesión activa
+            usuario_id (int): Solo este usuario (por defecto todos)
+
+        Returns:
+            int: Filas del agregado tras la reconstrucción
+        """
+        borrar = delete(GastoDiario)
+        condicion = Gasto.id.isnot(None)
+        if usuario_id is not None:
+            borrar = borrar.where(GastoDiario.usuario_id == usuario_id)
+            condicion = Gasto.usuario_id == usuario_id
+        db.execute(borrar)
+        GastoDiarioDAO.acumular(db, condicion)
+        db.commit()
+
+        contar = select(func.count()).select_from(GastoDiario)
+        if usuario_id is not None:
+            contar = contar.where(GastoDiario.usuario_id == usuario_id)
+        return db.scalar(contar)
+
+    @staticmethod
+    def resumen(db: Session, usuario_id: int, dias: int = 30) -> tuple:
+        """Total y cantidad de gastos de un usuario en los últimos N días"""
+        total, cantidad = db.execute(
+            select(
+                func.coalesce(func.sum(GastoDiario.total), 0.0),
+                func.coalesce(func.sum(GastoDiario.cantidad), 0)
+            ).where(
+                GastoDiario.usuario_id == usuario_id,
+                GastoDiario.dia >= dia_limite(dias)
+            )
+        ).one()
+        return float(total), int(cantidad)
+
+    @staticmethod
+    def agrupar_por_categoria(db: Session, usuario_id: int, dias: int = 30) -> list:
+        """Total y cantidad por categoría en los últimos N días"""
+        total = func.sum(GastoDiario.total).label('total')
+        return db.execute(
+            select(
+                GastoDiario.categoria,
+                total,
+                func.sum(GastoDiario.cantidad).label('cantidad')
+            ).where(
+                GastoDiario.usuario_id == usuario_id,
+                GastoDiario.dia >= dia_limite(dias)
+            ).group_by(GastoDiario.categoria).order_by(desc(total))
+        ).all()
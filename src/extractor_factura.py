@@ -0,0 +1,187 @@
+"""
+Extractor de campos de factura en una sola pasada
+Clasifica cada línea del texto OCR una vez, con patrones precompilados,
+y resuelve monto, moneda, vendedor, fecha, descripción e items con las
+mismas prioridades que los criterios de `_extraer_*` en factura_processor
+"""
+import re
+
+from src.config import SIMBOLO_MONEDA, ocr_config
+from src.keyword_matcher import KeywordMatcher
+
+# ================================================================
+# PATRONES PRECOMPILADOS
+# ================================================================
+PATRON_NUMERO = re.compile(r'(\d+[.,]\d{2}|\d+)')
+PATRON_DECIMAL = re.compile(r'\d+[.,]\d{2}')
+PATRON_MONEDA_FINAL = re.compile(r'(S/\.|€|\$)\s*\d+[.,]\d{2}\s*$')
+PATRON_ITEM = re.compile(r'S/\.\s*\d+[.,]\d{2}|\$\s*\d+[.,]\d{2}')
+PATRON_SOLO_NUMEROS = re.compile(r'^[\d\s\-\/]+$')
+PATRON_SOLO_MAYUSCULAS = re.compile(r'^[A-Z\s]+$')
+PATRON_MAYUSCULAS = re.compile(r'[A-Z]{3,}')
+PATRON_FECHA = re.compile(r'(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})')
+_MESES = (
+    r'(enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre|octubre|noviembre|diciembre|'
+    r'january|february|march|april|may|june|july|august|september|october|november|december)'
+)
+# Se aplica sobre el texto completo: `\s+` puede cruzar saltos de línea
+PATRON_FECHA_TEXTO = re.compile(
+    rf'(\d{{1,2}}\s+de?\s+{_MESES}\s+de\s+\d{{2,4}}|\d{{1,2}}\s+{_MESES}\s+\d{{2,4}})',
+    re.IGNORECASE
+)
+PATRON_PRODUCTO = re.compile(r'\b(producto|artículo|item|referencia)\b', re.IGNORECASE)
+PATRON_NUMERICA = re.compile(r'^\d+[\.,\s\d]+$')
+
+
+def numero_en_linea(linea):
+    """Último número de la línea (misma regla que utils.extraer_numero)"""
+    numeros = PATRON_NUMERO.findall(linea)
+    if numeros:
+        return float(numeros[-1].replace(',', '.'))
+    return None
+
+
+def detectar_moneda(texto):
+    """Detecta la moneda del texto"""
+    if 'S/.' in texto or 's/.' in texto:
+        return 'S/.'
+    elif '$' in texto:
+        return '$'
+    elif '€' in texto:
+        return '€'
+    elif '£' in texto:
+        return '£'
+    return SIMBOLO_MONEDA
+
+
+class ExtractorFactura:
+    """Extrae todos los campos de una factura recorriendo las líneas una sola vez"""
+
+    def __init__(self, palabras_total=None, palabras_negocio=None):
+        """
+        Args:
+            palabras_total (list): Palabras que anuncian el total
+            palabras_negocio (list): Palabras que identifican al vendedor
+
+        Sin argumentos se usa el autómata compartido de ocr_config, que se
+        reconstruye cuando cambia la configuración.
+        """
+        self._matcher = None
+        if palabras_total is not None or palabras_negocio is not None:
+            palabras = {}
+            for palabra in palabras_total or ocr_config.get_palabras_total():
+                palabras.setdefault(palabra, set()).add('total')
+            for palabra in palabras_negocio or ocr_config.get_palabras_negocio():
+                palabras.setdefault(palabra, set()).add('negocio')
+            self._matcher = KeywordMatcher(palabras)
+
+    @property
+    def matcher(self):
+        return self._matcher or ocr_config.matcher
+
+    def extraer(self, texto):
+        """
+        Extrae los campos de la factura
+
+        Args:
+            texto (str): Texto extraído por OCR
+
+        Returns:
+            dict: monto_total, moneda, vendedor, fecha, descripción, items
+        """
+        lineas = [l.strip() for l in texto.split('\n')]
+        matcher = self.matcher
+
+        # Primer candidato de cada criterio (o el último, según el criterio)
+        monto_palabra = None
+        monto_simbolo = None
+        ultimo_decimal = None
+        monto_multiple = None
+        vendedor_inicio = None
+        vendedor_negocio = None
+        vendedor_mayusculas = None
+        fecha = None
+        descripcion_producto = None
+        linea_mas_larga = None
+        items = []
+
+        for idx, linea in enumerate(lineas):
+            if not linea:
+                continue
+
+            decimales = PATRON_DECIMAL.findall(linea)
+
+            # Palabras clave de total y de negocio en una sola pasada del autómata
+            if monto_palabra is None or vendedor_negocio is None:
+                etiquetas = matcher.etiquetas(linea.lower())
+            else:
+                etiquetas = ()
+
+            # Monto
+            if monto_palabra is None and 'total' in etiquetas:
+                monto_palabra = numero_en_linea(linea) or None
+            if monto_simbolo is None and PATRON_MONEDA_FINAL.search(linea):
+                monto_simbolo = numero_en_linea(linea) or None
+            if decimales:
+                ultimo_decimal = decimales[-1]
+                if len(decimales) >= 2:
+                    monto_multiple = numero_en_linea(linea) or monto_multiple
+
+            # Vendedor
+            if (vendedor_inicio is None and idx < 10 and len(linea) > 3 and
+                    not PATRON_SOLO_NUMEROS.search(linea) and
+                    not PATRON_SOLO_MAYUSCULAS.search(linea)):
+                vendedor_inicio = linea
+            if vendedor_negocio is None and 'negocio' in etiquetas:
+                vendedor_negocio = linea
+            if (vendedor_mayusculas is None and idx < 15 and len(linea) > 5 and
+                    PATRON_MAYUSCULAS.search(linea)):
+                vendedor_mayusculas = linea
+
+            # Fecha numérica (primera del texto)
+            if fecha is None:
+                match = PATRON_FECHA.search(linea)
+                if match:
+                    fecha = match.group(1)
+
+            # Descripción
+            if (descripcion_producto is None and len(linea) > 10 and
+                    PATRON_PRODUCTO.search(linea)):
+                descripcion_producto = linea
+            if (15 < len(linea) < 80 and
+                    (linea_mas_larga is None or len(linea) > len(linea_mas_larga)) and
+                    not PATRON_NUMERICA.search(linea)):
+                linea_mas_larga = linea
+
+            # Items
+            if PATRON_ITEM.search(linea):
+                items.append(linea)
+
+        # Resolver cada campo por prioridad de criterio
+        monto_total = monto_palabra or monto_simbolo
+        if monto_total is None and ultimo_decimal is not None:
+            monto_total = float(ultimo_decimal.replace(',', '.')) or None
+        if monto_total is None:
+            monto_total = monto_multiple
+
+        vendedor = vendedor_inicio or vendedor_negocio or vendedor_mayusculas or 'Comercio'
+
+        if fecha is None:
+            match = PATRON_FECHA_TEXTO.search(texto)
+            if match:
+                fecha = match.group(0)
+
+        descripcion = descripcion_producto or linea_mas_larga or f'Compra en {vendedor}'
+
+        return {
+            'monto_total': monto_total,
+            'moneda': detectar_moneda(texto),
+            'vendedor': vendedor,
+            'fecha': fecha,
+            'descripción': descripcion,
+            'items': items,
+        }
+
+
+# Instancia global
+extractor_factura = ExtractorFactura()
@@ -0,0 +1,196 @@
+"""
+Preprocesamiento de imágenes antes del OCR
+Pasos configurables (reducir, orientar, escala de grises, recorte, binarización)
+que bajan el costo de Tesseract en fotos grandes de celular
+"""
+import time
+from PIL import Image, ImageOps
+
+from src.config import OCR_MAX_LADO
+
+# Registro de pasos disponibles: nombre -> función(imagen) -> imagen
+PASOS = {}
+
+
+def registrar_paso(nombre):
+    """
+    Decorador para registrar un paso de preprocesamiento
+
+    Args:
+        nombre (str): Nombre usado en OCR_PREPROCESAMIENTO
+    """
+    def decorador(funcion):
+        PASOS[nombre] = funcion
+        return funcion
+    return decorador
+
+
+def umbral_otsu(histograma) -> int:
+    """
+    Calcula el umbral de Otsu a partir de un histograma de 256 niveles
+
+    Args:
+        histograma (list): Histograma de una imagen en escala de grises
+
+    Returns:
+        int: Nivel de gris que mejor separa fondo y texto
+    """
+    total = sum(histograma)
+    if total == 0:
+        return 127
+
+    suma_total = sum(nivel * cantidad for nivel, cantidad in enumerate(histograma))
+    suma_fondo = 0
+    peso_fondo = 0
+    mejor_varianza = 0.0
+    umbral = 127
+
+    for nivel, cantidad in enumerate(histograma):
+        peso_fondo += cantidad
+        if peso_fondo == 0:
+            continue
+        peso_frente = total - peso_fondo
+        if peso_frente == 0:
+            break
+        suma_fondo += nivel * cantidad
+        media_fondo = suma_fondo / peso_fondo
+        media_frente = (suma_total - suma_fondo) / peso_frente
+        varianza = peso_fondo * peso_frente * (media_fondo - media_frente) ** 2
+        if varianza > mejor_varianza:
+            mejor_varianza = varianza
+            umbral = nivel
+
+    return umbral
+
+
+def _a_grises(imagen):
+    """Retorna la imagen en modo 'L'"""
+    return imagen if imagen.mode == 'L' else imagen.convert('L')
+
+
+def _tamano_reducido(tamano, max_lado):
+    """Tamaño con el lado mayor limitado a `max_lado`, o None si ya cabe"""
+    ancho, alto = tamano
+    escala = max_lado / max(ancho, alto)
+    if escala >= 1:
+        return None
+    return max(1, round(ancho * escala)), max(1, round(alto * escala))
+
+
+def decodificar(imagen, pasos=(), max_lado=OCR_MAX_LADO):
+    """
+    Decodifica los píxeles de una imagen abierta de forma perezosa
+
+    Si el paso 'reducir' está activo, los JPEG se decodifican en modo draft
+    (directamente a 1/2, 1/4 u 1/8 de la resolución) y se evita decodificar
+    los 12+ MP completos de una foto de celular.
+    """
+    if 'reducir' in pasos:
+        destino = _tamano_reducido(imagen.size, max_lado)
+        if destino:
+            imagen.draft(imagen.mode, destino)
+    imagen.load()
+    return imagen
+
+
+@registrar_paso('reducir')
+def reducir(imagen, max_lado=OCR_MAX_LADO):
+    """Reduce la imagen para que su lado mayor no supere `max_lado`"""
+    destino = _tamano_reducido(imagen.size, max_lado)
+    if not destino:
+        return imagen
+    return imagen.resize(destino, Image.LANCZOS)
+
+
+@registrar_paso('orientar')
+def orientar(imagen):
+    """Aplica la rotación EXIF de la cámara"""
+    if imagen.getexif().get(0x0112, 1) == 1:
+        return imagen
+    return ImageOps.exif_transpose(imagen)
+
+
+@registrar_paso('escala_grises')
+def escala_grises(imagen):
+    """Convierte a escala de grises (Tesseract no usa el color)"""
+    return _a_grises(imagen)
+
+
+@registrar_paso('recortar')
+def recortar(imagen, area_minima=0.2, margen=0.02):
+    """
+    Recorta la región clara del recibo sobre un fondo más oscuro
+
+    La detección se hace sobre una miniatura; si la región encontrada es
+    demasiado pequeña se asume que falló y se conserva la imagen completa.
+    """
+    miniatura = _a_grises(imagen).copy()
+    miniatura.thumbnail((256, 256))
+    umbral = umbral_otsu(miniatura.histogram())
+    caja = miniatura.point(lambda p: 255 if p > umbral else 0).getbbox()
+    if not caja:
+        return imagen
+
+    escala_x = imagen.width / miniatura.width
+    escala_y = imagen.height / miniatura.height
+    izq, arriba, der, abajo = caja
+    if (der - izq) * (abajo - arriba) < area_minima * miniatura.width * miniatura.height:
+        return imagen
+
+    margen_x = imagen.width * margen
+    margen_y = imagen.height * margen
+    return imagen.crop((
+        max(0, int(izq * escala_x - margen_x)),
+        max(0, int(arriba * escala_y - margen_y)),
+        min(imagen.width, int(der * escala_x + margen_x)),
+        min(imagen.height, int(abajo * escala_y + margen_y)),
+    ))
+
+
+@registrar_paso('binarizar')
+def binarizar(imagen):
+    """Binariza con umbral de Otsu (texto negro sobre fondo blanco)"""
+    gris = _a_grises(imagen)
+    umbral = umbral_otsu(gris.histogram())
+    return gris.point(lambda p: 255 if p > umbral else 0)
+
+
+def validar_pasos(pasos) -> list:
+    """
+    Valida nombres de pasos
+
+    Args:
+        pasos (list): Nombres de pasos
+
+    Returns:
+        list: Los mismos pasos
+
+    Raises:
+        ValueError: Si algún paso no está registrado
+    """
+    desconocidos = [paso for paso in pasos if paso not in PASOS]
+    if desconocidos:
+        raise ValueError(
+            f"Pasos de preprocesamiento desconocidos: {desconocidos} "
+            f"(disponibles: {sorted(PASOS)})"
+        )
+    return list(pasos)
+
+
+def preprocesar(imagen, pasos):
+    """
+    Aplica los pasos en orden midiendo el tiempo de cada uno
+
+    Args:
+        imagen (PIL.Image.Image): Imagen de entrada
+        pasos (list): Nombres de pasos a aplicar
+
+    Returns:
+        tuple: (imagen procesada, dict paso -> milisegundos)
+    """
+    tiempos = {}
+    for paso in pasos:
+        inicio = time.perf_counter()
+        imagen = PASOS[paso](imagen)
+        tiempos[paso] = (time.perf_counter() - inicio) * 1000
+    return imagen, tiempos
@@ -0,0 +1,136 @@
+"""
+Búsqueda de múltiples palabras clave con un autómata Aho-Corasick
+Encuentra todas las palabras de una lista en un texto con una sola pasada,
+sin importar cuántas palabras haya
+"""
+from collections import deque
+
+
+class KeywordMatcher:
+    """
+    Autómata Aho-Corasick con etiquetas por palabra clave
+
+    Es inmutable: para cambiar las palabras se construye uno nuevo.
+    """
+
+    def __init__(self, palabras=None):
+        """
+        Args:
+            palabras (dict | list): palabra -> etiqueta(s), o lista de palabras
+                (en ese caso la etiqueta es la propia palabra)
+        """
+        # Estado 0 es la raíz; cada estado tiene transiciones, enlace de fallo y salidas
+        self._transiciones = [{}]
+        self._fallos = [0]
+        self._salidas = [set()]
+        self.cantidad_palabras = 0
+
+        if isinstance(palabras, dict):
+            for palabra, etiquetas in palabras.items():
+                self._agregar(palabra, etiquetas)
+        else:
+            for palabra in palabras or []:
+                self._agregar(palabra)
+        self._compilar()
+
+    def _agregar(self, palabra, etiquetas=None):
+        """
+        Agrega una palabra al trie
+
+        Args:
+            palabra (str): Palabra a buscar (se compara tal cual)
+            etiquetas: Etiqueta (cualquier valor hashable) o lista/set de etiquetas
+        """
+        if not palabra:
+            return
+        if etiquetas is None:
+            etiquetas = {palabra}
+        elif not isinstance(etiquetas, (list, set, frozenset)):
+            etiquetas = {etiquetas}
+
+        estado = 0
+        for caracter in palabra:
+            siguiente = self._transiciones[estado].get(caracter)
+            if siguiente is None:
+                siguiente = len(self._transiciones)
+                self._transiciones.append({})
+                self._fallos.append(0)
+                self._salidas.append(set())
+                self._transiciones[estado][caracter] = siguiente
+            estado = siguiente
+
+        if not self._salidas[estado]:
+            self.cantidad_palabras += 1
+        self._salidas[estado].update(etiquetas)
+
+    def _compilar(self):
+        """Calcula los enlaces de fallo (recorrido en anchura del trie)"""
+        cola = deque()
+        for siguiente in self._transiciones[0].values():
+            self._fallos[siguiente] = 0
+            cola.append(siguiente)
+
+        while cola:
+            estado = cola.popleft()
+            for caracter, siguiente in self._transiciones[estado].items():
+                cola.append(siguiente)
+                fallo = self._fallos[estado]
+                while fallo and caracter not in self._transiciones[fallo]:
+                    fallo = self._fallos[fallo]
+                destino = self._transiciones[fallo].get(caracter, 0)
+                self._fallos[siguiente] = destino if destino != siguiente else 0
+                # Heredar las salidas de los sufijos para no recorrer la cadena al buscar
+                self._salidas[siguiente] |= self._salidas[self._fallos[siguiente]]
+
+        # Salidas inmutables: se comparten entre estados al buscar
+        self._salidas = [frozenset(salidas) for salidas in self._salidas]
+
+    def etiquetas(self, texto) -> set:
+        """
+        Obtiene las etiquetas de todas las palabras presentes en el texto
+
+        Args:
+            texto (str): Texto donde buscar
+
+        Returns:
+            set: Etiquetas encontradas
+        """
+        transiciones = self._transiciones
+        fallos = self._fallos
+        salidas = self._salidas
+        encontradas = set()
+        estado = 0
+
+        for caracter in texto:
+            siguiente = transiciones[estado].get(caracter)
+            while siguiente is None and estado:
+                estado = fallos[estado]
+                siguiente = transiciones[estado].get(caracter)
+            estado = siguiente or 0
+            if salidas[estado]:
+                encontradas |= salidas[estado]
+
+        return encontradas
+
+    def contiene(self, texto, etiqueta=None) -> bool:
+        """
+        Indica si alguna palabra (o alguna con la etiqueta dada) aparece en el texto
+        """
+        transiciones = self._transiciones
+        fallos = self._fallos
+        salidas = self._salidas
+        estado = 0
+
+        for caracter in texto:
+            siguiente = transiciones[estado].get(caracter)
+            while siguiente is None and estado:
+                estado = fallos[estado]
+                siguiente = transiciones[estado].get(caracter)
+            estado = siguiente or 0
+            if salidas[estado] and (etiqueta is None or etiqueta in salidas[estado]):
+                return True
+
+        return False
+
+    def __len__(self):
+        return self.cantidad_palabras
@@ -0,0 +1,278 @@
+"""
+Métricas en formato Prometheus
+Contadores, histogramas y medidores en memoria, sin dependencias externas,
+que el servidor web expone en /metrics (formato de texto 0.0.4)
+"""
+import asyncio
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+
+# Mismos límites que los histogramas por defecto de prometheus_client (segundos)
+BUCKETS_DEFECTO = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _formatear_etiquetas(nombres, valores, extra=None) -> str:
+    pares = [f'{nombre}="{_escapar(valor)}"' for nombre, valor in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return '{' + ','.join(pares) + '}' if pares else ''
+
+
+def _formatear_numero(valor) -> str:
+    if valor == float('inf'):
+        return '+Inf'
+    if isinstance(valor, float) and valor.is_integer():
+        return str(int(valor))
+    return repr(valor) if isinstance(valor, float) else str(valor)
+
+
+class _Metrica:
+    """Base: nombre, ayuda, etiquetas y series por combinación de etiquetas"""
+
+    tipo = None
+
+    def __init__(self, nombre, ayuda, etiquetas=()):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def _clave(self, etiquetas: dict) -> tuple:
+        if set(etiquetas) != set(self.etiquetas):
+            raise ValueError(
+                f"{self.nombre}: se esperaban las etiquetas {self.etiquetas}, no {tuple(etiquetas)}"
+            )
+        return tuple(str(etiquetas[nombre]) for nombre in self.etiquetas)
+
+    def _cabecera(self) -> list:
+        return [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+
+    def limpiar(self):
+        """Elimina todas las series (para tests)"""
+        with self._lock:
+            self._series.clear()
+
+
+class Contador(_Metrica):
+    """Valor que solo crece (p. ej. errores, gastos importados)"""
+
+    tipo = 'counter'
+
+    def incrementar(self, cantidad=1, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._series[clave] = self._series.get(clave, 0) + cantidad
+
+    def valor(self, **etiquetas):
+        return self._series.get(self._clave(etiquetas), 0)
+
+    def exponer(self) -> list:
+        lineas = self._cabecera()
+        with self._lock:
+            for clave, valor in sorted(self._series.items()):
+                lineas.append(
+                    f"{self.nombre}{_formatear_etiquetas(self.etiquetas, clave)} {_formatear_numero(valor)}"
+                )
+        return lineas
+
+
+class Histograma(_Metrica):
+    """Distribución de valores (latencias) en buckets acumulados, con suma y cuenta"""
+
+    tipo = 'histogram'
+
+    def __init__(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_DEFECTO):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def observar(self, valor, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            serie = self._series.get(clave)
+            if serie is None:
+                serie = self._series[clave] = {'buckets': [0] * len(self.buckets), 'suma': 0.0, 'cuenta': 0}
+            for indice, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie['buckets'][indice] += 1
+                    break
+            serie['suma'] += valor
+            serie['cuenta'] += 1
+
+    def cuenta(self, **etiquetas) -> int:
+        serie = self._series.get(self._clave(etiquetas))
+        return serie['cuenta'] if serie else 0
+
+    @contextmanager
+    def cronometrar(self, **etiquetas):
+        """Observa la duración del bloque en segundos (también si lanza una excepción)"""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, **etiquetas)
+
+    def exponer(self) -> list:
+        lineas = self._cabecera()
+        with self._lock:
+            for clave, serie in sorted(self._series.items()):
+                acumulado = 0
+                for limite, cantidad in zip(self.buckets, serie['buckets']):
+                    acumulado += cantidad
+                    le = f'le="{_formatear_numero(limite)}"'
+                    lineas.append(
+                        f"{self.nombre}_bucket{_formatear_etiquetas(self.etiquetas, clave, le)} {acumulado}"
+                    )
+                etiquetas = _formatear_etiquetas(self.etiquetas, clave)
+                lineas.append(f"{self.nombre}_sum{etiquetas} {_formatear_numero(serie['suma'])}")
+                lineas.append(f"{self.nombre}_count{etiquetas} {serie['cuenta']}")
+        return lineas
+
+
+class Medidor(_Metrica):
+    """
+    Valor leído en el momento de exponer, con una función
+
+    La función devuelve un número, o un dict {valores de etiquetas: número}
+    si el medidor tiene etiquetas. Con tipo='counter' sirve para publicar
+    contadores que ya lleva otro objeto (p. ej. aciertos de una caché).
+    """
+
+    def __init__(self, nombre, ayuda, funcion, etiquetas=(), tipo='gauge'):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.funcion = funcion
+        self.tipo = tipo
+
+    def exponer(self) -> list:
+        lineas = self._cabecera()
+        valores = self.funcion()
+        if not isinstance(valores, dict):
+            valores = {(): valores}
+        for clave, valor in sorted(valores.items()):
+            if not isinstance(clave, tuple):
+                clave = (clave,)
+            if valor is None:
+                continue
+            lineas.append(f"{self.nombre}{_formatear_etiquetas(self.etiquetas, clave)} {_formatear_numero(valor)}")
+        return lineas
+
+
+class RegistroMetricas:
+    """Conjunto de métricas que se exponen juntas"""
+
+    def __init__(self):
+        self._metricas = {}
+        self._lock = threading.Lock()
+
+    def _registrar(self, metrica):
+        with self._lock:
+            if metrica.nombre in self._metricas:
+                raise ValueError(f"Métrica duplicada: {metrica.nombre}")
+            self._metricas[metrica.nombre] = metrica
+        return metrica
+
+    def contador(self, nombre, ayuda, etiquetas=()) -> Contador:
+        return self._registrar(Contador(nombre, ayuda, etiquetas))
+
+    def histograma(self, nombre, ayuda, etiquetas=(), buckets=BUCKETS_DEFECTO) -> Histograma:
+        return self._registrar(Histograma(nombre, ayuda, etiquetas, buckets))
+
+    def medidor(self, nombre, ayuda, funcion, etiquetas=(), tipo='gauge') -> Medidor:
+        return self._registrar(Medidor(nombre, ayuda, funcion, etiquetas, tipo))
+
+    def obtener(self, nombre):
+        return self._metricas.get(nombre)
+
+    def exponer(self) -> str:
+        """Todas las métricas en formato de texto de Prometheus"""
+        with self._lock:
+            metricas = list(self._metricas.values())
+        lineas = []
+        for metrica in metricas:
+            try:
+                lineas.extend(metrica.exponer())
+            except Exception as e:
+                # Un medidor roto no debe tumbar el endpoint completo
+                lineas.append(f"# ERROR {metrica.nombre}: {_escapar(e)}")
+        return '\n'.join(lineas) + '\n'
+
+
+def medir(histograma: Histograma, **etiquetas):
+    """
+    Decorador que observa la duración de cada llamada en un histograma
+
+    Funciona con funciones síncronas y asíncronas.
+    """
+    def decorador(funcion):
+        if asyncio.iscoroutinefunction(funcion):
+            @functools.wraps(funcion)
+            async def envoltura_async(*args, **kwargs):
+                with histograma.cronometrar(**etiquetas):
+                    return await funcion(*args, **kwargs)
+            return envoltura_async
+
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            with histograma.cronometrar(**etiquetas):
+                return funcion(*args, **kwargs)
+        return envoltura
+    return decorador
+
+
+def instrumentar_metodos(histograma: Histograma, etiqueta: str):
+    """
+    Decorador de clase: mide todos los métodos estáticos públicos
+
+    Cada método se observa con `etiqueta` = nombre del método. Los
+    generadores se dejan sin medir (su duración es la de quien los consume).
+    """
+    def decorador(cls):
+        for nombre, valor in list(vars(cls).items()):
+            if nombre.startswith('_') or not isinstance(valor, staticmethod):
+                continue
+            funcion = valor.__func__
+            if inspect.isgeneratorfunction(funcion):
+                continue
+            setattr(cls, nombre, staticmethod(medir(histograma, **{etiqueta: nombre})(funcion)))
+        return cls
+    return decorador
+
+
+# ================================================================
+# REGISTRO GLOBAL Y MÉTRICAS DEL BOT
+# ================================================================
+metricas = RegistroMetricas()
+
+duracion_etapas_factura = metricas.histograma(
+    'bot_factura_etapa_segundos',
+    'Duración de cada etapa del procesamiento de facturas',
+    etiquetas=('etapa',),
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+)
+
+duracion_consultas_db = metricas.histograma(
+    'bot_db_operacion_segundos',
+    'Duración de las operaciones de GastoRepository',
+    etiquetas=('operacion',),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+)
+
+duracion_plantillas = metricas.histograma(
+    'bot_plantilla_render_segundos',
+    'Duración del renderizado de plantillas',
+    etiquetas=('plantilla',),
+    buckets=(0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+)
+
+errores_manejados = metricas.contador(
+    'bot_errores_total',
+    'Errores pasados por ExceptionHandler (incluidos los repetidos que no se escriben)',
+    etiquetas=('tipo',)
+)
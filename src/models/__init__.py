@@ -2,7 +2,21 @@
 Módulo de modelos ORM
 """
 from .gasto_model import Gasto
-from .base import Base, engine, SessionLocal, init_db, get_db
-
-__all__ = ['Gasto', 'Base', 'engine', 'SessionLocal', 'init_db', 'get_db']
+from .gasto_diario_model import GastoDiario
+from .base import (
+    Base,
+    engine,
+    SessionLocal,
+    init_db,
+    get_db,
+    unidad_de_trabajo,
+    abrir_sesion,
+    cerrar_sesion,
+    confirmar,
+    deshacer
+)
 
+__all__ = [
+    'Gasto', 'GastoDiario', 'Base', 'engine', 'SessionLocal', 'init_db', 'get_db',
+    'unidad_de_trabajo', 'abrir_sesion', 'cerrar_sesion', 'confirmar', 'deshacer'
+]
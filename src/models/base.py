@@ -1,10 +1,20 @@
 """
 Configuración base de SQLAlchemy
 """
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import create_engine, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from src.config import DB_PATH
+from sqlalchemy.pool import QueuePool
+from src.config import (
+    DB_PATH,
+    DB_POOL_SIZE,
+    DB_POOL_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE
+)
+from src.config.db_persistence import set_sqlite_pragma
 from src.utils import get_logger
 
 logger = get_logger(__name__)
@@ -16,22 +26,45 @@ logger.info(f"🗄️ Conectando a: {DATABASE_URL}")
 engine = create_engine(
     DATABASE_URL,
     connect_args={"check_same_thread": False},
+    poolclass=QueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_POOL_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
     echo=False
 )
 
+# PRAGMAs por conexión: solo en nuestro engine, una vez por conexión física
+event.listen(engine, "connect", set_sqlite_pragma)
+
 # Crear sesión
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Sesión compartida por la unidad de trabajo en curso (por hilo / tarea)
+_sesion_actual = ContextVar('sesion_actual', default=None)
+
 # Base para los modelos
 Base = declarative_base()
 
 
-def init_db():
-    """Inicializa la base de datos creando todas las tablas"""
+def init_db(en_segundo_plano=False):
+    """
+    Inicializa la base de datos creando las tablas y aplicando migraciones
+
+    Args:
+        en_segundo_plano (bool): Los rellenos de datos de las migraciones
+            continúan en un hilo mientras el bot atiende
+
+    Returns:
+        threading.Thread | None: Hilo de migraciones, si quedó alguno en curso
+    """
     logger.info("📋 Inicializando tablas...")
     Base.metadata.create_all(bind=engine)
     logger.info("✅ Tablas creadas correctamente")
 
+    from .migraciones import migrar
+    return migrar(engine, en_segundo_plano=en_segundo_plano)
+
 
 def get_db():
     """Obtiene una sesión de base de datos"""
@@ -41,3 +74,80 @@ def get_db():
     finally:
         db.close()
 
+
+
+@contextmanager
+def unidad_de_trabajo():
+    """
+    Comparte una sesión (y su conexión) entre todas las operaciones del bloque
+
+    Los repositories llamados dentro del bloque usan esta sesión en vez de
+    abrir una propia y no confirman por su cuenta (ver confirmar): al salir
+    se confirma todo junto; si hay un error se deshace todo. Los bloques
+    anidados reutilizan la sesión del exterior.
+
+    Ejemplo:
+        with unidad_de_trabajo():
+            resumen = GastoRepository.obtener_resumen(usuario_id)
+            gastos = GastoRepository.obtener_gastos_recientes(usuario_id)
+    """
+    db = _sesion_actual.get()
+    if db is not None:
+        yield db
+        return
+
+    db = SessionLocal()
+    token = _sesion_actual.set(db)
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        db.info.pop('al_confirmar', None)
+        raise
+    finally:
+        _sesion_actual.reset(token)
+        db.close()
+
+    for funcion in db.info.pop('al_confirmar', []):
+        funcion()
+
+
+def abrir_sesion():
+    """Sesión de la unidad de trabajo en curso, o una nueva si no hay ninguna"""
+    return _sesion_actual.get() or SessionLocal()
+
+
+def cerrar_sesion(db):
+    """Cierra la sesión salvo que pertenezca a la unidad de trabajo en curso"""
+    if db is not _sesion_actual.get():
+        db.close()
+
+
+def confirmar(db, al_confirmar=None):
+    """
+    Confirma los cambios si la sesión es propia
+
+    Dentro de una unidad de trabajo solo hace flush (asigna IDs, detecta
+    errores de integridad) y deja el commit al bloque. `al_confirmar` se
+    ejecuta después del commit real: en el momento, o al salir del bloque.
+    """
+    if db is _sesion_actual.get():
+        db.flush()
+        if al_confirmar is not None:
+            db.info.setdefault('al_confirmar', []).append(al_confirmar)
+        return
+    db.commit()
+    if al_confirmar is not None:
+        al_confirmar()
+
+
+def deshacer(db):
+    """
+    Deshace los cambios si la sesión es propia
+
+    Dentro de una unidad de trabajo no toca la transacción: la excepción
+    sube hasta el bloque, que deshace todo lo pendiente.
+    """
+    if db is not _sesion_actual.get():
+        db.rollback()
@@ -0,0 +1,26 @@
+"""
+Modelo de GastoDiario
+Agregado por usuario, día y categoría mantenido junto con la tabla gastos
+"""
+from sqlalchemy import Column, Integer, String, Float
+from .base import Base
+
+
+class GastoDiario(Base):
+    """
+    Suma y cantidad de gastos de un usuario por día (UTC) y categoría
+
+    Lo actualiza GastoRepository en la misma transacción que cada alta,
+    modificación o baja; los resúmenes leen de aquí en vez de recorrer gastos.
+    """
+    __tablename__ = "gastos_diarios"
+
+    usuario_id = Column(Integer, primary_key=True)
+    dia = Column(String, primary_key=True)
+    categoria = Column(String, primary_key=True)
+    total = Column(Float, nullable=False, default=0.0)
+    cantidad = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return (f"<GastoDiario(usuario_id={self.usuario_id}, dia={self.dia}, "
+                f"categoria={self.categoria}, total={self.total}, cantidad={self.cantidad})>")
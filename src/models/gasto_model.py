@@ -1,30 +1,38 @@
 """
 Modelo de Gasto
 """
-from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Index
+from sqlalchemy import Column, Integer, String, Float, DateTime, JSON, Index, inspect
 from datetime import datetime
 from .base import Base
+from .tipos import FechaISO
 
 
 class Gasto(Base):
     """Modelo de tabla gastos"""
     __tablename__ = "gastos"
 
-    id = Column(Integer, primary_key=True, index=True)
-    usuario_id = Column(Integer, nullable=False, index=True)
+    id = Column(Integer, primary_key=True)
+    usuario_id = Column(Integer, nullable=False)
     descripcion = Column(String, nullable=False)
     monto = Column(Float, nullable=False)
     categoria = Column(String, default='Otros')
-    fecha = Column(String, nullable=False)
+    fecha = Column(FechaISO, nullable=False)
     imagen_url = Column(String, nullable=True)
     datos_ocr = Column(JSON, nullable=True)
-    timestamp = Column(DateTime, default=datetime.utcnow, index=True)
+    timestamp = Column(DateTime, default=datetime.utcnow)
 
-    # Índices
+    # Índices compuestos que cubren las consultas por rango de GastoDAO:
+    # filtran por usuario y timestamp y leen monto sin tocar la tabla.
+    # El de listado incluye además id (desempate del orden en la paginación
+    # por clave) y las columnas de obtener_recientes/obtener_pagina; datos_ocr
+    # e imagen_url quedan fuera, así que las consultas que cargan el Gasto
+    # completo siguen leyendo la tabla.
     __table_args__ = (
-        Index('idx_usuario_id', 'usuario_id'),
-        Index('idx_fecha', 'fecha'),
-        Index('idx_categoria', 'categoria'),
+        Index(
+            'idx_gastos_usuario_timestamp_listado',
+            'usuario_id', 'timestamp', 'id', 'monto', 'categoria', 'fecha', 'descripcion'
+        ),
+        Index('idx_gastos_usuario_categoria_timestamp', 'usuario_id', 'categoria', 'timestamp', 'monto'),
     )
 
     def __repr__(self):
@@ -38,9 +46,10 @@ class Gasto(Base):
             'descripcion': self.descripcion,
             'monto': self.monto,
             'categoria': self.categoria,
-            'fecha': self.fecha,
+            'fecha': self.fecha.isoformat() if self.fecha else None,
             'imagen_url': self.imagen_url,
-            'datos_ocr': self.datos_ocr,
+            # datos_ocr puede no estar cargado (consultas de listado lo difieren)
+            'datos_ocr': None if 'datos_ocr' in inspect(self).unloaded else self.datos_ocr,
             'timestamp': self.timestamp.isoformat() if self.timestamp else None
         }
 
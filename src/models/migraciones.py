@@ -0,0 +1,337 @@
+"""
+Migraciones versionadas del esquema
+create_all solo crea tablas nuevas: los cambios sobre tablas ya creadas
+(columnas, índices, datos derivados) se registran aquí con un número de
+versión y se aplican una sola vez, en orden.
+
+Cada migración tiene un paso de esquema (DDL rápido e idempotente) y,
+opcionalmente, un relleno de filas existentes que se ejecuta en lotes
+pequeños, cada uno en su propia transacción, guardando un punto de control
+en `migracion_progreso`. Si el proceso se detiene a mitad, la siguiente
+ejecución continúa desde el último lote confirmado.
+"""
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import (
+    Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+)
+from src.config import ExceptionHandler, MIGRACION_TAM_LOTE, MIGRACION_PAUSA
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+# ================================================================
+# TABLAS DE CONTROL
+# ================================================================
+metadata_migraciones = MetaData()
+
+schema_migraciones = Table(
+    'schema_migraciones', metadata_migraciones,
+    Column('version', Integer, primary_key=True),
+    Column('nombre', String, nullable=False),
+    Column('aplicada', DateTime, nullable=False, default=datetime.utcnow),
+)
+
+migracion_progreso = Table(
+    'migracion_progreso', metadata_migraciones,
+    Column('version', Integer, primary_key=True),
+    Column('ultimo_id', Integer, nullable=False),
+    Column('objetivo_id', Integer, nullable=False),
+    Column('actualizado', DateTime, nullable=False, default=datetime.utcnow),
+)
+
+# ================================================================
+# REGISTRO
+# ================================================================
+MIGRACIONES = {}
+
+
+class Migracion:
+    """Migración registrada: paso de esquema y relleno opcional por lotes"""
+
+    def __init__(self, version, nombre, esquema, rellenar=None, tabla='gastos'):
+        self.version = version
+        self.nombre = nombre
+        self.esquema = esquema
+        self.rellenar = rellenar
+        self.tabla = tabla
+
+    def __repr__(self):
+        return f"<Migracion({self.version}, {self.nombre!r})>"
+
+
+def registrar_migracion(version, nombre, rellenar=None, tabla='gastos'):
+    """
+    Decorador que registra el paso de esquema de una migración
+
+    Args:
+        version (int): Número de versión (único, creciente)
+        nombre (str): Descripción corta
+        rellenar: Función (conn, desde_id, hasta_id) -> filas que actualiza
+            las filas con id en (desde_id, hasta_id]; debe ser idempotente
+        tabla (str): Tabla cuyos ids recorre el relleno
+    """
+    def decorador(esquema):
+        if version in MIGRACIONES:
+            raise ValueError(f"Versión de migración duplicada: {version}")
+        MIGRACIONES[version] = Migracion(version, nombre, esquema, rellenar, tabla)
+        return esquema
+    return decorador
+
+
+# ================================================================
+# UTILIDADES DE ESQUEMA
+# ================================================================
+def agregar_columna(conn, tabla, columna, definicion) -> bool:
+    """
+    Agrega una columna si no existe (ALTER TABLE ... ADD COLUMN)
+
+    Args:
+        conn: Conexión en una transacción
+        tabla (str): Tabla
+        columna (str): Nombre de la columna
+        definicion (str): Tipo y restricciones SQL (p. ej. "DATE")
+
+    Returns:
+        bool: True si se agregó
+    """
+    columnas = {fila[1] for fila in conn.execute(text(f'PRAGMA table_info("{tabla}")'))}
+    if columna in columnas:
+        return False
+    conn.execute(text(f'ALTER TABLE "{tabla}" ADD COLUMN "{columna}" {definicion}'))
+    logger.info(f"➕ Columna agregada: {tabla}.{columna}")
+    return True
+
+
+# Índices de columnas sueltas reemplazados por los índices compuestos de Gasto
+INDICES_OBSOLETOS = (
+    'idx_usuario_id',
+    'idx_fecha',
+    'idx_categoria',
+    'ix_gastos_id',
+    'ix_gastos_usuario_id',
+    'ix_gastos_timestamp',
+    # Sustituido por idx_gastos_usuario_timestamp_listado (cubre los listados)
+    'idx_gastos_usuario_timestamp',
+)
+
+
+def actualizar_indices(engine) -> bool:
+    """
+    Elimina los índices obsoletos de gastos y crea los compuestos que falten
+
+    Args:
+        engine: Engine de la base de datos
+
+    Returns:
+        bool: True si se cambió algún índice
+    """
+    with engine.begin() as conn:
+        return _actualizar_indices(conn)
+
+
+def _actualizar_indices(conn) -> bool:
+    from .gasto_model import Gasto
+
+    existentes = {indice['name'] for indice in inspect(conn).get_indexes('gastos')}
+    obsoletos = [nombre for nombre in INDICES_OBSOLETOS if nombre in existentes]
+    nuevos = [indice for indice in Gasto.__table__.indexes if indice.name not in existentes]
+    if not obsoletos and not nuevos:
+        return False
+
+    for nombre in obsoletos:
+        conn.execute(text(f'DROP INDEX IF EXISTS "{nombre}"'))
+        logger.info(f"🗑️ Índice obsoleto eliminado: {nombre}")
+    for indice in nuevos:
+        indice.create(conn, checkfirst=True)
+        logger.info(f"📇 Índice creado: {indice.name}")
+    # Estadísticas para que el planificador elija los índices nuevos
+    conn.execute(text('ANALYZE gastos'))
+    return True
+
+
+# ================================================================
+# MIGRACIONES
+# ================================================================
+@registrar_migracion(1, 'Índices compuestos de gastos')
+def _indices_compuestos(conn):
+    _actualizar_indices(conn)
+
+
+@registrar_migracion(2, 'Agregado diario de gastos')
+def _agregado_diario(conn):
+    # Reconstrucción atómica: las escrituras concurrentes quedan incluidas
+    from src.dao import GastoDiarioDAO
+    from sqlalchemy.orm import Session
+
+    from src.versiones_datos import versiones_datos
+
+    with Session(bind=conn, join_transaction_mode='create_savepoint') as db:
+        filas = GastoDiarioDAO.reconstruir(db)
+    # Los resúmenes ya renderizados se calcularon con el agregado anterior
+    versiones_datos.invalidar_todo()
+    logger.info(f"✅ Agregados diarios reconstruidos: {filas} filas")
+
+
+def _normalizar_fechas(conn, desde_id, hasta_id):
+    """Convierte a ISO las fechas de texto que no lo son (DD/MM/YYYY o inválidas)"""
+    return conn.execute(text("""
+        UPDATE gastos SET fecha = CASE
+            WHEN fecha GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'
+                THEN substr(fecha, 1, 10)
+            WHEN fecha GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9]'
+                THEN substr(fecha, 7, 4) || '-' || substr(fecha, 4, 2) || '-' || substr(fecha, 1, 2)
+            ELSE coalesce(date(timestamp), date('now'))
+        END
+        WHERE id > :desde AND id <= :hasta
+          AND (fecha IS NULL OR length(fecha) != 10
+               OR fecha NOT GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]')
+    """), {'desde': desde_id, 'hasta': hasta_id}).rowcount
+
+
+@registrar_migracion(3, 'Fechas de gastos en formato ISO', rellenar=_normalizar_fechas)
+def _fechas_iso(conn):
+    # Sin cambios de DDL: FechaISO usa el mismo almacenamiento de texto
+    pass
+
+
+@registrar_migracion(4, 'Índice cubriente para los listados de gastos')
+def _indice_listado(conn):
+    _actualizar_indices(conn)
+
+
+# ================================================================
+# MOTOR
+# ================================================================
+def versiones_aplicadas(conn) -> set:
+    """Versiones ya registradas en schema_migraciones"""
+    return set(conn.execute(select(schema_migraciones.c.version)).scalars())
+
+
+def pendientes(engine) -> list:
+    """Migraciones registradas que aún no se aplicaron, en orden"""
+    metadata_migraciones.create_all(bind=engine)
+    with engine.connect() as conn:
+        aplicadas = versiones_aplicadas(conn)
+    return [MIGRACIONES[v] for v in sorted(MIGRACIONES) if v not in aplicadas]
+
+
+def _marcar_aplicada(conn, migracion):
+    conn.execute(migracion_progreso.delete().where(migracion_progreso.c.version == migracion.version))
+    conn.execute(schema_migraciones.insert().values(
+        version=migracion.version, nombre=migracion.nombre, aplicada=datetime.utcnow()
+    ))
+    logger.info(f"✅ Migración {migracion.version} aplicada: {migracion.nombre}")
+
+
+def _rellenar(engine, migracion, tam_lote, pausa, detener=None):
+    """
+    Ejecuta el relleno por lotes desde el último punto de control
+
+    Returns:
+        bool: True si terminó; False si se pidió detenerlo
+    """
+    with engine.begin() as conn:
+        progreso = conn.execute(
+            select(migracion_progreso).where(migracion_progreso.c.version == migracion.version)
+        ).first()
+        if progreso is None:
+            # Las filas posteriores a la instantánea ya se escriben con el esquema nuevo
+            objetivo = conn.execute(
+                text(f'SELECT coalesce(max(id), 0) FROM "{migracion.tabla}"')
+            ).scalar()
+            conn.execute(migracion_progreso.insert().values(
+                version=migracion.version, ultimo_id=0, objetivo_id=objetivo,
+                actualizado=datetime.utcnow()
+            ))
+            ultimo, objetivo = 0, objetivo
+        else:
+            ultimo, objetivo = progreso.ultimo_id, progreso.objetivo_id
+            logger.info(f"↩️ Reanudando migración {migracion.version} desde id {ultimo}")
+
+    total = 0
+    while ultimo < objetivo:
+        if detener is not None and detener.is_set():
+            logger.info(f"⏸️ Migración {migracion.version} detenida en id {ultimo}")
+            return False
+        hasta = min(ultimo + tam_lote, objetivo)
+        with engine.begin() as conn:
+            total += migracion.rellenar(conn, ultimo, hasta) or 0
+            conn.execute(
+                migracion_progreso.update()
+                .where(migracion_progreso.c.version == migracion.version)
+                .values(ultimo_id=hasta, actualizado=datetime.utcnow())
+            )
+        ultimo = hasta
+        logger.info(f"🔄 Migración {migracion.version}: id {ultimo}/{objetivo} ({total} filas)")
+        if pausa:
+            # Ceder el lock de escritura a las transacciones del bot
+            time.sleep(pausa)
+    return True
+
+
+def _aplicar(engine, lista, tam_lote, pausa, detener=None):
+    """Aplica las migraciones en orden (esquema y, si tiene, relleno)"""
+    for migracion in lista:
+        logger.info(f"🔧 Migración {migracion.version}: {migracion.nombre}")
+        with engine.begin() as conn:
+            migracion.esquema(conn)
+            if migracion.rellenar is None:
+                _marcar_aplicada(conn, migracion)
+                continue
+        if not _rellenar(engine, migracion, tam_lote, pausa, detener):
+            return False
+        with engine.begin() as conn:
+            _marcar_aplicada(conn, migracion)
+    return True
+
+
+def migrar(engine, en_segundo_plano=False, tam_lote=MIGRACION_TAM_LOTE,
+           pausa=MIGRACION_PAUSA, detener=None):
+    """
+    Aplica las migraciones pendientes
+
+    Los pasos de esquema sin relleno se aplican siempre en el momento. A
+    partir de la primera migración con relleno, con en_segundo_plano=True
+    el resto continúa en un hilo para que el bot atienda mientras tanto.
+
+    Args:
+        engine: Engine de la base de datos
+        en_segundo_plano (bool): Rellenar en un hilo aparte
+        tam_lote (int): Filas (ids) por transacción de relleno
+        pausa (float): Segundos entre lotes
+        detener (threading.Event): Permite interrumpir el relleno
+
+    Returns:
+        threading.Thread | None: Hilo del relleno, si se lanzó
+    """
+    lista = pendientes(engine)
+    if not lista:
+        return None
+
+    inmediatas = []
+    for migracion in lista:
+        if migracion.rellenar is not None and en_segundo_plano:
+            break
+        inmediatas.append(migracion)
+    _aplicar(engine, inmediatas, tam_lote, pausa, detener)
+
+    resto = lista[len(inmediatas):]
+    if not resto:
+        return None
+
+    def ejecutar():
+        try:
+            _aplicar(engine, resto, tam_lote, pausa, detener)
+        except Exception as e:
+            ExceptionHandler.manejar_error(
+                excepcion=e,
+                contexto="Migración en segundo plano",
+                datos_adicionales={'Versiones': str([m.version for m in resto])}
+            )
+
+    hilo = threading.Thread(target=ejecutar, name='migraciones', daemon=True)
+    hilo.start()
+    logger.info(f"🧵 Migraciones {[m.version for m in resto]} continúan en segundo plano")
+    return hilo
@@ -0,0 +1,26 @@
+"""
+Tipos de columna personalizados
+"""
+from datetime import date, datetime
+from sqlalchemy.types import TypeDecorator, Date
+
+
+class FechaISO(TypeDecorator):
+    """
+    Fecha real (DATE) que también acepta cadenas 'YYYY-MM-DD'
+
+    SQLite la guarda como texto ISO, igual que la antigua columna String,
+    así que las filas existentes se leen sin migrar datos y ordenan
+    cronológicamente. Al leer devuelve siempre un `datetime.date`.
+    """
+    impl = Date
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or type(value) is date:
+            return value
+        if isinstance(value, datetime):
+            return value.date()
+        if isinstance(value, str):
+            return date.fromisoformat(value.strip()[:10])
+        raise TypeError(f"Fecha no válida: {value!r}")
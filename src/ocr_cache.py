@@ -0,0 +1,260 @@
+"""
+Cache de resultados OCR por contenido de imagen
+Nivel en memoria (LRU) y nivel persistente en SQLite
+"""
+import asyncio
+import hashlib
+import sqlite3
+import threading
+import time
+
+from src.cache_lru import CacheLRU
+from src.config import (
+    OCR_CACHE_DB_PATH,
+    OCR_CACHE_MAX_MEMORIA,
+    OCR_CACHE_MAX_DISCO,
+    OCR_CACHE_TTL,
+    OCR_IDIOMAS,
+    ExceptionHandler
+)
+from src.metrics import metricas
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+
+def calcular_clave(datos_imagen, idiomas=OCR_IDIOMAS, *extras) -> str:
+    """
+    Calcula la clave de caché de una imagen
+
+    Args:
+        datos_imagen (bytes | memoryview): Contenido de la imagen
+        idiomas (str): Idiomas de Tesseract usados
+        *extras: Otros parámetros que cambian el resultado del OCR
+
+    Returns:
+        str: Hash hexadecimal
+    """
+    h = hashlib.sha256(datos_imagen)
+    for parte in (idiomas, *extras):
+        h.update(b'\0')
+        h.update(str(parte).encode('utf-8'))
+    return h.hexdigest()
+
+
+class OCRCache:
+    """Cache de texto OCR en dos niveles (memoria + SQLite)"""
+
+    # Escrituras entre cada purga de filas expiradas/sobrantes en disco
+    PURGAR_CADA = 100
+
+    def __init__(self, ruta_db=OCR_CACHE_DB_PATH, max_memoria=OCR_CACHE_MAX_MEMORIA,
+                 max_disco=OCR_CACHE_MAX_DISCO, ttl=OCR_CACHE_TTL):
+        """
+        Args:
+            ruta_db: Archivo SQLite del nivel persistente (None = solo memoria)
+            max_memoria (int): Entradas máximas en memoria
+            max_disco (int): Filas máximas en disco
+            ttl (int): Segundos de vida de cada entrada
+        """
+        self.ruta_db = ruta_db
+        self.max_disco = max_disco
+        self.ttl = ttl
+        self.memoria = CacheLRU(max_entradas=max_memoria, ttl=ttl)
+        self.aciertos_disco = 0
+        self.fallos = 0
+        self._conn = None
+        self._lock = threading.Lock()
+        self._escrituras = 0
+
+    def _conexion(self):
+        """Abre la base de datos de caché la primera vez que se usa"""
+        if self._conn is None:
+            self._conn = sqlite3.connect(str(self.ruta_db), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS ocr_cache ("
+                " clave TEXT PRIMARY KEY,"
+                " texto TEXT NOT NULL,"
+                " creado REAL NOT NULL,"
+                " ultimo_acceso REAL NOT NULL)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_ocr_cache_acceso ON ocr_cache(ultimo_acceso)"
+            )
+            self._conn.commit()
+        return self._conn
+
+    def obtener(self, clave: str):
+        """
+        Busca el texto OCR de una imagen
+
+        Args:
+            clave (str): Clave calculada con `calcular_clave`
+
+        Returns:
+            str: Texto OCR, o None si no está en caché
+        """
+        texto = self.memoria.obtener(clave)
+        if texto is not None:
+            return texto
+        disco = self._obtener_disco(clave) if self.ruta_db is not None else None
+        return self._resultado_disco(clave, disco)
+
+    async def obtener_async(self, clave: str):
+        """
+        Igual que `obtener`, para usar desde el event loop
+
+        La memoria se consulta en el propio loop; el nivel SQLite, solo
+        tras un fallo y en un hilo aparte para no bloquear al bot.
+        """
+        texto = self.memoria.obtener(clave)
+        if texto is not None:
+            return texto
+        disco = None
+        if self.ruta_db is not None:
+            disco = await asyncio.to_thread(self._obtener_disco, clave)
+        return self._resultado_disco(clave, disco)
+
+    def _resultado_disco(self, clave, texto):
+        """Cuenta el acierto o fallo del nivel SQLite y sube el texto a memoria"""
+        if texto is None:
+            self.fallos += 1
+            return None
+        self.aciertos_disco += 1
+        self.memoria.guardar(clave, texto)
+        return texto
+
+    def guardar(self, clave: str, texto: str):
+        """Guarda el texto OCR en ambos niveles"""
+        self.memoria.guardar(clave, texto)
+        if self.ruta_db is not None:
+            self._guardar_disco(clave, texto)
+
+    async def guardar_async(self, clave: str, texto: str):
+        """Igual que `guardar`, con la escritura en SQLite fuera del event loop"""
+        self.memoria.guardar(clave, texto)
+        if self.ruta_db is not None:
+            await asyncio.to_thread(self._guardar_disco, clave, texto)
+
+    def _obtener_disco(self, clave):
+        """Consulta el nivel SQLite"""
+        try:
+            ahora = time.time()
+            with self._lock:
+                conn = self._conexion()
+                fila = conn.execute(
+                    "SELECT texto, creado FROM ocr_cache WHERE clave = ?", (clave,)
+                ).fetchone()
+                if fila is None:
+                    return None
+                texto, creado = fila
+                if self.ttl and creado + self.ttl < ahora:
+                    conn.execute("DELETE FROM ocr_cache WHERE clave = ?", (clave,))
+                    conn.commit()
+                    return None
+                conn.execute(
+                    "UPDATE ocr_cache SET ultimo_acceso = ? WHERE clave = ?", (ahora, clave)
+                )
+                conn.commit()
+                return texto
+        except Exception as e:
+            ExceptionHandler.manejar_error(
+                excepcion=e,
+                contexto="Leyendo caché OCR",
+                datos_adicionales={'BD': str(self.ruta_db)}
+            )
+            return None
+
+    def _guardar_disco(self, clave, texto):
+        """Escribe en el nivel SQLite y purga periódicamente"""
+        try:
+            ahora = time.time()
+            with self._lock:
+                conn = self._conexion()
+                conn.execute(
+                    "INSERT OR REPLACE INTO ocr_cache (clave, texto, creado, ultimo_acceso) "
+                    "VALUES (?, ?, ?, ?)",
+                    (clave, texto, ahora, ahora)
+                )
+                self._escrituras += 1
+                if self._escrituras % self.PURGAR_CADA == 0:
+                    self._purgar(conn, ahora)
+                conn.commit()
+        except Exception as e:
+            ExceptionHandler.manejar_error(
+                excepcion=e,
+                contexto="Guardando caché OCR",
+                datos_adicionales={'BD': str(self.ruta_db)}
+            )
+
+    def _purgar(self, conn, ahora):
+        """Elimina filas expiradas y las menos usadas por encima del límite"""
+        if self.ttl:
+            conn.execute("DELETE FROM ocr_cache WHERE creado < ?", (ahora - self.ttl,))
+        conn.execute(
+            "DELETE FROM ocr_cache WHERE clave IN ("
+            " SELECT clave FROM ocr_cache ORDER BY ultimo_acceso DESC LIMIT -1 OFFSET ?)",
+            (self.max_disco,)
+        )
+        logger.debug("🧹 Caché OCR purgada")
+
+    def purgar(self):
+        """Fuerza la purga del nivel en disco"""
+        if self.ruta_db is None:
+            return
+        with self._lock:
+            conn = self._conexion()
+            self._purgar(conn, time.time())
+            conn.commit()
+
+    def limpiar(self):
+        """Vacía ambos niveles"""
+        self.memoria.limpiar()
+        if self.ruta_db is not None:
+            with self._lock:
+                conn = self._conexion()
+                conn.execute("DELETE FROM ocr_cache")
+                conn.commit()
+
+    def cerrar(self):
+        """Cierra la conexión SQLite"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def estadisticas(self) -> dict:
+        """Contadores de aciertos/fallos para monitoreo"""
+        aciertos_memoria = self.memoria.aciertos
+        consultas = aciertos_memoria + self.aciertos_disco + self.fallos
+        aciertos = aciertos_memoria + self.aciertos_disco
+        return {
+            'aciertos_memoria': aciertos_memoria,
+            'aciertos_disco': self.aciertos_disco,
+            'fallos': self.fallos,
+            'ratio_aciertos': aciertos / consultas if consultas else 0.0,
+            'entradas_memoria': len(self.memoria),
+        }
+
+
+# Instancia global
+ocr_cache = OCRCache()
+
+metricas.medidor(
+    'bot_ocr_cache_consultas_total',
+    'Consultas a la caché OCR por resultado',
+    lambda: {
+        ('memoria',): ocr_cache.memoria.aciertos,
+        ('disco',): ocr_cache.aciertos_disco,
+        ('fallo',): ocr_cache.fallos,
+    },
+    etiquetas=('resultado',),
+    tipo='counter'
+)
+metricas.medidor(
+    'bot_ocr_cache_ratio_aciertos',
+    'Proporción de aciertos de la caché OCR (memoria + disco)',
+    lambda: ocr_cache.estadisticas()['ratio_aciertos']
+)
@@ -0,0 +1,270 @@
+"""
+Ejecutor de OCR fuera del event loop
+Ejecuta Tesseract en un pool acotado de procesos con control de cola
+"""
+import asyncio
+import io
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from PIL import Image
+import pytesseract
+
+from src.config import (
+    OCR_EXECUTOR_MODO,
+    OCR_MAX_WORKERS,
+    OCR_MAX_COLA,
+    OCR_TIMEOUT_COLA,
+    OCR_BUFFER_MEMORYVIEW,
+    OCR_PREPROCESAMIENTO,
+    OCR_IDIOMAS,
+    detectar_tesseract,
+    tesseract_detectado
+)
+from src.image_preprocessor import decodificar, preprocesar, validar_pasos
+from src.metrics import duracion_etapas_factura, metricas
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class ColaOCRLlenaError(Exception):
+    """La cola de OCR está llena y no se liberó un hueco a tiempo"""
+
+
+class LectorMemoria(io.RawIOBase):
+    """Archivo de solo lectura sobre un memoryview, sin copiar el buffer"""
+
+    def __init__(self, buffer):
+        self._buffer = memoryview(buffer).cast('B')
+        self._posicion = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, destino):
+        fin = min(self._posicion + len(destino), len(self._buffer))
+        leidos = fin - self._posicion
+        destino[:leidos] = self._buffer[self._posicion:fin]
+        self._posicion = fin
+        return leidos
+
+    def seek(self, desplazamiento, desde=io.SEEK_SET):
+        if desde == io.SEEK_CUR:
+            desplazamiento += self._posicion
+        elif desde == io.SEEK_END:
+            desplazamiento += len(self._buffer)
+        self._posicion = max(0, desplazamiento)
+        return self._posicion
+
+    def tell(self):
+        return self._posicion
+
+
+def abrir_imagen(datos_imagen):
+    """
+    Abre una imagen desde memoria
+
+    Args:
+        datos_imagen (bytes | bytearray | memoryview): Contenido del archivo
+
+    Returns:
+        PIL.Image.Image: Imagen (decodificación perezosa)
+    """
+    if isinstance(datos_imagen, memoryview):
+        return Image.open(LectorMemoria(datos_imagen))
+    return Image.open(io.BytesIO(datos_imagen))
+
+
+def _reconocer_texto(datos_imagen, idiomas, tesseract_cmd=None, pasos=()):
+    """
+    Preprocesa y ejecuta Tesseract sobre una imagen en memoria (corre dentro del worker)
+
+    Args:
+        datos_imagen (bytes | memoryview): Contenido del archivo de imagen
+        idiomas (str): Idiomas de Tesseract (ej: 'spa+eng')
+        tesseract_cmd (str): Ruta del ejecutable de Tesseract
+        pasos (list): Pasos de preprocesamiento a aplicar
+
+    Returns:
+        tuple: (texto reconocido, dict etapa -> milisegundos)
+    """
+    if tesseract_cmd:
+        pytesseract.pytesseract.tesseract_cmd = tesseract_cmd
+
+    with abrir_imagen(datos_imagen) as imagen:
+        inicio = time.perf_counter()
+        decodificar(imagen, pasos)
+        tiempos = {'decodificar': (time.perf_counter() - inicio) * 1000}
+
+        procesada, tiempos_pasos = preprocesar(imagen, pasos)
+        tiempos.update(tiempos_pasos)
+
+        inicio = time.perf_counter()
+        texto = pytesseract.image_to_string(procesada, lang=idiomas)
+        tiempos['ocr'] = (time.perf_counter() - inicio) * 1000
+
+    return texto, tiempos
+
+
+class OCRExecutor:
+    """Pool acotado para ejecutar OCR sin bloquear el event loop"""
+
+    def __init__(self, max_workers=OCR_MAX_WORKERS, max_cola=OCR_MAX_COLA,
+                 timeout_cola=OCR_TIMEOUT_COLA, modo=OCR_EXECUTOR_MODO,
+                 pasos=OCR_PREPROCESAMIENTO):
+        """
+        Args:
+            max_workers (int): Trabajos de OCR ejecutándose en paralelo
+            max_cola (int): Trabajos aceptados esperando un worker libre
+            timeout_cola (float): Segundos que se espera un hueco antes de rechazar
+            modo (str): 'proceso' (ProcessPoolExecutor) o 'hilo' (ThreadPoolExecutor)
+            pasos (list): Pasos de preprocesamiento antes de Tesseract
+        """
+        self.pasos = validar_pasos(pasos)
+        self.max_workers = max(1, max_workers)
+        self.max_cola = max(0, max_cola)
+        self.timeout_cola = timeout_cola
+        self.modo = modo
+        self._pool = None
+        self._huecos = None
+        self._pendientes = 0
+        self._esperando = 0
+
+    @property
+    def capacidad(self) -> int:
+        """Trabajos que se aceptan a la vez (en ejecución + en cola)"""
+        return self.max_workers + self.max_cola
+
+    @property
+    def pendientes(self) -> int:
+        """Trabajos aceptados que aún no terminaron"""
+        return self._pendientes
+
+    @property
+    def profundidad_cola(self) -> int:
+        """Trabajos esperando un worker libre o un hueco en la cola"""
+        return max(0, self._pendientes - self.max_workers) + self._esperando
+
+    def _obtener_pool(self):
+        """Crea el pool la primera vez que se usa"""
+        if self._pool is None:
+            if self.modo == 'hilo':
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix='ocr'
+                )
+            else:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            logger.info("⚙️ Pool OCR iniciado (%s, %s workers, cola %s)", self.modo, self.max_workers, self.max_cola)
+        return self._pool
+
+    async def ejecutar(self, funcion, *args):
+        """
+        Ejecuta una función en el pool respetando el límite de la cola
+
+        Args:
+            funcion: Función a ejecutar (debe ser serializable en modo 'proceso')
+            *args: Argumentos de la función
+
+        Returns:
+            Resultado de la función
+
+        Raises:
+            ColaOCRLlenaError: Si no hubo hueco en `timeout_cola` segundos
+        """
+        if self._huecos is None:
+            self._huecos = asyncio.Semaphore(self.capacidad)
+
+        self._esperando += 1
+        try:
+            await asyncio.wait_for(self._huecos.acquire(), timeout=self.timeout_cola)
+        except asyncio.TimeoutError:
+            logger.warning("⚠️ Cola OCR llena (%s/%s)", self._pendientes, self.capacidad)
+            raise ColaOCRLlenaError(
+                f'Cola de OCR llena ({self._pendientes} trabajos pendientes)'
+            ) from None
+        finally:
+            self._esperando -= 1
+
+        self._pendientes += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._obtener_pool(), funcion, *args)
+        finally:
+            self._pendientes -= 1
+            self._huecos.release()
+
+    def _preparar_buffer(self, datos_imagen):
+        """
+        Adapta el buffer al tipo de pool
+
+        Los procesos reciben bytes (se serializan igual); los hilos comparten
+        memoria y pueden leer el memoryview directamente sin copiarlo.
+        """
+        if self.modo == 'hilo' and OCR_BUFFER_MEMORYVIEW:
+            return memoryview(datos_imagen)
+        if isinstance(datos_imagen, bytes):
+            return datos_imagen
+        return bytes(datos_imagen)
+
+    async def reconocer_texto(self, datos_imagen, idiomas=OCR_IDIOMAS):
+        """
+        Preprocesa y ejecuta Tesseract sobre una imagen en memoria en el pool
+
+        Args:
+            datos_imagen (bytes | bytearray | memoryview): Contenido de la imagen
+            idiomas (str): Idiomas de Tesseract
+
+        Returns:
+            str: Texto reconocido
+        """
+        buffer = self._preparar_buffer(datos_imagen)
+        if not tesseract_detectado():
+            # Primer OCR antes de que termine la búsqueda en segundo plano
+            await asyncio.to_thread(detectar_tesseract)
+        texto, tiempos = await self.ejecutar(
+            _reconocer_texto, buffer, idiomas, detectar_tesseract().comando, self.pasos
+        )
+        # Medidas dentro del worker (decodificar, pasos de preprocesamiento, ocr)
+        for etapa, ms in tiempos.items():
+            duracion_etapas_factura.observar(ms / 1000, etapa=etapa)
+        logger.info(
+            "⏱️ Etapas OCR: %s",
+            ", ".join(f"{etapa}={ms:.1f}ms" for etapa, ms in tiempos.items()),
+            extra={
+                'etapa': 'ocr',
+                'duracion_ms': round(sum(tiempos.values()), 1),
+                'etapas_ms': {etapa: round(ms, 1) for etapa, ms in tiempos.items()},
+            }
+        )
+        return texto
+
+    def cerrar(self, esperar=True):
+        """Detiene el pool de workers"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=esperar)
+            self._pool = None
+            logger.info("🛑 Pool OCR detenido")
+
+
+# Instancia global
+ocr_executor = OCRExecutor()
+
+metricas.medidor(
+    'bot_ocr_cola_profundidad',
+    'Trabajos OCR esperando un worker libre o un hueco en la cola',
+    lambda: ocr_executor.profundidad_cola
+)
+metricas.medidor(
+    'bot_ocr_pendientes',
+    'Trabajos OCR aceptados sin terminar',
+    lambda: ocr_executor.pendientes
+)
+metricas.medidor(
+    'bot_ocr_capacidad',
+    'Trabajos OCR que se aceptan a la vez (workers + cola)',
+    lambda: ocr_executor.capacidad
+)
@@ -3,6 +3,6 @@ Módulo Repository
 Lógica de negocio reutilizable
 """
 from .gasto_repository import GastoRepository
+from .async_gasto_repository import AsyncGastoRepository, ejecutar_en_db, cerrar_executor_db
 
-__all__ = ['GastoRepository']
-
+__all__ = ['GastoRepository', 'AsyncGastoRepository', 'ejecutar_en_db', 'cerrar_executor_db']
@@ -0,0 +1,142 @@
+"""
+Repository asíncrono para Gasto
+Ejecuta GastoRepository en hilos dedicados a la BD para no bloquear el event loop
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from src.config import DB_MAX_WORKERS
+from src.repository.gasto_repository import GastoRepository
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _obtener_executor() -> ThreadPoolExecutor:
+    """Crea el pool de hilos de BD la primera vez que se usa"""
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=DB_MAX_WORKERS,
+                thread_name_prefix='db'
+            )
+            logger.info(f"🗄️ Ejecutor de BD iniciado ({DB_MAX_WORKERS} hilos)")
+        return _executor
+
+
+async def ejecutar_en_db(funcion, *args, **kwargs):
+    """
+    Ejecuta una función síncrona de BD en el pool de hilos de BD
+
+    Una consulta lenta (p. ej. esperando el busy_timeout de SQLite) solo
+    ocupa un hilo de BD; el event loop sigue atendiendo otros mensajes.
+    La función corre con una copia del contexto de la tarea, así que los
+    logs de la BD conservan el request_id y el usuario de contexto_log.
+
+    Args:
+        funcion: Función síncrona (repository, service, DAO...)
+        *args, **kwargs: Argumentos de la función
+
+    Returns:
+        Resultado de la función
+    """
+    loop = asyncio.get_running_loop()
+    contexto = contextvars.copy_context()
+    return await loop.run_in_executor(
+        _obtener_executor(), functools.partial(contexto.run, funcion, *args, **kwargs)
+    )
+
+
+def cerrar_executor_db(esperar: bool = True) -> None:
+    """Cierra el pool de hilos de BD (al apagar el bot)"""
+    global _executor
+    with _lock:
+        if _executor is not None:
+            _executor.shutdown(wait=esperar)
+            _executor = None
+            logger.info("🛑 Ejecutor de BD detenido")
+
+
+class AsyncGastoRepository:
+    """Versión awaitable de GastoRepository (misma API, mismos errores)"""
+
+    @staticmethod
+    async def crear_gasto(usuario_id: int, descripcion: str, monto: float,
+                          categoria: str = 'Otros', imagen_url: str = None,
+                          datos_ocr: dict = None):
+        """Crea un nuevo gasto"""
+        return await ejecutar_en_db(
+            GastoRepository.crear_gasto, usuario_id, descripcion, monto,
+            categoria, imagen_url, datos_ocr
+        )
+
+    @staticmethod
+    async def crear_lote(usuario_id: int, gastos: list) -> list:
+        """Crea varios gastos en una sola transacción"""
+        return await ejecutar_en_db(GastoRepository.crear_lote, usuario_id, gastos)
+
+    @staticmethod
+    async def obtener_gasto(gasto_id: int):
+        """Obtiene un gasto por ID"""
+        return await ejecutar_en_db(GastoRepository.obtener_gasto, gasto_id)
+
+    @staticmethod
+    async def obtener_gastos_usuario(usuario_id: int, dias: int = 30) -> list:
+        """Obtiene gastos de un usuario"""
+        return await ejecutar_en_db(GastoRepository.obtener_gastos_usuario, usuario_id, dias)
+
+    @staticmethod
+    async def obtener_gastos_recientes(usuario_id: int, dias: int = 30, limite: int = 10) -> list:
+        """Obtiene los últimos gastos de un usuario"""
+        return await ejecutar_en_db(
+            GastoRepository.obtener_gastos_recientes, usuario_id, dias, limite
+        )
+
+    @staticmethod
+    async def obtener_pagina_gastos(usuario_id: int, dias: int = 30, limite: int = 10,
+                                    cursor: tuple = None, hacia_atras: bool = False) -> dict:
+        """Obtiene una página de gastos"""
+        return await ejecutar_en_db(
+            GastoRepository.obtener_pagina_gastos, usuario_id, dias, limite, cursor, hacia_atras
+        )
+
+    @staticmethod
+    async def obtener_total_gastos(usuario_id: int, dias: int = 30) -> float:
+        """Obtiene el total de gastos"""
+        return await ejecutar_en_db(GastoRepository.obtener_total_gastos, usuario_id, dias)
+
+    @staticmethod
+    async def obtener_resumen(usuario_id: int, dias: int = 30) -> dict:
+        """Obtiene total, cantidad y promedio"""
+        return await ejecutar_en_db(GastoRepository.obtener_resumen, usuario_id, dias)
+
+    @staticmethod
+    async def obtener_gastos_por_categoria(usuario_id: int, dias: int = 30) -> list:
+        """Obtiene gastos agrupados por categoría"""
+        return await ejecutar_en_db(
+            GastoRepository.obtener_gastos_por_categoria, usuario_id, dias
+        )
+
+    @staticmethod
+    async def actualizar_gasto(gasto_id: int, usuario_id: int, **kwargs):
+        """Actualiza un gasto"""
+        return await ejecutar_en_db(
+            GastoRepository.actualizar_gasto, gasto_id, usuario_id, **kwargs
+        )
+
+    @staticmethod
+    async def eliminar_gasto(gasto_id: int, usuario_id: int) -> bool:
+        """Elimina un gasto"""
+        return await ejecutar_en_db(GastoRepository.eliminar_gasto, gasto_id, usuario_id)
+
+    @staticmethod
+    async def obtener_estadisticas(usuario_id: int, dias: int = 30) -> dict:
+        """Obtiene estadísticas completas"""
+        return await ejecutar_en_db(GastoRepository.obtener_estadisticas, usuario_id, dias)
@@ -2,29 +2,42 @@
 Repository para Gasto
 Lógica de negocio reutilizable
 """
-from src.models import SessionLocal
-from src.dao import GastoDAO
+from src.models import Gasto, abrir_sesion, cerrar_sesion, confirmar, deshacer
+from src.dao import GastoDAO, GastoDiarioDAO
 from src.utils import get_logger
 from src.config import ExceptionHandler
+from src.versiones_datos import versiones_datos
+from src.metrics import duracion_consultas_db, instrumentar_metodos
 
 logger = get_logger(__name__)
 
 
+@instrumentar_metodos(duracion_consultas_db, 'operacion')
 class GastoRepository:
-    """Repository con lógica de negocio para gastos"""
+    """
+    Repository con lógica de negocio para gastos
+
+    Las escrituras confirman su propia transacción, salvo dentro de
+    unidad_de_trabajo(): ahí solo hacen flush y el bloque confirma o deshace
+    todas juntas.
+    """
 
     @staticmethod
     def crear_gasto(usuario_id: int, descripcion: str, monto: float,
                     categoria: str = 'Otros', imagen_url: str = None,
                     datos_ocr: dict = None):
         """Crea un nuevo gasto"""
-        db = SessionLocal()
+        db = abrir_sesion()
         try:
-            logger.info(f"📝 Creando gasto: {descripcion} - S/. {monto:.2f}")
+            logger.info("📝 Creando gasto: %s - S/. %.2f", descripcion, monto)
             gasto = GastoDAO.crear(
-                db, usuario_id, descripcion, monto, categoria, imagen_url, datos_ocr
+                db, usuario_id, descripcion, monto, categoria, imagen_url, datos_ocr,
+                commit=False
             )
-            logger.info(f"✅ Gasto creado con ID: {gasto.id}")
+            GastoDiarioDAO.acumular(db, Gasto.id == gasto.id)
+            confirmar(db, lambda: versiones_datos.incrementar(usuario_id))
+            db.refresh(gasto)
+            logger.info("✅ Gasto creado con ID: %s", gasto.id)
             return gasto
         except Exception as e:
             ExceptionHandler.manejar_error(
@@ -37,19 +50,55 @@ class GastoRepository:
                     'Categoría': categoria
                 }
             )
-            db.rollback()
+            deshacer(db)
             raise
         finally:
-            db.close()
+            cerrar_sesion(db)
+
+    @staticmethod
+    def crear_lote(usuario_id: int, gastos: list) -> list:
+        """
+        Crea varios gastos en una sola transacción
+
+        Args:
+            usuario_id (int): Usuario dueño de los gastos
+            gastos (list): Diccionarios con descripcion, monto y opcionalmente
+                categoria, fecha, timestamp, imagen_url y datos_ocr
+
+        Returns:
+            list: IDs generados, en el mismo orden que `gastos`
+        """
+        db = abrir_sesion()
+        try:
+            logger.info("📝 Creando %s gastos en lote", len(gastos))
+            ids = GastoDAO.crear_lote(db, usuario_id, gastos, commit=False)
+            if ids:
+                GastoDiarioDAO.acumular(db, Gasto.id.in_(ids))
+            confirmar(db, lambda: versiones_datos.incrementar(usuario_id))
+            logger.info("✅ %s gastos creados", len(ids))
+            return ids
+        except Exception as e:
+            ExceptionHandler.manejar_error(
+                excepcion=e,
+                contexto="Creando gastos en lote",
+                datos_adicionales={
+                    'Usuario ID': usuario_id,
+                    'Cantidad': len(gastos)
+                }
+            )
+            deshacer(db)
+            raise
+        finally:
+            cerrar_sesion(db)
 
     @staticmethod
     def obtener_gasto(gasto_id: int):
         """Obtiene un gasto por ID"""
-        db = SessionLocal()
+        db = abrir_sesion()
         try:
             gasto = GastoDAO.obtener_por_id(db, gasto_id)
             if not gasto:
-                logger.warning(f"⚠️ Gasto {gasto_id} no encontrado")
+                logger.warning("⚠️ Gasto %s no encontrado", gasto_id)
             return gasto
         except Exception as e:
             ExceptionHandler.manejar_error(
@@ -59,15 +108,15 @@ class GastoRepository:
             )
             raise
         finally:
-            db.close()
+            cerrar_sesion(db)
 
     @staticmethod
     def obtener_gastos_usuario(usuario_id: int, dias: int = 30) -> list:
         """Obtiene gastos de un usuario"""
-        db = SessionLocal()
+        db = abrir_sesion()
         try:
             gastos = GastoDAO.obtener_por_rango_fechas(db, usuario_id, dias)
-            logger.info(f"📊 Se encontraron {len(gastos)} gastos")
+            logger.info("📊 Se encontraron %s gastos", len(gastos))
             return gastos
         except Exception as e:
             ExceptionHandler.manejar_error(
@@ -80,15 +129,103 @@ class GastoRepository:
             )
             raise
         finally:
-            db.close()
+            cerrar_sesion(db)
+
+    @staticmethod
+    def obtener_gastos_recientes(usuario_id: int, dias: int = 30, limite: int = 10) -> list:
+        """Obtiene los últimos gastos de un usuario (solo columnas de listado)"""
+        db = abrir_sesion()
+        try:
+            gastos = GastoDAO.obtener_recientes(db, usuario_id, dias, limite)
+            logger.info("📊 Se cargaron %s gastos recientes", len(gastos))
+            return gastos
+        except Exception as e:
+            ExceptionHandler.manejar_error(
+                excepcion=e,
+                contexto="Obteniendo gastos recientes",
+                datos_adicionales={
+                    'Usuario ID': usuario_id,
+                    'Rango días': dias,
+                    'Límite': limite
+                }
+            )
+            raise
+        finally:
+            cerrar_sesion(db)
+
+    @staticmethod
+    def iterar_gastos(usuario_id: int, tam_lote: int = 500):
+        """
+        Recorre todos los gastos de un usuario en streaming (ver GastoDAO.iterar)
+
+        La sesión queda abierta mientras se consume el generador y se cierra
+        al agotarlo o al cerrarlo.
+        """
+        db = abrir_sesion()
+        try:
+            yield from GastoDAO.iterar(db, usuario_id, tam_lote)
+        except Exception as e:
+            ExceptionHandler.manejar_error(
+                excepcion=e,
+                contexto="Recorriendo gastos",
+                datos_adicionales={
+                    'Usuario ID': usuario_id,
+                    'Tamaño de lote': tam_lote
+                }
+            )
+            raise
+        finally:
+            cerrar_sesion(db)
+
+    @staticmethod
+    def obtener_pagina_gastos(usuario_id: int, dias: int = 30, limite: int = 10,
+                              cursor: tuple = None, hacia_atras: bool = False) -> dict:
+        """
+        Obtiene una página de gastos (paginación por clave, ver GastoDAO.obtener_pagina)
+
+        Returns:
+            dict: gastos, hay_anterior, hay_siguiente, primero y ultimo
+                (cursores (timestamp, id) de los bordes de la página)
+        """
+        db = abrir_sesion()
+        try:
+            filas = GastoDAO.obtener_pagina(db, usuario_id, dias, limite, cursor, hacia_atras)
+            hay_mas = len(filas) > limite
+            if hacia_atras:
+                gastos = filas[-limite:] if hay_mas else filas
+                hay_anterior, hay_siguiente = hay_mas, True
+            else:
+                gastos = filas[:limite]
+                hay_anterior, hay_siguiente = cursor is not None, hay_mas
+
+            return {
+                'gastos': gastos,
+                'hay_anterior': hay_anterior,
+                'hay_siguiente': hay_siguiente,
+                'primero': (gastos[0].timestamp, gastos[0].id) if gastos else None,
+                'ultimo': (gastos[-1].timestamp, gastos[-1].id) if gastos else None,
+            }
+        except Exception as e:
+            ExceptionHandler.manejar_error(
+                excepcion=e,
+                contexto="Obteniendo página de gastos",
+                datos_adicionales={
+                    'Usuario ID': usuario_id,
+                    'Rango días': dias,
+                    'Cursor': str(cursor)
+                }
+            )
+            raise
+        finally:
+            cerrar_sesion(db)
 
     @staticmethod
     def obtener_total_gastos(usuario_id: int, dias: int = 30) -> float:
         """Obtiene el total de gastos"""
-        db = SessionLocal()
+        db = abrir_sesion()
         try:
-            total = GastoDAO.suma_total(db, usuario_id, dias)
-            logger.info(f"💰 Total: S/. {total:.2f}")
+            total, _ = GastoDiarioDAO.resumen(db, usuario_id, dias)
+            logger.info("💰 Total: S/. %.2f", total)
             return total
         except Exception as e:
             ExceptionHandler.manejar_error(
@@ -101,15 +238,40 @@ class GastoRepository:
             )
             raise
         finally:
-            db.close()
+            cerrar_sesion(db)
+
+    @staticmethod
+    def obtener_resumen(usuario_id: int, dias: int = 30) -> dict:
+        """Obtiene total, cantidad y promedio desde el agregado diario"""
+        db = abrir_sesion()
+        try:
+            total, cantidad = GastoDiarioDAO.resumen(db, usuario_id, dias)
+            logger.info("💰 Total: S/. %.2f en %s gastos", total, cantidad)
+            return {
+                'total': total,
+                'cantidad': cantidad,
+                'promedio': total / cantidad if cantidad > 0 else 0
+            }
+        except Exception as e:
+            ExceptionHandler.manejar_error(
+                excepcion=e,
+                contexto="Obteniendo resumen de gastos",
+                datos_adicionales={
+                    'Usuario ID': usuario_id,
+                    'Rango días': dias
+                }
+            )
+            raise
+        finally:
+            cerrar_sesion(db)
 
     @staticmethod
     def obtener_gastos_por_categoria(usuario_id: int, dias: int = 30) -> list:
         """Obtiene gastos agrupados por categoría"""
-        db = SessionLocal()
+        db = abrir_sesion()
         try:
-            categorias = GastoDAO.agrupar_por_categoria(db, usuario_id, dias)
-            logger.info(f"📈 Se encontraron {len(categorias)} categorías")
+            categorias = GastoDiarioDAO.agrupar_por_categoria(db, usuario_id, dias)
+            logger.info("📈 Se encontraron %s categorías", len(categorias))
             return categorias
         except Exception as e:
             ExceptionHandler.manejar_error(
@@ -122,17 +284,21 @@ class GastoRepository:
             )
             raise
         finally:
-            db.close()
+            cerrar_sesion(db)
 
     @staticmethod
     def actualizar_gasto(gasto_id: int, usuario_id: int, **kwargs):
         """Actualiza un gasto"""
-        db = SessionLocal()
+        db = abrir_sesion()
         try:
             gasto = GastoDAO.obtener_por_id(db, gasto_id)
             if gasto and gasto.usuario_id == usuario_id:
-                gasto = GastoDAO.actualizar(db, gasto_id, **kwargs)
-                logger.info(f"✅ Gasto {gasto_id} actualizado")
+                GastoDiarioDAO.acumular(db, Gasto.id == gasto_id, signo=-1)
+                gasto = GastoDAO.actualizar(db, gasto_id, commit=False, **kwargs)
+                GastoDiarioDAO.acumular(db, Gasto.id == gasto_id)
+                confirmar(db, lambda: versiones_datos.incrementar(usuario_id))
+                db.refresh(gasto)
+                logger.info("✅ Gasto %s actualizado", gasto_id)
                 return gasto
             return None
         except Exception as e:
@@ -145,20 +311,22 @@ class GastoRepository:
                     'Campos': str(list(kwargs.keys()))
                 }
             )
-            db.rollback()
+            deshacer(db)
             raise
         finally:
-            db.close()
+            cerrar_sesion(db)
 
     @staticmethod
     def eliminar_gasto(gasto_id: int, usuario_id: int) -> bool:
         """Elimina un gasto"""
-        db = SessionLocal()
+        db = abrir_sesion()
         try:
             gasto = GastoDAO.obtener_por_id(db, gasto_id)
             if gasto and gasto.usuario_id == usuario_id:
-                resultado = GastoDAO.eliminar(db, gasto_id)
-                logger.info(f"✅ Gasto eliminado")
+                GastoDiarioDAO.acumular(db, Gasto.id == gasto_id, signo=-1)
+                resultado = GastoDAO.eliminar(db, gasto_id, commit=False)
+                confirmar(db, lambda: versiones_datos.incrementar(usuario_id))
+                logger.info("✅ Gasto eliminado")
                 return resultado
             return False
         except Exception as e:
@@ -170,23 +338,21 @@ class GastoRepository:
                     'Usuario ID': usuario_id
                 }
             )
-            db.rollback()
+            deshacer(db)
             raise
         finally:
-            db.close()
+            cerrar_sesion(db)
 
     @staticmethod
     def obtener_estadisticas(usuario_id: int, dias: int = 30) -> dict:
         """Obtiene estadísticas completas"""
-        db = SessionLocal()
+        db = abrir_sesion()
         try:
-            gastos = GastoDAO.obtener_por_rango_fechas(db, usuario_id, dias)
-            total = sum(g.monto for g in gastos)
-            cantidad = len(gastos)
+            total, cantidad = GastoDiarioDAO.resumen(db, usuario_id, dias)
             promedio = total / cantidad if cantidad > 0 else 0
-            categorias = GastoDAO.agrupar_por_categoria(db, usuario_id, dias)
+            categorias = GastoDiarioDAO.agrupar_por_categoria(db, usuario_id, dias)
 
-            logger.info(f"📊 Estadísticas generadas")
+            logger.info("📊 Estadísticas generadas")
 
             return {
                 'total': total,
@@ -212,5 +378,5 @@ class GastoRepository:
             )
             raise
         finally:
-            db.close()
+            cerrar_sesion(db)
 
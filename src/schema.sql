@@ -8,14 +8,26 @@ CREATE TABLE IF NOT EXISTS gastos (
     descripcion TEXT NOT NULL,
     monto REAL NOT NULL,
     categoria TEXT,
-    fecha TEXT NOT NULL,
+    fecha DATE NOT NULL,
     imagen_url TEXT,
     datos_ocr TEXT,
     timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
 );
 
--- Índices para optimizar búsquedas
-CREATE INDEX IF NOT EXISTS idx_usuario_id ON gastos(usuario_id);
-CREATE INDEX IF NOT EXISTS idx_fecha ON gastos(fecha);
-CREATE INDEX IF NOT EXISTS idx_categoria ON gastos(categoria);
+-- Índices compuestos que cubren las consultas por rango (usuario + timestamp)
+-- y los listados paginados (id, descripcion, monto, categoria, fecha)
+CREATE INDEX IF NOT EXISTS idx_gastos_usuario_timestamp_listado
+    ON gastos(usuario_id, timestamp, id, monto, categoria, fecha, descripcion);
+CREATE INDEX IF NOT EXISTS idx_gastos_usuario_categoria_timestamp
+    ON gastos(usuario_id, categoria, timestamp, monto);
 
+
+-- Agregado diario por usuario y categoría (lo mantiene GastoRepository)
+CREATE TABLE IF NOT EXISTS gastos_diarios (
+    usuario_id INTEGER NOT NULL,
+    dia TEXT NOT NULL,
+    categoria TEXT NOT NULL,
+    total REAL NOT NULL DEFAULT 0,
+    cantidad INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (usuario_id, dia, categoria)
+);
@@ -5,6 +5,9 @@ Servicios de negocio reutilizables
 from .gasto_service import GastoService
 from .discord_service import DiscordService
 from .template_service import TemplateService, template_service
+from .export_service import ExportService
+from .import_service import ImportService
 
-__all__ = ['GastoService', 'DiscordService', 'TemplateService', 'template_service']
+__all__ = ['GastoService', 'DiscordService', 'TemplateService', 'template_service', 'ExportService',
+           'ImportService']
 
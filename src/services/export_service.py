@@ -0,0 +1,170 @@
+"""
+Servicio de Exportación
+Genera los gastos de un usuario como CSV o NDJSON en bloques, sin cargarlos
+todos en memoria, y firma los enlaces de descarga del servidor web
+"""
+import csv
+import hashlib
+import hmac
+import io
+import json
+import tempfile
+import time
+
+from src.repository import GastoRepository, ejecutar_en_db
+from src.config import (
+    EXPORTAR_TAM_LOTE,
+    EXPORTAR_TAM_BLOQUE,
+    EXPORTAR_SECRETO,
+    EXPORTAR_TOKEN_TTL,
+    EXPORTAR_URL_BASE
+)
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+
+class ExportService:
+    """Servicio de exportación de gastos"""
+
+    # Formato -> tipo MIME
+    FORMATOS = {
+        'csv': 'text/csv',
+        'ndjson': 'application/x-ndjson',
+    }
+
+    COLUMNAS = ('id', 'fecha', 'descripcion', 'categoria', 'monto', 'timestamp')
+
+    @staticmethod
+    def _fila(gasto) -> dict:
+        """Fila exportable a partir de una fila de GastoDAO.iterar"""
+        return {
+            'id': gasto.id,
+            'fecha': gasto.fecha.isoformat() if gasto.fecha else None,
+            'descripcion': gasto.descripcion,
+            'categoria': gasto.categoria,
+            'monto': gasto.monto,
+            'timestamp': gasto.timestamp.isoformat() if gasto.timestamp else None,
+        }
+
+    @staticmethod
+    def generar(usuario_id: int, formato: str = 'csv', tam_lote: int = EXPORTAR_TAM_LOTE,
+                tam_bloque: int = EXPORTAR_TAM_BLOQUE):
+        """
+        Genera la exportación en bloques de bytes
+
+        Las filas se leen del cursor de a `tam_lote` y se acumulan hasta unos
+        `tam_bloque` bytes antes de entregarse: la memoria usada no depende
+        de cuántos gastos tenga el usuario.
+
+        Args:
+            usuario_id (int): Usuario a exportar
+            formato (str): 'csv' o 'ndjson'
+            tam_lote (int): Filas por lectura del cursor
+            tam_bloque (int): Bytes aproximados por bloque
+
+        Yields:
+            bytes: Bloques de la exportación (UTF-8)
+        """
+        if formato not in ExportService.FORMATOS:
+            raise ValueError(f"Formato no soportado: {formato}")
+
+        buffer = io.StringIO()
+        if formato == 'csv':
+            escritor = csv.DictWriter(buffer, fieldnames=ExportService.COLUMNAS)
+            escritor.writeheader()
+            escribir = escritor.writerow
+        else:
+            def escribir(fila):
+                buffer.write(json.dumps(fila, ensure_ascii=False))
+                buffer.write('\n')
+
+        for gasto in GastoRepository.iterar_gastos(usuario_id, tam_lote):
+            escribir(ExportService._fila(gasto))
+            if buffer.tell() >= tam_bloque:
+                yield buffer.getvalue().encode('utf-8')
+                buffer.seek(0)
+                buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue().encode('utf-8')
+
+    @staticmethod
+    def escribir_archivo(usuario_id: int, formato: str = 'csv'):
+        """
+        Escribe la exportación en un archivo temporal en disco
+
+        Returns:
+            tuple: (archivo posicionado al inicio, tamaño en bytes)
+        """
+        archivo = tempfile.TemporaryFile()
+        try:
+            for bloque in ExportService.generar(usuario_id, formato):
+                archivo.write(bloque)
+            tamano = archivo.tell()
+            archivo.seek(0)
+        except Exception:
+            archivo.close()
+            raise
+        logger.info(f"📤 Exportación {formato} del usuario {usuario_id}: {tamano} bytes")
+        return archivo, tamano
+
+    @staticmethod
+    async def exportar_archivo(usuario_id: int, formato: str = 'csv'):
+        """Versión asíncrona de escribir_archivo (en el pool de hilos de BD)"""
+        return await ejecutar_en_db(ExportService.escribir_archivo, usuario_id, formato)
+
+    # ================================================================
+    # ENLACES FIRMADOS
+    # ================================================================
+    @staticmethod
+    def _firma(mensaje: str, secreto: str) -> str:
+        return hmac.new(secreto.encode(), mensaje.encode(), hashlib.sha256).hexdigest()
+
+    @staticmethod
+    def crear_token(usuario_id: int, ttl: int = EXPORTAR_TOKEN_TTL,
+                    secreto: str = EXPORTAR_SECRETO):
+        """
+        Crea un token de descarga firmado para un usuario
+
+        Returns:
+            str | None: Token, o None si no hay secreto configurado
+        """
+        if not secreto:
+            return None
+        mensaje = f"{usuario_id}.{int(time.time()) + ttl}"
+        return f"{mensaje}.{ExportService._firma(mensaje, secreto)}"
+
+    @staticmethod
+    def verificar_token(token: str, secreto: str = EXPORTAR_SECRETO):
+        """
+        Verifica un token de descarga
+
+        Returns:
+            int | None: ID del usuario si el token es válido y no expiró
+        """
+        if not secreto or not token:
+            return None
+        try:
+            usuario_id, expira, firma = token.split('.')
+            mensaje = f"{int(usuario_id)}.{int(expira)}"
+        except ValueError:
+            return None
+        if not hmac.compare_digest(firma, ExportService._firma(mensaje, secreto)):
+            return None
+        if int(expira) < time.time():
+            return None
+        return int(usuario_id)
+
+    @staticmethod
+    def url_descarga(usuario_id: int, formato: str = 'csv'):
+        """
+        URL del servidor web para descargar la exportación
+
+        Returns:
+            str | None: URL firmada, o None si no hay secreto configurado
+        """
+        token = ExportService.crear_token(usuario_id)
+        if token is None:
+            return None
+        return f"{EXPORTAR_URL_BASE}/exportar?formato={formato}&token={token}"
@@ -2,10 +2,15 @@
 Servicio de Gastos
 Lógica de aplicación para operaciones de gastos
 """
-from src.repository import GastoRepository
-from src.config import SIMBOLO_MONEDA, ExceptionHandler
+from src.models import unidad_de_trabajo
+from src.repository import GastoRepository, AsyncGastoRepository, ejecutar_en_db
+from src.config import SIMBOLO_MONEDA, EMBEDS_CACHE_MAX, ExceptionHandler
 from src.services.template_service import template_service
+from src.cache_lru import CacheLRU
+from src.metrics import metricas
+from src.versiones_datos import versiones_datos
 from src.utils import get_logger
+from datetime import datetime, timezone
 import discord
 
 logger = get_logger(__name__)
@@ -14,6 +19,17 @@ logger = get_logger(__name__)
 class GastoService:
     """Servicio con lógica de aplicación para gastos"""
 
+    # Gastos que se muestran en !gastos
+    LIMITE_LISTADO = 10
+
+    # Embeds de resumen ya construidos, con clave (vista, usuario, ventana, día, versión).
+    # Las escrituras incrementan la versión del usuario: las entradas viejas dejan
+    # de ser alcanzables y el LRU las expulsa.
+    cache_embeds = CacheLRU(max_entradas=EMBEDS_CACHE_MAX)
+
+    # Cada cuántas consultas se registra el ratio de aciertos
+    REPORTE_CACHE_CADA = 100
+
     @staticmethod
     def crear_gasto_desde_factura(usuario_id, descripcion, monto, categoria, imagen_url=None, datos_ocr=None):
         """Crea un gasto desde una factura procesada"""
@@ -46,15 +62,13 @@ class GastoService:
     def obtener_resumen_gastos(usuario_id, dias=30):
         """Obtiene resumen de gastos para mostrar"""
         try:
-            gastos = GastoRepository.obtener_gastos_usuario(usuario_id, dias)
-            total = GastoRepository.obtener_total_gastos(usuario_id, dias)
-
-            return {
-                'gastos': gastos,
-                'total': total,
-                'cantidad': len(gastos),
-                'promedio': total / len(gastos) if gastos else 0
-            }
+            with unidad_de_trabajo():
+                resumen = GastoRepository.obtener_resumen(usuario_id, dias)
+                resumen['pagina'] = GastoRepository.obtener_pagina_gastos(
+                    usuario_id, dias, limite=GastoService.LIMITE_LISTADO
+                )
+                resumen['gastos'] = resumen['pagina']['gastos']
+            return resumen
         except Exception as e:
             ExceptionHandler.manejar_error(
                 excepcion=e,
@@ -77,46 +91,166 @@ class GastoService:
         return GastoRepository.obtener_estadisticas(usuario_id, dias)
 
     @staticmethod
-    def crear_embed_gastos(usuario_id, dias=30):
-        """Crea un embed de Discord con los gastos usando plantilla"""
-        resumen = GastoService.obtener_resumen_gastos(usuario_id, dias)
-        contenido = template_service.render_gastos_recientes(resumen['gastos'], dias)
+    def crear_embed_pagina(pagina, dias=30, cantidad=0, numero=1):
+        """
+        Crea el embed de una página de gastos
+
+        Args:
+            pagina (dict): Resultado de GastoRepository.obtener_pagina_gastos
+            dias (int): Ventana de días
+            cantidad (int): Gastos del período (para el total de páginas)
+            numero (int): Número de página (desde 1)
+        """
+        limite = GastoService.LIMITE_LISTADO
+        contenido = template_service.render_gastos_recientes(
+            pagina['gastos'],
+            dias,
+            cantidad=cantidad,
+            pagina=numero,
+            total_paginas=max(1, -(-cantidad // limite)),
+            inicio=(numero - 1) * limite
+        )
 
         embed = discord.Embed(
             title=f"📊 Tus Gastos (últimos {dias} días)",
             description=contenido,
-            color=discord.Color.blue()
+            color=discord.Color.blue(),
+            timestamp=datetime.now(timezone.utc)
         )
         return embed
 
     @staticmethod
-    def crear_embed_total(usuario_id, dias=30):
-        """Crea un embed con total de gastos usando plantilla"""
-        resumen = GastoService.obtener_resumen_gastos(usuario_id, dias)
-        contenido = template_service.render_resumen_total(
-            resumen['total'],
-            resumen['cantidad'],
-            resumen['promedio'],
-            dias
-        )
+    async def crear_vista_gastos(usuario_id, dias=30):
+        """
+        Crea el embed de la primera página de gastos
 
-        embed = discord.Embed(
-            title="💰 Resumen de Gastos",
-            description=contenido,
-            color=discord.Color.gold()
-        )
+        Returns:
+            tuple: (embed, resumen) — el resumen incluye la página para paginar
+        """
+        clave = GastoService._clave_resultado('gastos_recientes', usuario_id, dias)
+        guardado = GastoService._embed_guardado(clave)
+        if guardado is None:
+            # Resumen y primera página en un solo viaje al hilo de BD
+            resumen = await ejecutar_en_db(GastoService.obtener_resumen_gastos, usuario_id, dias)
+            embed = GastoService.crear_embed_pagina(resumen['pagina'], dias, resumen['cantidad'])
+            GastoService.cache_embeds.guardar(clave, (embed, resumen))
+        else:
+            embed, resumen = guardado
+
+        # El paginador modifica su página: cada respuesta recibe sus propias copias
+        resumen = dict(resumen, pagina=dict(resumen['pagina']))
+        return GastoService._copia_para_enviar(embed), resumen
+
+    @staticmethod
+    async def crear_embed_gastos(usuario_id, dias=30):
+        """Crea un embed de Discord con los gastos usando plantilla"""
+        embed, _ = await GastoService.crear_vista_gastos(usuario_id, dias)
         return embed
 
     @staticmethod
-    def crear_embed_categorias(usuario_id, dias=30):
-        """Crea un embed con gastos por categoría usando plantilla"""
-        categorias = GastoService.obtener_resumen_por_categoria(usuario_id, dias)
-        contenido = template_service.render_gastos_categorias(categorias, dias)
+    def _clave_resultado(vista, usuario_id, dias):
+        """
+        Clave de la caché de embeds
 
-        embed = discord.Embed(
-            title=f"📊 Gastos por Categoría (últimos {dias} días)",
-            description=contenido,
-            color=discord.Color.purple()
+        La versión de datos se lee antes de consultar la BD (ver
+        VersionesDatos.obtener); el día UTC entra en la clave porque la
+        ventana se desplaza aunque no haya escrituras.
+        """
+        return (vista, usuario_id, dias, datetime.utcnow().date(), versiones_datos.obtener(usuario_id))
+
+    @staticmethod
+    def _copia_para_enviar(embed):
+        """
+        Copia de un embed de la caché con la hora actual
+
+        La hora de "última actualización" no va en la plantilla (quedaría
+        congelada en la caché): es el timestamp del embed, que Discord muestra
+        en el pie con la hora local de cada usuario.
+        """
+        copia = embed.copy()
+        copia.timestamp = datetime.now(timezone.utc)
+        return copia
+
+    @staticmethod
+    def _embed_guardado(clave):
+        """Busca un embed en la caché y reporta el ratio de aciertos cada tanto"""
+        valor = GastoService.cache_embeds.obtener(clave)
+        cache = GastoService.cache_embeds
+        if (cache.aciertos + cache.fallos) % GastoService.REPORTE_CACHE_CADA == 0:
+            GastoService.reportar_cache()
+        return valor
+
+    @staticmethod
+    def estadisticas_cache():
+        """Estadísticas de la caché de embeds (entradas, aciertos, fallos, ratio)"""
+        return GastoService.cache_embeds.estadisticas()
+
+    @staticmethod
+    def reportar_cache():
+        """Registra en el log el uso de la caché de embeds"""
+        datos = GastoService.estadisticas_cache()
+        logger.info(
+            f"📈 Caché de embeds: {datos['ratio_aciertos']:.1%} aciertos "
+            f"({datos['aciertos']}/{datos['aciertos'] + datos['fallos']}), "
+            f"{datos['entradas']}/{datos['max_entradas']} entradas, "
+            f"{datos['expulsiones']} expulsiones"
         )
-        return embed
 
+    @staticmethod
+    async def crear_embed_total(usuario_id, dias=30):
+        """Crea un embed con total de gastos usando plantilla"""
+        clave = GastoService._clave_resultado('resumen_total', usuario_id, dias)
+        embed = GastoService._embed_guardado(clave)
+        if embed is None:
+            resumen = await AsyncGastoRepository.obtener_resumen(usuario_id, dias)
+            contenido = template_service.render_resumen_total(
+                resumen['total'],
+                resumen['cantidad'],
+                resumen['promedio'],
+                dias
+            )
+            embed = discord.Embed(
+                title="💰 Resumen de Gastos",
+                description=contenido,
+                color=discord.Color.gold()
+            )
+            GastoService.cache_embeds.guardar(clave, embed)
+        return GastoService._copia_para_enviar(embed)
+
+    @staticmethod
+    async def crear_embed_categorias(usuario_id, dias=30):
+        """Crea un embed con gastos por categoría usando plantilla"""
+        clave = GastoService._clave_resultado('gastos_categorias', usuario_id, dias)
+        embed = GastoService._embed_guardado(clave)
+        if embed is None:
+            categorias = await AsyncGastoRepository.obtener_gastos_por_categoria(usuario_id, dias)
+            contenido = template_service.render_gastos_categorias(categorias, dias)
+            embed = discord.Embed(
+                title=f"📊 Gastos por Categoría (últimos {dias} días)",
+                description=contenido,
+                color=discord.Color.purple()
+            )
+            GastoService.cache_embeds.guardar(clave, embed)
+        return GastoService._copia_para_enviar(embed)
+
+
+metricas.medidor(
+    'bot_embeds_cache_consultas_total',
+    'Consultas a la caché de embeds por resultado',
+    lambda: {
+        ('acierto',): GastoService.cache_embeds.aciertos,
+        ('fallo',): GastoService.cache_embeds.fallos,
+    },
+    etiquetas=('resultado',),
+    tipo='counter'
+)
+metricas.medidor(
+    'bot_embeds_cache_ratio_aciertos',
+    'Proporción de aciertos de la caché de embeds',
+    lambda: GastoService.cache_embeds.ratio_aciertos
+)
+metricas.medidor(
+    'bot_embeds_cache_entradas',
+    'Embeds guardados en la caché',
+    lambda: len(GastoService.cache_embeds)
+)
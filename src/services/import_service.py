@@ -0,0 +1,357 @@
+"""
+Servicio de Importación
+Importa gastos desde un CSV (exportaciones propias o extractos bancarios)
+leyéndolo fila a fila e insertándolo en lotes, sin pasar por el OCR
+"""
+import csv
+import io
+import re
+import time
+import unicodedata
+from datetime import datetime
+
+import discord
+
+from src.repository import AsyncGastoRepository, ejecutar_en_db
+from src.config import IMPORTAR_TAM_LOTE, SIMBOLO_MONEDA, ocr_config
+from src.utils import get_logger
+
+logger = get_logger(__name__)
+
+PATRON_NO_NUMERICO = re.compile(r'[^\d,.\-]')
+
+
+def _normalizar(texto: str) -> str:
+    """Minúsculas y sin acentos (para comparar cabeceras)"""
+    texto = unicodedata.normalize('NFKD', texto.strip().lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def parsear_monto(texto: str):
+    """
+    Convierte un importe de CSV a float conservando el signo
+
+    Acepta símbolos de moneda, signo o paréntesis (negativo contable) y
+    separadores de miles con punto o coma: "S/. 1.234,50", "-12.30", "(8,00)".
+    Qué signo es un gasto depende del archivo (ver ImportService.leer_lotes).
+
+    Returns:
+        float | None: Importe con signo, o None si no es un número
+    """
+    texto = (texto or '').strip()
+    negativo = '-' in texto or (texto.startswith('(') and texto.endswith(')'))
+    limpio = PATRON_NO_NUMERICO.sub('', texto).replace('-', '')
+    if not limpio.strip('.,'):
+        return None
+
+    if ',' in limpio and '.' in limpio:
+        # El último separador es el decimal
+        if limpio.rfind(',') > limpio.rfind('.'):
+            limpio = limpio.replace('.', '').replace(',', '.')
+        else:
+            limpio = limpio.replace(',', '')
+    elif ',' in limpio:
+        if re.search(r',\d{1,2}$', limpio) and limpio.count(',') == 1:
+            limpio = limpio.replace(',', '.')
+        else:
+            limpio = limpio.replace(',', '')
+    elif limpio.count('.') > 1:
+        limpio = limpio.replace('.', '')
+
+    try:
+        valor = float(limpio)
+    except ValueError:
+        return None
+    return -valor if negativo else valor
+
+
+def parsear_fecha(texto: str):
+    """
+    Convierte una fecha de CSV a date
+
+    Returns:
+        date | None: Fecha, o None si no tiene un formato conocido
+    """
+    texto = (texto or '').strip()[:10]
+    for formato in ImportService.FORMATOS_FECHA:
+        try:
+            return datetime.strptime(texto, formato).date()
+        except ValueError:
+            continue
+    return None
+
+
+class ImportService:
+    """Servicio de importación de gastos desde CSV"""
+
+    # Nombres de columna aceptados (normalizados: minúsculas y sin acentos).
+    # 'monto' es un importe con signo; 'cargo' y 'abono' son las columnas
+    # separadas de débitos y créditos de algunos extractos.
+    COLUMNAS = {
+        'fecha': ('fecha', 'date', 'fecha operacion', 'fecha de operacion', 'f. operacion', 'dia'),
+        'descripcion': ('descripcion', 'description', 'concepto', 'detalle', 'glosa', 'comercio'),
+        'monto': ('monto', 'importe', 'amount', 'cargo/abono', 'total'),
+        'cargo': ('cargo', 'cargos', 'debito', 'debe', 'retiro', 'retiros'),
+        'abono': ('abono', 'abonos', 'credito', 'haber', 'deposito', 'depositos'),
+        'categoria': ('categoria', 'category', 'rubro'),
+    }
+
+    FORMATOS_FECHA = ('%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y', '%d/%m/%y', '%Y/%m/%d')
+
+    # Errores de ejemplo que se guardan para mostrar al usuario
+    MAX_ERRORES = 5
+
+    # Segundos mínimos entre ediciones del embed de progreso
+    INTERVALO_PROGRESO = 1.5
+
+    @staticmethod
+    def _mapear_columnas(cabecera: list) -> dict:
+        """
+        Índice de cada campo conocido en la cabecera
+
+        Raises:
+            ValueError: Si faltan las columnas de descripción o monto
+        """
+        normalizada = [_normalizar(columna) for columna in cabecera]
+        indices = {}
+        for campo, alias in ImportService.COLUMNAS.items():
+            for posicion, nombre in enumerate(normalizada):
+                if nombre in alias:
+                    indices[campo] = posicion
+                    break
+        if 'cargo' in indices:
+            # Columna de débitos: es la que tiene los gastos
+            indices.pop('monto', None)
+        faltantes = [
+            campo for campo in ('descripcion', 'monto')
+            if campo not in indices and not (campo == 'monto' and 'cargo' in indices)
+        ]
+        if faltantes:
+            raise ValueError(f"El CSV no tiene columna de {' ni de '.join(faltantes)}")
+        return indices
+
+    @staticmethod
+    def _tiene_negativos(lector, posicion: int) -> bool:
+        """Indica si alguna fila tiene un importe negativo en la columna `posicion`"""
+        for fila in lector:
+            if posicion < len(fila):
+                monto = parsear_monto(fila[posicion])
+                if monto is not None and monto < 0:
+                    return True
+        return False
+
+    @staticmethod
+    def _abrir_csv(archivo):
+        """Lector CSV sobre un archivo binario, detectando el separador"""
+        texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', errors='replace', newline='')
+        muestra = texto.read(4096)
+        texto.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=',;\t|')
+        except csv.Error:
+            dialecto = csv.excel
+        return texto, csv.reader(texto, dialecto)
+
+    @staticmethod
+    def _fila_a_gasto(fila: list, indices: dict, negativos_son_gastos: bool = False):
+        """
+        Convierte una fila del CSV en un gasto para GastoDAO.crear_lote
+
+        Args:
+            fila (list): Celdas de la fila
+            indices (dict): Posición de cada campo (ver _mapear_columnas)
+            negativos_son_gastos (bool): Convención de extracto en la columna
+                con signo: negativos son cargos y positivos abonos
+
+        Returns:
+            dict | None: Gasto, o None si la fila es un abono (ingreso)
+
+        Raises:
+            ValueError: Si el monto o la fecha no son válidos
+        """
+        def valor(campo):
+            posicion = indices.get(campo)
+            if posicion is None or posicion >= len(fila):
+                return ''
+            return fila[posicion].strip()
+
+        if 'cargo' in indices:
+            # Débitos y créditos en columnas separadas: sin cargo es un abono
+            if not valor('cargo') and valor('abono'):
+                return None
+            monto = parsear_monto(valor('cargo'))
+            if monto is not None:
+                monto = abs(monto)
+            texto_monto = valor('cargo')
+        else:
+            monto = parsear_monto(valor('monto'))
+            texto_monto = valor('monto')
+            if monto is not None and monto != 0:
+                es_gasto = monto < 0 if negativos_son_gastos else monto > 0
+                if not es_gasto:
+                    return None
+                monto = abs(monto)
+        if not monto:
+            raise ValueError(f"monto inválido: {texto_monto!r}")
+
+        descripcion = valor('descripcion') or 'Gasto importado'
+        gasto = {
+            'descripcion': descripcion[:200],
+            'monto': monto,
+            'categoria': valor('categoria') or ocr_config.detectar_categoria(descripcion),
+        }
+
+        if 'fecha' in indices:
+            fecha = parsear_fecha(valor('fecha'))
+            if fecha is None:
+                raise ValueError(f"fecha inválida: {valor('fecha')!r}")
+            # El timestamp define el día del gasto en listados y agregados
+            gasto['fecha'] = fecha
+            gasto['timestamp'] = datetime.combine(fecha, datetime.min.time())
+        return gasto
+
+    @staticmethod
+    def leer_lotes(archivo, resultado: dict, tam_lote: int = IMPORTAR_TAM_LOTE):
+        """
+        Lee el CSV fila a fila y entrega los gastos en lotes
+
+        Las filas inválidas se cuentan en resultado['omitidos'] y las primeras
+        se describen en resultado['errores']. Los abonos (ingresos) no se
+        importan y se cuentan en resultado['abonos']:
+
+        - Con columnas separadas de cargo y abono, las filas sin cargo.
+        - Con una columna con signo, si el archivo tiene algún importe
+          negativo se trata como extracto (negativos = cargos, positivos =
+          abonos); si no, todos los importes son gastos (p. ej. !exportar).
+          Para saberlo se lee la columna una vez antes de importar.
+
+        Args:
+            archivo: Archivo binario posicionado al inicio
+            resultado (dict): Progreso (ver nuevo_resultado), se actualiza en el lugar
+            tam_lote (int): Gastos por lote
+
+        Yields:
+            list: Gastos listos para GastoDAO.crear_lote
+        """
+        texto, lector = ImportService._abrir_csv(archivo)
+        try:
+            cabecera = next(lector, None)
+            if cabecera is None:
+                raise ValueError("El CSV está vacío")
+            indices = ImportService._mapear_columnas(cabecera)
+
+            negativos_son_gastos = False
+            if 'monto' in indices:
+                negativos_son_gastos = ImportService._tiene_negativos(lector, indices['monto'])
+                texto.seek(0)
+                lector = csv.reader(texto, lector.dialect)
+                next(lector, None)
+
+            lote = []
+            for numero, fila in enumerate(lector, start=2):
+                if not any(celda.strip() for celda in fila):
+                    continue
+                resultado['leidas'] += 1
+                try:
+                    gasto = ImportService._fila_a_gasto(fila, indices, negativos_son_gastos)
+                except ValueError as e:
+                    resultado['omitidos'] += 1
+                    if len(resultado['errores']) < ImportService.MAX_ERRORES:
+                        resultado['errores'].append(f"Línea {numero}: {e}")
+                    continue
+                if gasto is None:
+                    resultado['abonos'] += 1
+                    continue
+                lote.append(gasto)
+                if len(lote) >= tam_lote:
+                    yield lote
+                    lote = []
+            if lote:
+                yield lote
+        finally:
+            # No cerrar el archivo del llamador junto con el envoltorio de texto
+            texto.detach()
+
+    @staticmethod
+    def nuevo_resultado() -> dict:
+        """Contadores de una importación"""
+        return {'leidas': 0, 'importados': 0, 'omitidos': 0, 'abonos': 0, 'total': 0.0, 'errores': []}
+
+    @staticmethod
+    async def importar(usuario_id: int, archivo, progreso=None,
+                       tam_lote: int = IMPORTAR_TAM_LOTE) -> dict:
+        """
+        Importa un CSV insertando cada lote en su propia transacción
+
+        La lectura y cada inserción corren en el pool de hilos de BD; si la
+        importación falla a mitad, los lotes anteriores quedan guardados.
+
+        Args:
+            usuario_id (int): Usuario dueño de los gastos
+            archivo: Archivo binario con el CSV, posicionado al inicio
+            progreso: Corrutina opcional que recibe el resultado tras cada lote
+            tam_lote (int): Filas por transacción
+
+        Returns:
+            dict: leidas, importados, omitidos, abonos, total y errores
+        """
+        resultado = ImportService.nuevo_resultado()
+        lotes = ImportService.leer_lotes(archivo, resultado, tam_lote)
+        try:
+            while True:
+                lote = await ejecutar_en_db(next, lotes, None)
+                if lote is None:
+                    break
+                await AsyncGastoRepository.crear_lote(usuario_id, lote)
+                resultado['importados'] += len(lote)
+                resultado['total'] += sum(gasto['monto'] for gasto in lote)
+                if progreso is not None:
+                    await progreso(resultado)
+        finally:
+            await ejecutar_en_db(lotes.close)
+
+        logger.info(
+            f"📥 Importación del usuario {usuario_id}: {resultado['importados']} gastos, "
+            f"{resultado['omitidos']} filas omitidas"
+        )
+        return resultado
+
+    @staticmethod
+    def crear_embed(resultado: dict, nombre: str, terminado: bool = False) -> discord.Embed:
+        """Embed de progreso (o final) de una importación"""
+        if not terminado:
+            titulo, color = f"⏳ Importando `{nombre}`...", discord.Color.blue()
+        elif resultado['omitidos']:
+            titulo, color = f"⚠️ Importación de `{nombre}` con filas omitidas", discord.Color.orange()
+        else:
+            titulo, color = f"📥 Importación de `{nombre}` completada", discord.Color.green()
+
+        embed = discord.Embed(title=titulo, color=color)
+        embed.add_field(name="✅ Importados", value=str(resultado['importados']), inline=True)
+        embed.add_field(name="⏭️ Omitidos", value=str(resultado['omitidos']), inline=True)
+        if resultado['abonos']:
+            embed.add_field(name="↩️ Abonos (no son gastos)", value=str(resultado['abonos']), inline=True)
+        embed.add_field(
+            name="💰 Total", value=f"{SIMBOLO_MONEDA} {resultado['total']:.2f}", inline=True
+        )
+        if resultado['errores']:
+            embed.add_field(name="❌ Errores", value='\n'.join(resultado['errores'])[:1000], inline=False)
+        return embed
+
+    @staticmethod
+    def limitador_progreso(funcion, intervalo: float = None):
+        """
+        Envuelve una corrutina de progreso para llamarla como mucho cada `intervalo` segundos
+
+        Editar el embed en cada lote agotaría el límite de ediciones de Discord.
+        """
+        intervalo = ImportService.INTERVALO_PROGRESO if intervalo is None else intervalo
+        ultimo = [0.0]
+
+        async def limitada(resultado):
+            ahora = time.monotonic()
+            if ahora - ultimo[0] >= intervalo:
+                ultimo[0] = ahora
+                await funcion(resultado)
+
+        return limitada
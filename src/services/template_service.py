@@ -2,28 +2,62 @@
 Servicio de Plantillas Jinja2
 Renderiza mensajes de Discord usando plantillas
 """
-from jinja2 import Environment, FileSystemLoader, select_autoescape
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, select_autoescape
 from pathlib import Path
 from datetime import datetime
-from src.config import SIMBOLO_MONEDA
+from src.config import SIMBOLO_MONEDA, PLANTILLAS_CACHE_DIR
+from src.metrics import duracion_plantillas, medir
+from src.utils import get_logger
+
+logger = get_logger(__name__)
 
 
 class TemplateService:
     """Servicio para renderizar plantillas Jinja2"""
 
-    def __init__(self):
-        """Inicializa el entorno Jinja2"""
+    def __init__(self, cache_dir=PLANTILLAS_CACHE_DIR):
+        """
+        Inicializa el entorno Jinja2
+
+        Args:
+            cache_dir (Path): Carpeta del bytecode compilado (None = sin caché en disco)
+        """
         templates_dir = Path(__file__).parent.parent / 'templates'
         self.env = Environment(
             loader=FileSystemLoader(str(templates_dir)),
             autoescape=select_autoescape(['html', 'xml']),
             trim_blocks=True,
-            lstrip_blocks=True
+            lstrip_blocks=True,
+            bytecode_cache=self._crear_bytecode_cache(cache_dir),
+            # Las plantillas no cambian en ejecución: sin stat() en cada uso
+            auto_reload=False
         )
 
         # Agregar filtros personalizados
         self._add_custom_filters()
 
+        # Plantillas compiladas una sola vez
+        self._plantillas = {}
+
+    @staticmethod
+    def _crear_bytecode_cache(cache_dir):
+        """Caché de bytecode en disco, si la carpeta se puede usar"""
+        if cache_dir is None:
+            return None
+        try:
+            Path(cache_dir).mkdir(parents=True, exist_ok=True)
+            return FileSystemBytecodeCache(str(cache_dir))
+        except OSError as e:
+            logger.warning(f"⚠️ Sin caché de bytecode de plantillas ({cache_dir}): {e}")
+            return None
+
+    def plantilla(self, nombre):
+        """Obtiene una plantilla compilada (se compila la primera vez)"""
+        template = self._plantillas.get(nombre)
+        if template is None:
+            template = self._plantillas[nombre] = self.env.get_template(nombre)
+        return template
+
     def _add_custom_filters(self):
         """Agrega filtros personalizados a Jinja2"""
 
@@ -55,18 +89,32 @@ class TemplateService:
         self.env.filters['strftime'] = strftime_filter
         self.env.filters['money'] = format_money
 
-    def render_gastos_recientes(self, gastos, dias=30):
-        """Renderiza plantilla de gastos recientes"""
-        template = self.env.get_template('gastos_recientes.md')
+    @medir(duracion_plantillas, plantilla='gastos_recientes')
+    def render_gastos_recientes(self, gastos, dias=30, cantidad=None,
+                                pagina=None, total_paginas=None, inicio=0):
+        """
+        Renderiza plantilla de gastos recientes
+
+        `gastos` puede ser solo una página; `cantidad` es el total de gastos
+        del período (por defecto, len(gastos)). Con `pagina` y `total_paginas`
+        se muestra la posición en vez de "y N gasto(s) más", y la numeración
+        empieza en `inicio` + 1.
+        """
+        template = self.plantilla('gastos_recientes.md')
         return template.render(
             gastos=gastos,
+            cantidad=len(gastos) if cantidad is None else cantidad,
+            pagina=pagina,
+            total_paginas=total_paginas,
+            inicio=inicio,
             dias=dias,
             simbolo_moneda=SIMBOLO_MONEDA
         )
 
+    @medir(duracion_plantillas, plantilla='resumen_total')
     def render_resumen_total(self, total, cantidad, promedio, dias=30):
         """Renderiza plantilla de resumen total"""
-        template = self.env.get_template('resumen_total.md')
+        template = self.plantilla('resumen_total.md')
         return template.render(
             total=total,
             cantidad=cantidad,
@@ -75,12 +123,29 @@ class TemplateService:
             simbolo_moneda=SIMBOLO_MONEDA
         )
 
+    @medir(duracion_plantillas, plantilla='gastos_categorias')
     def render_gastos_categorias(self, categorias, dias=30):
-        """Renderiza plantilla de gastos por categoría"""
-        template = self.env.get_template('gastos_categorias.md')
-        total_general = sum(cat[1] for cat in categorias)
+        """
+        Renderiza plantilla de gastos por categoría
+
+        Args:
+            categorias (list): Filas (categoria, total, cantidad)
+        """
+        template = self.plantilla('gastos_categorias.md')
+        total_general = sum(total for _, total, _ in categorias)
+        # Promedios y porcentajes calculados una vez, no en cada bucle de la plantilla
+        filas = [
+            {
+                'nombre': categoria,
+                'total': total,
+                'cantidad': cantidad,
+                'promedio': total / cantidad if cantidad else 0.0,
+                'porcentaje': total / total_general * 100 if total_general else 0.0,
+            }
+            for categoria, total, cantidad in categorias
+        ]
         return template.render(
-            categorias=categorias,
+            categorias=filas,
             dias=dias,
             total_general=total_general,
             simbolo_moneda=SIMBOLO_MONEDA
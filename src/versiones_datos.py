@@ -0,0 +1,39 @@
+"""
+Versiones de datos por usuario
+Contador que GastoRepository incrementa en cada escritura; las cachés de
+resultados lo incluyen en su clave para invalidarse sin recorrerlas
+"""
+import threading
+
+
+class VersionesDatos:
+    """Contadores de versión por usuario, thread-safe"""
+
+    def __init__(self):
+        self._versiones = {}
+        self._global = 0
+        self._lock = threading.Lock()
+
+    def obtener(self, usuario_id) -> tuple:
+        """
+        Versión actual de los datos de un usuario
+
+        Leerla antes de consultar la BD: si una escritura ocurre en medio,
+        el resultado queda guardado con la versión vieja y nunca se vuelve a usar.
+        """
+        with self._lock:
+            return self._global, self._versiones.get(usuario_id, 0)
+
+    def incrementar(self, usuario_id) -> None:
+        """Marca que los datos del usuario cambiaron"""
+        with self._lock:
+            self._versiones[usuario_id] = self._versiones.get(usuario_id, 0) + 1
+
+    def invalidar_todo(self) -> None:
+        """Marca que cambiaron los datos de todos los usuarios (p. ej. reconstrucciones)"""
+        with self._lock:
+            self._global += 1
+
+
+# Instancia global
+versiones_datos = VersionesDatos()
@@ -1,11 +1,13 @@
 """
 Servidor web Flask para OAuth2 de Discord
-Maneja el callback de autorización del bot
+Maneja el callback de autorización del bot, la descarga de exportaciones y /metrics
 """
-from flask import Flask, request, render_template
+from flask import Flask, Response, request, render_template, stream_with_context
 from pathlib import Path
 from src.oauth_handler import get_oauth_url
-from src.config import ExceptionHandler
+from src.services import ExportService
+from src.metrics import metricas
+from src.config import ExceptionHandler, METRICAS_HABILITADAS
 from src.utils import get_logger
 import os
 from dotenv import load_dotenv
@@ -22,9 +24,7 @@ app = Flask(__name__, template_folder=str(TEMPLATE_DIR))
 @app.errorhandler(Exception)
 def manejar_error_global(error):
     """Maneja todos los errores en Flask"""
-    logger.error(f"Error HTTP no manejado: {error}", exc_info=True)
-
-    # Usar ExceptionHandler para crear respuesta
+    # Un solo registro: log (con traceback) y Markdown comparten el formateo
     resultado = ExceptionHandler.manejar_error(
         excepcion=error,
         contexto="Error en servidor web",
@@ -36,17 +36,7 @@ def manejar_error_global(error):
     )
 
     # Retornar plantilla Markdown de error
-    markdown_error = ExceptionHandler.crear_plantilla_error_markdown(
-        excepcion=error,
-        contexto="Error en servidor web",
-        datos_adicionales={
-            'URL': request.url,
-            'Método': request.method,
-            'IP': request.remote_addr,
-        }
-    )
-
-    return f"<pre>{markdown_error}</pre>", 500
+    return f"<pre>{resultado.markdown}</pre>", 500
 
 @app.route('/')
 def index():
@@ -91,6 +81,32 @@ def callback():
         )
         return f"<pre>{markdown_error}</pre>", 500
 
+@app.route('/exportar')
+def exportar():
+    """Descarga en streaming de los gastos de un usuario (enlace firmado de !exportar)"""
+    usuario_id = ExportService.verificar_token(request.args.get('token'))
+    if usuario_id is None:
+        logger.warning("⚠️ Token de exportación inválido o expirado")
+        return "Enlace inválido o expirado", 403
+
+    formato = request.args.get('formato', 'csv').lower()
+    if formato not in ExportService.FORMATOS:
+        return f"Formato no soportado: {formato}", 400
+
+    logger.info(f"📤 Exportación web {formato} del usuario {usuario_id}")
+    return Response(
+        stream_with_context(ExportService.generar(usuario_id, formato)),
+        mimetype=ExportService.FORMATOS[formato],
+        headers={'Content-Disposition': f'attachment; filename=gastos.{formato}'}
+    )
+
+@app.route('/metrics')
+def metrics():
+    """Métricas del bot en formato de texto de Prometheus"""
+    if not METRICAS_HABILITADAS:
+        return "Métricas deshabilitadas", 404
+    return Response(metricas.exponer(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
 def run_server(host='localhost', port=8080):
     """
     Inicia el servidor Flask
@@ -10,6 +10,32 @@ import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 
+@pytest.fixture
+def sesiones(monkeypatch):
+    """
+    Fábrica de sesiones sobre una BD en memoria, con SessionLocal apuntando a ella
+
+    StaticPool comparte una única conexión entre sesiones (y entre hilos), así
+    que los repositories y los tests ven los mismos datos. Los fixtures que
+    siembran datos se construyen encima de este.
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from src.models import Base, base
+
+    engine = create_engine(
+        'sqlite:///:memory:',
+        connect_args={'check_same_thread': False},
+        poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    fabrica = sessionmaker(bind=engine)
+    monkeypatch.setattr(base, 'SessionLocal', fabrica)
+    yield fabrica
+    engine.dispose()
+
+
 @pytest.fixture(scope="session")
 def test_config():
     """Configuración para todos los tests"""
@@ -0,0 +1,67 @@
+"""
+Tests para el acceso asíncrono a la base de datos
+"""
+import asyncio
+import threading
+import time
+import pytest
+
+from src.repository import AsyncGastoRepository, ejecutar_en_db
+
+
+@pytest.fixture
+def repositorio(sesiones):
+    """AsyncGastoRepository sobre una base de datos en memoria"""
+    return AsyncGastoRepository
+
+
+class TestEjecutarEnDB:
+    """Tests del pool de hilos de BD"""
+
+    async def test_ejecuta_en_hilo_de_bd(self):
+        """Test: La función no corre en el hilo del event loop"""
+        nombre = await ejecutar_en_db(lambda: threading.current_thread().name)
+        assert nombre.startswith('db')
+        assert nombre != threading.current_thread().name
+
+    async def test_no_bloquea_el_event_loop(self):
+        """Test: Una consulta lenta no congela otras corrutinas"""
+        latidos = []
+
+        async def latir():
+            for _ in range(5):
+                latidos.append(time.perf_counter())
+                await asyncio.sleep(0.01)
+
+        inicio = time.perf_counter()
+        await asyncio.gather(ejecutar_en_db(time.sleep, 0.2), latir())
+
+        assert len(latidos) == 5
+        assert latidos[-1] - inicio < 0.15
+
+    async def test_propaga_excepciones(self):
+        """Test: Los errores de la función llegan al llamador"""
+        def fallar():
+            raise ValueError("fallo de BD")
+
+        with pytest.raises(ValueError):
+            await ejecutar_en_db(fallar)
+
+
+class TestAsyncGastoRepository:
+    """Tests de la API awaitable"""
+
+    async def test_crear_y_resumir(self, repositorio):
+        """Test: Misma funcionalidad que GastoRepository"""
+        gasto = await repositorio.crear_gasto(1, 'Taxi', 12.0, 'Transporte')
+        ids = await repositorio.crear_lote(1, [{'descripcion': 'Pan', 'monto': 3.0}])
+
+        assert gasto.id is not None
+        assert len(ids) == 1
+        assert (await repositorio.obtener_resumen(1))['total'] == 15.0
+        assert await repositorio.eliminar_gasto(gasto.id, 1)
+        assert await repositorio.obtener_total_gastos(1) == 3.0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,106 @@
+"""
+Tests para el benchmark del OCR de facturas
+"""
+import json
+from pathlib import Path
+import pytest
+
+from benchmarks import benchmark_ocr
+from benchmarks.benchmark_ocr import (
+    cargar_corpus,
+    comparar,
+    comparar_campos,
+    ejecutar,
+    percentiles,
+)
+
+CORPUS = Path(__file__).parent.parent / 'benchmarks' / 'corpus'
+
+
+class TestMetricas:
+    """Tests de percentiles y comparación de campos"""
+
+    def test_percentiles(self):
+        """Test: Interpolación lineal entre posiciones"""
+        resultado = percentiles([float(i) for i in range(1, 101)])
+        assert resultado['p50'] == 50.5
+        assert resultado['p99'] == pytest.approx(99.01)
+        assert resultado['max'] == 100.0
+        assert resultado['n'] == 100
+
+    def test_percentiles_un_valor(self):
+        """Test: Con un solo valor todos los percentiles coinciden"""
+        assert percentiles([3.0])['p95'] == 3.0
+        assert percentiles([]) == {}
+
+    def test_comparar_campos(self):
+        """Test: Monto con tolerancia de céntimo y texto sin mayúsculas ni espacios extra"""
+        aciertos = comparar_campos(
+            {'monto_total': 10.5, 'vendedor': 'Tienda  Ejemplo', 'fecha': '01/01/2024'},
+            {'monto_total': 10.501, 'vendedor': 'TIENDA EJEMPLO', 'fecha': None}
+        )
+        assert aciertos == {'monto_total': True, 'vendedor': True, 'fecha': False}
+
+
+class TestEjecutar:
+    """Tests del benchmark sobre el corpus de ejemplo (sin Tesseract)"""
+
+    def test_corpus_de_ejemplo(self):
+        """Test: El corpus incluido tiene texto OCR y valores esperados"""
+        casos = cargar_corpus(CORPUS)
+        assert casos
+        assert all(caso['texto'] and caso['esperado'] for caso in casos)
+
+    def test_solo_extraccion(self):
+        """Test: Reporte con latencias de extracción y precisión por campo"""
+        reporte = ejecutar(CORPUS, repeticiones=3, solo_extraccion=True)
+
+        assert reporte['recibos'] == len(cargar_corpus(CORPUS))
+        assert set(reporte['etapas_ms']) == {'extraccion'}
+        assert reporte['etapas_ms']['extraccion']['n'] == reporte['recibos'] * 3
+        assert reporte['precision']['campos']['monto_total'] == 1.0
+        assert 'extremo_a_extremo' not in reporte
+        json.dumps(reporte)
+
+    def test_corpus_vacio(self, tmp_path):
+        """Test: Sin recibos utilizables"""
+        with pytest.raises(ValueError):
+            ejecutar(tmp_path, solo_extraccion=True)
+
+    def test_main_guarda_reporte(self, tmp_path):
+        """Test: --salida escribe el JSON y --comparar contra sí mismo no marca regresiones"""
+        salida = tmp_path / 'reporte.json'
+        assert benchmark_ocr.main([str(CORPUS), '--solo-extraccion', '--salida', str(salida)]) == 0
+        assert benchmark_ocr.main([
+            str(CORPUS), '--solo-extraccion', '--comparar', str(salida), '--tolerancia', '100'
+        ]) == 0
+        assert json.loads(salida.read_text(encoding='utf-8'))['recibos'] > 0
+
+
+class TestComparar:
+    """Tests de detección de regresiones"""
+
+    def test_regresiones(self):
+        """Test: Tiempo, rendimiento y precisión peores que la base"""
+        base = {
+            'etapas_ms': {'ocr': {'p95': 100.0}},
+            'extremo_a_extremo': {'recibos_por_segundo': 10.0},
+            'precision': {'campos': {'fecha': 0.9}},
+        }
+        actual = {
+            'etapas_ms': {'ocr': {'p95': 130.0}},
+            'extremo_a_extremo': {'recibos_por_segundo': 8.0},
+            'precision': {'campos': {'fecha': 0.8}},
+        }
+        regresiones = comparar(actual, base, tolerancia=0.1)
+        assert len(regresiones) == 3
+
+    def test_dentro_de_tolerancia(self):
+        """Test: Variaciones pequeñas no cuentan como regresión"""
+        base = {'etapas_ms': {'ocr': {'p95': 100.0}}, 'precision': {'campos': {'fecha': 0.9}}}
+        actual = {'etapas_ms': {'ocr': {'p95': 105.0}}, 'precision': {'campos': {'fecha': 0.95}}}
+        assert comparar(actual, base, tolerancia=0.1) == []
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
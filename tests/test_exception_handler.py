@@ -0,0 +1,150 @@
+"""
+Tests para el manejador centralizado de excepciones
+"""
+import importlib
+import logging
+from types import SimpleNamespace
+import pytest
+
+from src.config import ExceptionHandler
+from src.config.exception_handler import RegistroError
+from src.metrics import errores_manejados
+
+# src.config exporta la instancia `exception_handler`, que tapa el módulo
+modulo = importlib.import_module('src.config.exception_handler')
+
+
+def _lanzar(mensaje='fallo'):
+    try:
+        raise ValueError(mensaje)
+    except ValueError as e:
+        return e
+
+
+@pytest.fixture
+def errores(monkeypatch, caplog):
+    """Ventana de repetición limpia y captura de los logs de errores"""
+    monkeypatch.setattr(ExceptionHandler, '_recientes', modulo.CacheLRU(max_entradas=16))
+    caplog.set_level(logging.ERROR, logger=modulo.__name__)
+    return caplog
+
+
+class TestRegistroError:
+    """Tests del registro perezoso"""
+
+    def test_compatible_con_dict(self):
+        """Test: Se consulta como el dict que devolvía manejar_error"""
+        registro = RegistroError(_lanzar(), 'Prueba', {'Usuario': 'ana'})
+
+        assert set(registro) == {'info_error', 'embed', 'callback_discord'}
+        assert registro['callback_discord'] is None
+        assert registro['info_error']['tipo'] == 'ValueError'
+        assert registro['embed'].title.endswith('ERROR - Prueba')
+        with pytest.raises(KeyError):
+            registro['otra']
+
+    def test_perezoso(self, monkeypatch):
+        """Test: Sin consultar nada no se formatea el traceback ni se crea el embed"""
+        llamadas = []
+        monkeypatch.setattr(
+            modulo.traceback, 'format_exception',
+            lambda *args: llamadas.append(args) or ['x']
+        )
+        registro = RegistroError(_lanzar(), 'Prueba')
+        assert llamadas == []
+        assert 'embed' not in vars(registro)
+
+        registro['embed']
+        registro.markdown
+        assert len(llamadas) == 1
+
+    def test_traceback_fuera_del_except(self):
+        """Test: El traceback sale de la excepción, no del error que se esté manejando"""
+        registro = RegistroError(_lanzar('original'))
+        assert 'ValueError: original' in registro.traceback
+        assert 'in _lanzar' in registro.traceback
+
+    def test_markdown(self):
+        """Test: La plantilla incluye contexto, datos y traceback"""
+        markdown = RegistroError(_lanzar(), 'Web', {'URL': '/x'}).markdown
+        assert 'Web' in markdown
+        assert '/x' in markdown
+        assert 'ValueError: fallo' in markdown
+
+
+class TestManejarError:
+    """Tests de log, deduplicación y contador"""
+
+    def test_log_con_traceback(self, errores):
+        """Test: El primer error se escribe con su traceback"""
+        ExceptionHandler.manejar_error(_lanzar(), contexto='Procesando factura')
+
+        assert len(errores.records) == 1
+        record = errores.records[0]
+        assert 'Procesando factura' in record.getMessage()
+        assert record.exc_info[0] is ValueError
+        assert record.contexto == 'Procesando factura'
+
+    def test_repetidos_se_omiten(self, errores):
+        """Test: El mismo error en la ventana se cuenta pero no se escribe"""
+        antes = errores_manejados.valor(tipo='ValueError')
+        resultados = []
+        for _ in range(5):
+            try:
+                raise ValueError('tesseract no encontrado')
+            except ValueError as e:
+                resultados.append(ExceptionHandler.manejar_error(e, contexto='OCR'))
+
+        assert len(errores.records) == 1
+        assert errores_manejados.valor(tipo='ValueError') == antes + 5
+        # Cada llamada sigue teniendo su embed para responder al usuario
+        assert all(r['embed'] is not None for r in resultados)
+
+    def test_nueva_ventana_informa_omitidos(self, errores, monkeypatch):
+        """Test: Pasada la ventana se escribe de nuevo con las repeticiones omitidas"""
+        reloj = [1000.0]
+        monkeypatch.setattr(modulo, 'time', SimpleNamespace(monotonic=lambda: reloj[0]))
+
+        def fallar():
+            try:
+                raise ValueError('x')
+            except ValueError as e:
+                ExceptionHandler.manejar_error(e, contexto='OCR')
+
+        for _ in range(3):
+            fallar()
+        reloj[0] += modulo.ERRORES_VENTANA_SEGUNDOS + 1
+        fallar()
+
+        assert len(errores.records) == 2
+        assert errores.records[1].repeticiones_omitidas == 2
+        assert 'Repeticiones omitidas: 2' in errores.records[1].getMessage()
+
+    def test_distintos_no_se_agrupan(self, errores):
+        """Test: Otro contexto u otra línea se escriben por separado"""
+        ExceptionHandler.manejar_error(_lanzar(), contexto='A')
+        ExceptionHandler.manejar_error(_lanzar(), contexto='B')
+        ExceptionHandler.manejar_error(KeyError('k'), contexto='A')
+
+        assert len(errores.records) == 3
+
+    def test_flask(self, errores, monkeypatch):
+        """Test: El manejador global de Flask responde con el Markdown y escribe un solo log"""
+        from src import web_server
+
+        def romper():
+            raise RuntimeError('roto')
+
+        monkeypatch.setattr(web_server.metricas, 'exponer', romper)
+        monkeypatch.setattr(web_server, 'METRICAS_HABILITADAS', True)
+        respuesta = web_server.app.test_client().get('/metrics')
+        texto = respuesta.get_data(as_text=True)
+
+        assert respuesta.status_code == 500
+        assert 'RuntimeError' in texto
+        assert 'Error en servidor web' in texto
+        assert len(errores.records) == 1
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
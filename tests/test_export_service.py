@@ -0,0 +1,163 @@
+"""
+Tests para la exportación en streaming de gastos
+"""
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+import pytest
+
+from src.models import Gasto
+from src.services import ExportService
+
+
+@pytest.fixture
+def sesiones(sesiones):
+    """BD en memoria con 50 gastos del usuario 1 y uno de otro usuario"""
+    fabrica = sesiones
+    inicio = datetime(2024, 1, 1)
+    db = fabrica()
+    for i in range(50):
+        db.add(Gasto(
+            usuario_id=1, descripcion=f'Gasto, "{i}" ñ', monto=float(i), categoria='Comida',
+            fecha='2024-01-01', timestamp=inicio + timedelta(hours=i), datos_ocr={'texto': 'x' * 100}
+        ))
+    db.add(Gasto(usuario_id=2, descripcion='Ajeno', monto=1.0, fecha='2024-01-01'))
+    db.commit()
+    db.close()
+    return fabrica
+
+
+class TestGenerar:
+    """Tests de la generación por bloques"""
+
+    def test_csv(self, sesiones):
+        """Test: CSV con cabecera, comillas escapadas y orden cronológico"""
+        contenido = b''.join(ExportService.generar(1, 'csv')).decode('utf-8')
+        filas = list(csv.DictReader(io.StringIO(contenido)))
+
+        assert len(filas) == 50
+        assert tuple(filas[0]) == ExportService.COLUMNAS
+        assert filas[0]['descripcion'] == 'Gasto, "0" ñ'
+        assert [float(f['monto']) for f in filas] == [float(i) for i in range(50)]
+
+    def test_ndjson(self, sesiones):
+        """Test: Un objeto JSON por línea, solo del usuario pedido"""
+        contenido = b''.join(ExportService.generar(1, 'ndjson')).decode('utf-8')
+        filas = [json.loads(linea) for linea in contenido.splitlines()]
+
+        assert len(filas) == 50
+        assert filas[-1]['monto'] == 49.0
+        assert filas[0]['fecha'] == '2024-01-01'
+        assert 'datos_ocr' not in filas[0]
+
+    def test_bloques_acotados(self, sesiones):
+        """Test: Con bloques pequeños la salida se entrega en varias partes"""
+        bloques = list(ExportService.generar(1, 'csv', tam_lote=7, tam_bloque=256))
+
+        assert len(bloques) > 5
+        assert all(len(bloque) < 256 + 200 for bloque in bloques)
+
+    def test_usuario_sin_gastos(self, sesiones):
+        """Test: Solo la cabecera en CSV y nada en NDJSON"""
+        assert b''.join(ExportService.generar(3, 'csv')).decode().strip() == ','.join(ExportService.COLUMNAS)
+        assert list(ExportService.generar(3, 'ndjson')) == []
+
+    def test_formato_invalido(self, sesiones):
+        """Test: Formato desconocido"""
+        with pytest.raises(ValueError):
+            list(ExportService.generar(1, 'xml'))
+
+    def test_archivo_temporal(self, sesiones):
+        """Test: El archivo queda al inicio y con el tamaño escrito"""
+        archivo, tamano = ExportService.escribir_archivo(1, 'ndjson')
+        try:
+            assert len(archivo.read()) == tamano
+        finally:
+            archivo.close()
+
+
+class TestTokens:
+    """Tests de los enlaces firmados"""
+
+    def test_token_valido(self):
+        """Test: Un token recién creado identifica al usuario"""
+        token = ExportService.crear_token(42, secreto='s')
+        assert ExportService.verificar_token(token, secreto='s') == 42
+
+    def test_token_alterado(self):
+        """Test: Cambiar el usuario invalida la firma"""
+        token = ExportService.crear_token(42, secreto='s')
+        _, expira, firma = token.split('.')
+        assert ExportService.verificar_token(f"43.{expira}.{firma}", secreto='s') is None
+        assert ExportService.verificar_token(token, secreto='otro') is None
+        assert ExportService.verificar_token('basura', secreto='s') is None
+
+    def test_token_expirado(self):
+        """Test: Un token vencido no es válido"""
+        token = ExportService.crear_token(42, ttl=-1, secreto='s')
+        assert ExportService.verificar_token(token, secreto='s') is None
+
+    def test_sin_secreto(self):
+        """Test: Sin secreto no hay enlaces"""
+        assert ExportService.crear_token(42, secreto='') is None
+        assert ExportService.verificar_token('1.2.3', secreto='') is None
+
+
+class TestEndpoint:
+    """Tests de la descarga web"""
+
+    def test_descarga(self, sesiones, monkeypatch):
+        """Test: El endpoint entrega el CSV con un token válido"""
+        from src import web_server
+
+        monkeypatch.setattr(
+            ExportService, 'verificar_token', staticmethod(lambda token: 1 if token == 'ok' else None)
+        )
+        cliente = web_server.app.test_client()
+
+        respuesta = cliente.get('/exportar?formato=csv&token=ok')
+        assert respuesta.status_code == 200
+        assert respuesta.mimetype == 'text/csv'
+        assert respuesta.get_data(as_text=True).count('\n') == 51
+
+        assert cliente.get('/exportar?token=malo').status_code == 403
+        assert cliente.get('/exportar?formato=xml&token=ok').status_code == 400
+
+
+class TestComandoExportar:
+    """Tests del comando !exportar cuando el archivo no cabe como adjunto"""
+
+    async def test_privados_desactivados(self, sesiones, monkeypatch):
+        """Test: Sin mensajes privados se avisa en el canal sin publicar el enlace"""
+        import discord
+        from src.controller.comando_controller import ComandoController
+
+        canal = []
+
+        async def enviar_privado(mensaje):
+            respuesta = SimpleNamespace(status=403, reason='Forbidden')
+            raise discord.Forbidden(respuesta, 'Cannot send messages to this user')
+
+        async def enviar_canal(mensaje=None, **kwargs):
+            canal.append(mensaje)
+
+        monkeypatch.setattr(
+            ExportService, 'url_descarga',
+            staticmethod(lambda usuario_id, formato: 'https://x/exportar?token=secreto')
+        )
+        ctx = SimpleNamespace(
+            author=SimpleNamespace(id=1, send=enviar_privado),
+            guild=SimpleNamespace(filesize_limit=1),
+            send=enviar_canal
+        )
+        await ComandoController(bot=None).exportar(ctx, 'csv')
+
+        assert len(canal) == 1
+        assert 'mensajes directos' in canal[0]
+        assert 'secreto' not in canal[0]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,270 @@
+"""
+Tests de equivalencia del extractor en una sola pasada
+Compara ExtractorFactura con los criterios originales `_extraer_*`
+"""
+import random
+import re
+import pytest
+
+from src.config import SIMBOLO_MONEDA, ocr_config
+from src.extractor_factura import ExtractorFactura
+from src.factura_processor import _extraer_informacion
+from src.utils import extraer_numero
+
+
+CORPUS = [
+    """
+    TIENDA EJEMPLO
+
+    FECHA: 29/11/2024
+
+    Producto 1        S/. 50.00
+    Producto 2        S/. 30.00
+
+    TOTAL             S/. 80.00
+    """,
+    """
+    TIENDA SIN TOTAL
+
+    Producto 1
+    Producto 2
+    """,
+    """
+    TIENDA EN USA
+    Producto 1        $ 50.00
+    TOTAL             $ 100.00
+    """,
+    "",
+    "SUPERMERCADO PLAZA VEA\nRUC 20100070970\nAv. Los Olivos 123 - Lima\n15 de marzo de 2024\nArroz 5kg  18.90\nAceite    12.50\nIMPORTE A PAGAR 31.40\n",
+    "Farmacia Universal\n12\nde marzo\nde 2023\nParacetamol 500mg x 10   4.50 1 4.50\nTOTAL NETO 0.00\n",
+    "BODEGA\n0.00\n0.00 0.00\n",
+    "Restaurante El Buen Sabor\nMesa 4\nLomo saltado 35,00\nChicha morada 8,00\nSubtotal 43,00\nIGV 7,74 43,00\n",
+    "ABC\nDEF GHI\nMINIMARKET LOS ANDES SAC\n03-01-24\nreferencia: pedido online 7788\n€ 23.10\n",
+    "123 456\n--/--\nServicio de reparación de laptop\nMano de obra          S/. 120.00\nRepuestos             S/. 80.00\n",
+    "gran total\nMonto 0\nPago: 15\nfecha 1/2/2020 y 3/4/2021\n£ 10.00",
+    "Uber trip\n\n\n\n\n\n\n\n\n\n\nSHELL GASOLINERA\nCombustible 90 oct 45.30\n",
+]
+
+
+# ================================================================
+# CRITERIOS ORIGINALES (referencia, un recorrido por campo)
+# ================================================================
+
+def _extraer_monto(lineas, texto_completo):
+    """Extrae el monto total usando múltiples criterios"""
+    monto_total = None
+    palabras_total = ocr_config.get_palabras_total()
+
+    # Criterio 1: Palabras clave específicas
+    for idx, linea in enumerate(lineas):
+        linea_lower = linea.lower()
+        for palabra in palabras_total:
+            if palabra in linea_lower and not monto_total:
+                monto_total = extraer_numero(linea)
+                if monto_total:
+                    return monto_total
+
+    # Criterio 2: Línea con símbolo de moneda al final
+    for linea in lineas:
+        if re.search(r'(S/\.|€|\$)\s*\d+[.,]\d{2}\s*$', linea):
+            monto = extraer_numero(linea)
+            if monto:
+                return monto
+
+    # Criterio 3: Línea con 2 decimales (número más grande)
+    numeros = re.findall(r'(\d+[.,]\d{2})', texto_completo)
+    if numeros:
+        try:
+            monto_str = numeros[-1].replace(',', '.')
+            monto_total = float(monto_str)
+            if monto_total > 0:
+                return monto_total
+        except ValueError:
+            pass
+
+    # Criterio 4: Línea que contiene muchos números (suma total)
+    for linea in reversed(lineas):
+        numeros_en_linea = re.findall(r'\d+[.,]\d{2}', linea)
+        if len(numeros_en_linea) >= 2:
+            monto = extraer_numero(linea)
+            if monto:
+                return monto
+
+    return None
+
+
+def _detectar_moneda(texto):
+    """Detecta la moneda del texto"""
+    if 'S/.' in texto or 's/.' in texto:
+        return 'S/.'
+    elif '$' in texto:
+        return '$'
+    elif '€' in texto:
+        return '€'
+    elif '£' in texto:
+        return '£'
+    return SIMBOLO_MONEDA
+
+
+def _extraer_vendedor(lineas, texto_completo):
+    """Extrae el vendedor usando múltiples criterios"""
+    vendedor = 'Comercio'
+
+    # Criterio 1: Primeras líneas no vacías que no sean números
+    for linea in lineas[:10]:
+        if (linea and len(linea) > 3 and
+            not re.search(r'^[\d\s\-\/]+$', linea) and
+            not re.search(r'^[A-Z\s]+$', linea)):
+            vendedor = linea
+            return vendedor
+
+    # Criterio 2: Línea que contiene palabras clave de negocio
+    palabras_negocio = ['tienda', 'comercio', 'empresa', 'establecimiento', 'negocio', 'supermercado', 'mercado']
+    for linea in lineas:
+        linea_lower = linea.lower()
+        for palabra in palabras_negocio:
+            if palabra in linea_lower:
+                vendedor = linea
+                return vendedor
+
+    # Criterio 3: Línea con mayúsculas (frecuentemente es el nombre de la tienda)
+    for linea in lineas[:15]:
+        if linea and re.search(r'[A-Z]{3,}', linea) and len(linea) > 5:
+            vendedor = linea
+            return vendedor
+
+    return vendedor
+
+
+def _extraer_fecha(lineas, texto_completo):
+    """Extrae la fecha usando múltiples criterios"""
+    # Criterio 1: Formato dd/mm/yyyy o dd-mm-yyyy
+    patron_fecha1 = r'(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})'
+    match = re.search(patron_fecha1, texto_completo)
+    if match:
+        fecha = match.group(1)
+        return fecha
+
+    # Criterio 2: Formato completo con mes en texto
+    meses = r'(enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre|octubre|noviembre|diciembre|january|february|march|april|may|june|july|august|september|october|november|december)'
+    patron_fecha2 = rf'(\d{{1,2}}\s+de?\s+{meses}\s+de\s+\d{{2,4}}|\d{{1,2}}\s+{meses}\s+\d{{2,4}})'
+    match = re.search(patron_fecha2, texto_completo, re.IGNORECASE)
+    if match:
+        fecha = match.group(0)
+        return fecha
+
+    # Criterio 3: Línea que contiene palabras clave de fecha
+    palabras_fecha = ['fecha', 'fecha de emisión', 'expedición', 'día']
+    for idx, linea in enumerate(lineas):
+        linea_lower = linea.lower()
+        for palabra in palabras_fecha:
+            if palabra in linea_lower:
+                # Buscar número en la misma línea o siguiente
+                numero = re.search(r'(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})', linea)
+                if numero:
+                    fecha = numero.group(1)
+                    return fecha
+                # Buscar en siguiente línea
+                if idx + 1 < len(lineas):
+                    numero = re.search(r'(\d{1,2}[-/]\d{1,2}[-/]\d{2,4})', lineas[idx + 1])
+                    if numero:
+                        fecha = numero.group(1)
+                        return fecha
+
+    return None
+
+
+def _extraer_descripcion(lineas, vendedor, texto_completo):
+    """Extrae la descripción usando múltiples criterios"""
+    # Criterio 1: Usar el vendedor
+    descripcion = f'Compra en {vendedor}'
+
+    # Criterio 2: Buscar línea con productos/artículos
+    for linea in lineas:
+        if (re.search(r'\b(producto|artículo|item|referencia)\b', linea, re.IGNORECASE) and
+            len(linea) > 10):
+            descripcion = linea
+            return descripcion
+
+    # Criterio 3: Línea más larga entre líneas de descripción (frecuentemente la descripción)
+    lineas_largas = [l for l in lineas if 15 < len(l) < 80 and not re.search(r'^\d+[\.,\s\d]+$', l)]
+    if lineas_largas:
+        descripcion = max(lineas_largas, key=len)
+        return descripcion
+
+    return descripcion
+
+
+def _original(texto):
+    """Campos calculados con las funciones originales"""
+    lineas = [l.strip() for l in texto.split('\n')]
+    vendedor = _extraer_vendedor(lineas, texto)
+    return {
+        'monto_total': _extraer_monto(lineas, texto),
+        'moneda': _detectar_moneda(texto),
+        'vendedor': vendedor,
+        'fecha': _extraer_fecha(lineas, texto),
+        'descripción': _extraer_descripcion(lineas, vendedor, texto),
+    }
+
+
+def _sin_items(campos):
+    return {clave: valor for clave, valor in campos.items() if clave != 'items'}
+
+
+def _texto_aleatorio(rng):
+    """Genera un recibo sintético combinando fragmentos típicos de OCR"""
+    fragmentos = [
+        'TOTAL', 'total a pagar', 'Subtotal', 'IMPORTE', 'S/.', '$', '€', 'RUC',
+        'SUPERMERCADO', 'Tienda', 'mercado', 'Producto', 'item', 'Referencia',
+        'FECHA', '12/05/2024', '1-2-23', '15 de enero de 2024', '3 march 2021',
+        '10.50', '0.00', '1,99', '250', '7', 'ABC', 'Boleta de venta electrónica',
+        'Gracias por su compra', '---', '   ', 'Cajero: Juan', 'x2',
+    ]
+    lineas = []
+    for _ in range(rng.randint(0, 25)):
+        lineas.append(' '.join(rng.choice(fragmentos) for _ in range(rng.randint(0, 5))))
+    return '\n'.join(lineas)
+
+
+class TestExtractorEquivalente:
+    """El extractor en una pasada reproduce los criterios originales"""
+
+    @pytest.mark.parametrize('texto', CORPUS)
+    def test_corpus(self, texto):
+        """Test: Mismos campos que las funciones `_extraer_*`"""
+        assert _sin_items(ExtractorFactura().extraer(texto)) == _original(texto)
+
+    def test_textos_aleatorios(self):
+        """Test: Equivalencia sobre recibos sintéticos aleatorios"""
+        rng = random.Random(1234)
+        extractor = ExtractorFactura()
+        for _ in range(500):
+            texto = _texto_aleatorio(rng)
+            assert _sin_items(extractor.extraer(texto)) == _original(texto), texto
+
+    def test_items(self):
+        """Test: Items son las líneas con importe en S/. o $"""
+        campos = ExtractorFactura().extraer(CORPUS[0])
+        assert campos['items'] == [
+            'Producto 1        S/. 50.00',
+            'Producto 2        S/. 30.00',
+            'TOTAL             S/. 80.00',
+        ]
+
+    def test_palabras_total_personalizadas(self):
+        """Test: Se pueden inyectar palabras clave de total"""
+        texto = "Comercio X\nA COBRAR 12.00\nOtro 99.99\n"
+        assert ExtractorFactura(palabras_total=['a cobrar']).extraer(texto)['monto_total'] == 12.00
+
+    def test_extraer_informacion_usa_extractor(self):
+        """Test: `_extraer_informacion` conserva el formato de resultado"""
+        resultado = _extraer_informacion(CORPUS[0])
+        assert set(resultado) == {
+            'monto_total', 'moneda', 'vendedor', 'fecha', 'categoría', 'descripción', 'items'
+        }
+        assert resultado['fecha'] == '29/11/2024'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,214 @@
+"""
+Tests para el DAO de gastos (inserción en lote)
+"""
+import pytest
+import random
+from datetime import date, datetime, timedelta
+from sqlalchemy import func, inspect as sa_inspect
+
+from src.models import Gasto, GastoDiario
+from src.dao import GastoDAO, GastoDiarioDAO
+from src.repository import GastoRepository
+
+
+@pytest.fixture
+def db_session(sesiones):
+    """Sesión sobre una base de datos en memoria"""
+    db = sesiones()
+    yield db
+    db.close()
+
+
+@pytest.fixture
+def repositorio(sesiones):
+    """GastoRepository apuntando a la base de datos en memoria"""
+    return GastoRepository
+
+
+def _agregado(db, usuario_id):
+    """Agregado como diccionario (categoria -> (total, cantidad))"""
+    return {
+        fila.categoria: (round(fila.total, 2), fila.cantidad)
+        for fila in db.query(GastoDiario).filter(GastoDiario.usuario_id == usuario_id)
+    }
+
+
+def _agregado_desde_gastos(db, usuario_id):
+    """Mismo agregado calculado directamente sobre gastos"""
+    filas = db.query(
+        Gasto.categoria, func.sum(Gasto.monto), func.count(Gasto.id)
+    ).filter(Gasto.usuario_id == usuario_id).group_by(Gasto.categoria).all()
+    return {categoria: (round(total, 2), cantidad) for categoria, total, cantidad in filas}
+
+
+class TestCrearLote:
+    """Tests de GastoDAO.crear_lote"""
+
+    def test_devuelve_ids_en_orden(self, db_session):
+        """Test: Los IDs corresponden a cada gasto en el orden recibido"""
+        gastos = [
+            {'descripcion': f'Gasto {i}', 'monto': float(i), 'categoria': 'Comida'}
+            for i in range(1, 51)
+        ]
+        ids = GastoDAO.crear_lote(db_session, 123, gastos)
+
+        assert len(ids) == 50
+        for gasto_id, gasto in zip(ids, gastos):
+            guardado = db_session.get(Gasto, gasto_id)
+            assert guardado.descripcion == gasto['descripcion']
+            assert guardado.monto == gasto['monto']
+            assert guardado.usuario_id == 123
+
+    def test_valores_por_defecto(self, db_session):
+        """Test: Categoría, fecha y timestamp se completan como en `crear`"""
+        [gasto_id] = GastoDAO.crear_lote(
+            db_session, 1, [{'descripcion': 'Taxi', 'monto': 12.5, 'datos_ocr': {'a': 1}}]
+        )
+        gasto = db_session.get(Gasto, gasto_id)
+        assert gasto.categoria == 'Otros'
+        assert gasto.fecha
+        assert gasto.timestamp is not None
+        assert gasto.datos_ocr == {'a': 1}
+
+    def test_fecha_explicita(self, db_session):
+        """Test: Se respeta la fecha indicada (importaciones)"""
+        [gasto_id] = GastoDAO.crear_lote(
+            db_session, 1, [{'descripcion': 'Luz', 'monto': 80, 'fecha': '2024-01-15'}]
+        )
+        assert db_session.get(Gasto, gasto_id).fecha == date(2024, 1, 15)
+
+    def test_lista_vacia(self, db_session):
+        """Test: Sin gastos no se ejecuta nada"""
+        assert GastoDAO.crear_lote(db_session, 1, []) == []
+
+    def test_sin_commit_se_puede_deshacer(self, db_session):
+        """Test: Con commit=False el llamador controla la transacción"""
+        GastoDAO.crear_lote(db_session, 1, [{'descripcion': 'X', 'monto': 1}], commit=False)
+        db_session.rollback()
+        assert db_session.query(Gasto).count() == 0
+
+
+class TestListados:
+    """Tests de las consultas de listado"""
+
+    def test_recientes_proyecta_y_limita(self, db_session):
+        """Test: Solo las columnas del listado y como máximo `limite` filas"""
+        GastoDAO.crear_lote(db_session, 6, [
+            {'descripcion': f'Gasto {i}', 'monto': float(i), 'datos_ocr': {'texto': 'x' * 1000}}
+            for i in range(25)
+        ])
+        filas = GastoDAO.obtener_recientes(db_session, 6, limite=10)
+
+        assert len(filas) == 10
+        assert set(filas[0]._fields) == {'id', 'descripcion', 'monto', 'categoria', 'fecha'}
+        assert filas[0].descripcion == 'Gasto 24'
+
+    def test_rango_fechas_difiere_datos_ocr(self, sesiones):
+        """Test: El listado no carga datos_ocr y to_dict sigue funcionando"""
+        db = sesiones()
+        GastoDAO.crear_lote(db, 7, [{'descripcion': 'A', 'monto': 1, 'datos_ocr': {'a': 1}}])
+        gastos = GastoDAO.obtener_por_rango_fechas(db, 7, limite=5)
+        db.close()
+
+        assert 'datos_ocr' in sa_inspect(gastos[0]).unloaded
+        assert gastos[0].to_dict()['datos_ocr'] is None
+        assert gastos[0].to_dict()['descripcion'] == 'A'
+
+    def test_rango_fechas_misma_ventana_que_agregado(self, db_session):
+        """Test: El listado y el agregado cuentan los mismos gastos en el borde de la ventana"""
+        borde = datetime.combine((datetime.utcnow() - timedelta(days=30)).date(), datetime.min.time())
+        GastoDAO.crear_lote(db_session, 10, [
+            {'descripcion': 'Primer instante', 'monto': 1.0, 'timestamp': borde},
+            {'descripcion': 'Día anterior', 'monto': 2.0, 'timestamp': borde - timedelta(seconds=1)},
+        ])
+        GastoDiarioDAO.reconstruir(db_session)
+
+        listado = GastoDAO.obtener_por_rango_fechas(db_session, 10, dias=30)
+        assert [g.descripcion for g in listado] == ['Primer instante']
+        assert GastoDiarioDAO.resumen(db_session, 10, dias=30) == (1.0, 1)
+
+
+class TestAgregadoDiario:
+    """Tests del agregado diario mantenido por GastoRepository"""
+
+    def test_altas_modificaciones_y_bajas(self, repositorio, db_session):
+        """Test: El agregado coincide con la tabla tras operaciones aleatorias"""
+        rng = random.Random(7)
+        categorias = ['Comida', 'Transporte', 'Compras']
+        ids = []
+        for _ in range(60):
+            operacion = rng.random()
+            if operacion < 0.5 or not ids:
+                gasto = repositorio.crear_gasto(
+                    1, 'Gasto', round(rng.uniform(1, 100), 2), rng.choice(categorias)
+                )
+                ids.append(gasto.id)
+            elif operacion < 0.65:
+                ids.extend(repositorio.crear_lote(1, [
+                    {'descripcion': 'Lote', 'monto': 5.0, 'categoria': rng.choice(categorias)}
+                    for _ in range(3)
+                ]))
+            elif operacion < 0.85:
+                repositorio.actualizar_gasto(
+                    rng.choice(ids), 1,
+                    monto=round(rng.uniform(1, 100), 2),
+                    categoria=rng.choice(categorias)
+                )
+            else:
+                gasto_id = ids.pop(rng.randrange(len(ids)))
+                assert repositorio.eliminar_gasto(gasto_id, 1)
+
+        db_session.expire_all()
+        assert _agregado(db_session, 1) == _agregado_desde_gastos(db_session, 1)
+
+    def test_resumen_desde_agregado(self, repositorio):
+        """Test: Total y categorías se leen del agregado"""
+        repositorio.crear_gasto(2, 'Taxi', 10.0, 'Transporte')
+        repositorio.crear_gasto(2, 'Bus', 2.5, 'Transporte')
+        repositorio.crear_gasto(2, 'Pan', 4.0, 'Comida')
+        repositorio.crear_gasto(3, 'Otro usuario', 99.0, 'Comida')
+
+        assert repositorio.obtener_resumen(2) == {'total': 16.5, 'cantidad': 3, 'promedio': 5.5}
+        assert repositorio.obtener_total_gastos(2) == 16.5
+        assert [tuple(fila) for fila in repositorio.obtener_gastos_por_categoria(2)] == [
+            ('Transporte', 12.5, 2), ('Comida', 4.0, 1)
+        ]
+
+    def test_ventana_por_dias(self, db_session):
+        """Test: Los días fuera de la ventana no se cuentan"""
+        antiguo = datetime.utcnow() - timedelta(days=40)
+        db_session.add_all([
+            Gasto(usuario_id=4, descripcion='Viejo', monto=50, fecha='2024-01-01', timestamp=antiguo),
+            Gasto(usuario_id=4, descripcion='Nuevo', monto=7, fecha='2024-01-01'),
+        ])
+        db_session.commit()
+        GastoDiarioDAO.reconstruir(db_session)
+
+        assert GastoDiarioDAO.resumen(db_session, 4, dias=30) == (7.0, 1)
+        assert GastoDiarioDAO.resumen(db_session, 4, dias=60) == (57.0, 2)
+
+    def test_baja_solo_limpia_su_grupo(self, repositorio, db_session):
+        """Test: Al eliminar un gasto solo se borra el grupo afectado, no los de otros usuarios"""
+        hoy = date.today().isoformat()
+        db_session.add(GastoDiario(usuario_id=9, dia=hoy, categoria='Comida', total=0, cantidad=0))
+        db_session.commit()
+        gasto = repositorio.crear_gasto(8, 'Pan', 4.0, 'Comida')
+
+        assert repositorio.eliminar_gasto(gasto.id, 8)
+        db_session.expire_all()
+        assert _agregado(db_session, 8) == {}
+        assert _agregado(db_session, 9) == {'Comida': (0, 0)}
+
+    def test_reconstruir(self, db_session):
+        """Test: La reconstrucción reproduce el agregado desde cero"""
+        GastoDAO.crear_lote(db_session, 5, [
+            {'descripcion': 'A', 'monto': 1.0, 'categoria': 'Comida'},
+            {'descripcion': 'B', 'monto': 2.0, 'categoria': 'Comida'},
+            {'descripcion': 'C', 'monto': 3.0},
+        ])
+        assert GastoDiarioDAO.reconstruir(db_session, usuario_id=5) == 2
+        assert _agregado(db_session, 5) == {'Comida': (3.0, 2), 'Otros': (3.0, 1)}
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,94 @@
+"""
+Tests para el preprocesamiento de imágenes antes del OCR
+"""
+import io
+import pytest
+from PIL import Image, ImageDraw
+
+from src.image_preprocessor import (
+    PASOS,
+    decodificar,
+    preprocesar,
+    recortar,
+    reducir,
+    umbral_otsu,
+    validar_pasos
+)
+
+
+def _recibo_sobre_fondo(ancho=400, alto=600):
+    """Recibo blanco con texto negro sobre una mesa oscura"""
+    imagen = Image.new('RGB', (ancho, alto), color=(40, 40, 40))
+    dibujo = ImageDraw.Draw(imagen)
+    dibujo.rectangle((100, 80, 300, 520), fill=(250, 250, 250))
+    dibujo.text((120, 120), 'TOTAL 80.00', fill=(0, 0, 0))
+    return imagen
+
+
+class TestPasos:
+    """Tests de cada paso"""
+
+    def test_pasos_registrados(self):
+        """Test: Los pasos documentados están registrados"""
+        for paso in ('reducir', 'orientar', 'escala_grises', 'recortar', 'binarizar'):
+            assert paso in PASOS
+
+    def test_reducir_limita_lado_mayor(self):
+        """Test: Reducir respeta la proporción y el lado máximo"""
+        imagen = reducir(Image.new('RGB', (4000, 3000)), max_lado=1000)
+        assert imagen.size == (1000, 750)
+
+    def test_reducir_no_agranda(self):
+        """Test: Imágenes pequeñas no se modifican"""
+        original = Image.new('RGB', (500, 300))
+        assert reducir(original, max_lado=1000) is original
+
+    def test_decodificar_jpeg_en_draft(self):
+        """Test: Los JPEG grandes se decodifican ya reducidos"""
+        buffer = io.BytesIO()
+        Image.new('RGB', (4000, 3000), color='white').save(buffer, format='JPEG')
+        imagen = Image.open(io.BytesIO(buffer.getvalue()))
+
+        decodificar(imagen, ['reducir'], max_lado=1000)
+        assert max(imagen.size) < 4000
+        assert max(imagen.size) >= 1000
+
+    def test_umbral_otsu_separa_dos_niveles(self):
+        """Test: El umbral de Otsu cae entre los dos niveles de gris"""
+        histograma = [0] * 256
+        histograma[30] = 500
+        histograma[220] = 500
+        assert 30 <= umbral_otsu(histograma) < 220
+
+    def test_binarizar_deja_dos_niveles(self):
+        """Test: La imagen binarizada solo tiene negro y blanco"""
+        imagen, _ = preprocesar(_recibo_sobre_fondo(), ['binarizar'])
+        assert imagen.mode == 'L'
+        assert set(imagen.getdata()) <= {0, 255}
+
+    def test_recortar_region_del_recibo(self):
+        """Test: El recorte se ajusta al papel del recibo"""
+        imagen = recortar(_recibo_sobre_fondo())
+        assert imagen.width < 400
+        assert imagen.height < 600
+        assert imagen.width >= 200
+
+
+class TestPipeline:
+    """Tests del pipeline configurable"""
+
+    def test_tiempos_por_paso(self):
+        """Test: Se mide el tiempo de cada paso aplicado"""
+        imagen, tiempos = preprocesar(_recibo_sobre_fondo(), ['reducir', 'escala_grises'])
+        assert imagen.mode == 'L'
+        assert list(tiempos) == ['reducir', 'escala_grises']
+        assert all(ms >= 0 for ms in tiempos.values())
+
+    def test_paso_desconocido(self):
+        """Test: Un paso no registrado es un error de configuración"""
+        with pytest.raises(ValueError):
+            validar_pasos(['reducir', 'magia'])
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,181 @@
+"""
+Tests para la importación de gastos desde CSV
+"""
+import io
+from datetime import date
+import pytest
+
+from src.repository import GastoRepository
+from src.services import ExportService, ImportService
+from src.services.import_service import parsear_monto, parsear_fecha
+
+
+def _archivo(texto: str):
+    return io.BytesIO(texto.encode('utf-8'))
+
+
+class TestParseo:
+    """Tests de montos y fechas"""
+
+    @pytest.mark.parametrize('texto,esperado', [
+        ('12.50', 12.5),
+        ('-12.50', -12.5),
+        ('(8,00)', -8.0),
+        ('S/. -1.234,56', -1234.56),
+        ('S/. 1.234,56', 1234.56),
+        ('$1,234.56', 1234.56),
+        ('1.234.567', 1234567.0),
+        ('1,234', 1234.0),
+        ('45', 45.0),
+        ('', None),
+        ('abc', None),
+    ])
+    def test_montos(self, texto, esperado):
+        """Test: Separadores, signo (menos o paréntesis) y símbolos de moneda"""
+        assert parsear_monto(texto) == esperado
+
+    @pytest.mark.parametrize('texto,esperado', [
+        ('2024-03-15', date(2024, 3, 15)),
+        ('2024-03-15T10:00:00', date(2024, 3, 15)),
+        ('15/03/2024', date(2024, 3, 15)),
+        ('15-03-2024', date(2024, 3, 15)),
+        ('marzo', None),
+    ])
+    def test_fechas(self, texto, esperado):
+        """Test: Formatos de fecha aceptados"""
+        assert parsear_fecha(texto) == esperado
+
+
+class TestLeerLotes:
+    """Tests de la lectura incremental"""
+
+    def test_extracto_con_punto_y_coma(self):
+        """Test: Detecta el separador y las cabeceras con acentos; los abonos no se importan"""
+        csv = (
+            "Fecha Operación;Descripción;Importe\n"
+            "01/02/2024;FARMACIA UNIVERSAL;-25,90\n\n"
+            "02/02/2024;Uber;-12,00\n"
+            "03/02/2024;ABONO DE HABERES;1.500,00\n"
+        )
+        resultado = ImportService.nuevo_resultado()
+        lotes = list(ImportService.leer_lotes(_archivo(csv), resultado, tam_lote=10))
+
+        assert len(lotes) == 1
+        farmacia, uber = lotes[0]
+        assert farmacia['monto'] == 25.9
+        assert farmacia['fecha'] == date(2024, 2, 1)
+        assert farmacia['categoria'] != 'Otros'
+        assert uber['monto'] == 12.0
+        assert uber['timestamp'].date() == date(2024, 2, 2)
+        assert resultado['leidas'] == 3
+        assert resultado['abonos'] == 1
+        assert resultado['omitidos'] == 0
+
+    def test_parentesis_como_cargo(self):
+        """Test: En un extracto los importes entre paréntesis son cargos"""
+        csv = "descripcion,cargo/abono\nFarmacia,(8.00)\nDevolución,8.00\n"
+        resultado = ImportService.nuevo_resultado()
+        lotes = list(ImportService.leer_lotes(_archivo(csv), resultado))
+
+        assert [gasto['monto'] for gasto in lotes[0]] == [8.0]
+        assert resultado['abonos'] == 1
+
+    def test_columnas_cargo_y_abono(self):
+        """Test: Con columnas separadas solo se importan las filas con cargo"""
+        csv = "Concepto;Cargo;Abono\nSupermercado;45,10;\nTransferencia recibida;;300,00\nCine;-20,00;\n"
+        resultado = ImportService.nuevo_resultado()
+        lotes = list(ImportService.leer_lotes(_archivo(csv), resultado))
+
+        assert [gasto['monto'] for gasto in lotes[0]] == [45.1, 20.0]
+        assert resultado['abonos'] == 1
+
+    def test_sin_negativos_todo_es_gasto(self):
+        """Test: Sin importes negativos (p. ej. !exportar) todas las filas son gastos"""
+        resultado = ImportService.nuevo_resultado()
+        lotes = list(ImportService.leer_lotes(_archivo("descripcion,monto\nPan,2\nLeche,3.5\n"), resultado))
+
+        assert [gasto['monto'] for gasto in lotes[0]] == [2.0, 3.5]
+        assert resultado['abonos'] == 0
+
+    def test_categoria_sin_log_por_fila(self, caplog):
+        """Test: Detectar la categoría de cada fila no escribe logs INFO"""
+        import logging
+        caplog.set_level(logging.INFO)
+        filas = ''.join(f"FARMACIA {i},{i}\n" for i in range(1, 21))
+        list(ImportService.leer_lotes(_archivo("descripcion,monto\n" + filas), ImportService.nuevo_resultado()))
+
+        assert not [r for r in caplog.records if 'categoría' in r.getMessage().lower()]
+
+    def test_lotes_y_errores(self):
+        """Test: Filas inválidas se omiten y el resto se agrupa por lotes"""
+        filas = ''.join(f"Gasto {i},{i if i % 4 else 'x'}\n" for i in range(1, 11))
+        resultado = ImportService.nuevo_resultado()
+        lotes = list(ImportService.leer_lotes(_archivo("descripcion,monto\n" + filas), resultado, tam_lote=3))
+
+        assert [len(lote) for lote in lotes] == [3, 3, 2]
+        assert resultado['omitidos'] == 2
+        assert resultado['errores'][0].startswith('Línea 5')
+
+    def test_sin_columnas(self):
+        """Test: Sin columna de monto no se importa nada"""
+        with pytest.raises(ValueError):
+            list(ImportService.leer_lotes(_archivo("nombre,valor\na,1\n"), ImportService.nuevo_resultado()))
+
+    def test_no_cierra_el_archivo(self):
+        """Test: El archivo del llamador sigue abierto al terminar"""
+        archivo = _archivo("descripcion,monto\nPan,2\n")
+        list(ImportService.leer_lotes(archivo, ImportService.nuevo_resultado()))
+        assert not archivo.closed
+
+
+class TestImportar:
+    """Tests de la importación completa"""
+
+    async def test_importa_por_lotes(self, sesiones):
+        """Test: Cada lote se inserta y se reporta el progreso"""
+        filas = ''.join(f"2024-01-{i:02d},Gasto {i},{i}.00\n" for i in range(1, 26))
+        avances = []
+
+        async def progreso(resultado):
+            avances.append(resultado['importados'])
+
+        resultado = await ImportService.importar(
+            7, _archivo("fecha,descripcion,monto\n" + filas), progreso=progreso, tam_lote=10
+        )
+
+        assert avances == [10, 20, 25]
+        assert resultado['total'] == sum(range(1, 26))
+        db = sesiones()
+        try:
+            from src.dao import GastoDiarioDAO
+            assert GastoDiarioDAO.resumen(db, 7, dias=100000) == (sum(range(1, 26)), 25)
+        finally:
+            db.close()
+
+    async def test_exportar_e_importar(self, sesiones):
+        """Test: Un CSV de !exportar se puede volver a importar"""
+        GastoRepository.crear_gasto(1, 'Pan', 4.5, 'Comida')
+        GastoRepository.crear_gasto(1, 'Taxi', 10.0, 'Transporte')
+        contenido = b''.join(ExportService.generar(1, 'csv'))
+
+        resultado = await ImportService.importar(2, io.BytesIO(contenido))
+
+        assert resultado['importados'] == 2
+        categorias = dict((c, t) for c, t, _ in GastoRepository.obtener_gastos_por_categoria(2))
+        assert categorias == {'Comida': 4.5, 'Transporte': 10.0}
+
+    async def test_limitador_progreso(self):
+        """Test: El progreso no se reporta más seguido que el intervalo"""
+        llamadas = []
+
+        async def progreso(resultado):
+            llamadas.append(resultado)
+
+        limitada = ImportService.limitador_progreso(progreso, intervalo=60)
+        for i in range(5):
+            await limitada(i)
+        assert llamadas == [0]
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
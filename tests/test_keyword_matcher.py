@@ -0,0 +1,95 @@
+"""
+Tests para el autómata Aho-Corasick de palabras clave
+"""
+import random
+import pytest
+
+from src.config import ocr_config
+from src.config.ocr_config import OCRConfig
+from src.keyword_matcher import KeywordMatcher
+from src.factura_processor import _detectar_categoria
+
+
+def _categoria_ingenua(descripcion, texto):
+    """Búsqueda original con bucles anidados"""
+    texto_busqueda = (descripcion + ' ' + texto).lower()
+    for categoria, palabras_clave in ocr_config.get_categorias().items():
+        for palabra in palabras_clave:
+            if palabra in texto_busqueda:
+                return categoria
+    return 'Otros'
+
+
+class TestKeywordMatcher:
+    """Tests del autómata"""
+
+    def test_encuentra_todas_las_palabras(self):
+        """Test: Encuentra palabras solapadas y contenidas en otras"""
+        matcher = KeywordMatcher(['he', 'she', 'his', 'hers'])
+        assert matcher.etiquetas('ushers') == {'he', 'she', 'hers'}
+
+    def test_etiquetas_por_palabra(self):
+        """Test: Cada palabra puede tener varias etiquetas"""
+        matcher = KeywordMatcher({
+            'tienda': {'negocio', ('categoria', 'Compras')},
+            'total': 'total',
+        })
+        assert matcher.etiquetas('tienda central') == {'negocio', ('categoria', 'Compras')}
+        assert matcher.etiquetas('total a pagar') == {'total'}
+        assert matcher.etiquetas('nada') == set()
+
+    def test_contiene_por_etiqueta(self):
+        """Test: `contiene` filtra por etiqueta"""
+        matcher = KeywordMatcher({'mercado': 'negocio', 'total': 'total'})
+        assert matcher.contiene('supermercado')
+        assert matcher.contiene('supermercado', etiqueta='negocio')
+        assert not matcher.contiene('supermercado', etiqueta='total')
+
+    def test_equivale_a_busqueda_de_subcadenas(self):
+        """Test: Mismo resultado que `palabra in texto` sobre textos aleatorios"""
+        rng = random.Random(42)
+        palabras = ['ab', 'abc', 'bca', 'c', 'aab', 'cab', 'bb']
+        matcher = KeywordMatcher(palabras)
+        for _ in range(1000):
+            texto = ''.join(rng.choice('abc ') for _ in range(rng.randint(0, 20)))
+            assert matcher.etiquetas(texto) == {p for p in palabras if p in texto}
+
+    def test_cantidad_palabras(self):
+        """Test: Palabras repetidas cuentan una vez"""
+        assert len(KeywordMatcher(['a', 'b', 'a'])) == 2
+
+
+class TestCategoriaYConfig:
+    """Tests de la detección de categoría y reconstrucción del autómata"""
+
+    @pytest.mark.parametrize('descripcion,texto', [
+        ('Compra en Comercio', 'FARMACIA UNIVERSAL\nParacetamol'),
+        ('Boleta', 'Supermercado Plaza Vea'),
+        ('Servicio técnico', 'reparación de laptop'),
+        ('Compra en TIENDA', ''),
+        ('Uber', 'Viaje en taxi'),
+        ('Nada', 'sin coincidencias'),
+    ])
+    def test_categoria_equivalente(self, descripcion, texto):
+        """Test: Misma categoría que los bucles anidados originales"""
+        assert _detectar_categoria(descripcion, texto) == _categoria_ingenua(descripcion, texto)
+
+    def test_detectar_categoria_compartida(self):
+        """Test: OCRConfig.detectar_categoria es la regla de facturas (y de la importación CSV)"""
+        for descripcion in ('Farmacia Universal', 'UBER *TRIP', 'Supermercado', 'Nada'):
+            assert ocr_config.detectar_categoria(descripcion) == _detectar_categoria(descripcion, '')
+            assert ocr_config.detectar_categoria(descripcion) == _categoria_ingenua(descripcion, '')
+
+    def test_agregar_palabra_total_reconstruye(self, tmp_path):
+        """Test: Agregar una palabra de total reconstruye el autómata"""
+        config = OCRConfig()
+        config.config_path = tmp_path / 'ocr_keywords.json'
+
+        assert not config.matcher.contiene('a cobrar', etiqueta='total')
+        config.agregar_palabra_total('a cobrar')
+        assert config.matcher.contiene('a cobrar', etiqueta='total')
+        assert 'a cobrar' in config.get_palabras_total()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,263 @@
+"""
+Tests para el logging asíncrono (cola + hilo escritor)
+"""
+import asyncio
+import json
+import logging
+import logging.handlers
+import queue
+import threading
+import pytest
+
+from src.config.logging_config import (
+    ColaLogHandler,
+    DespachoLogHandler,
+    FiltroContexto,
+    FiltroMuestreo,
+    FormateadorJSON,
+    contexto_log,
+    parsear_reglas,
+)
+from src.repository.async_gasto_repository import ejecutar_en_db
+
+
+class _Lista(logging.Handler):
+    """Handler que guarda los mensajes formateados y el hilo que los escribió"""
+
+    def __init__(self):
+        super().__init__()
+        self.mensajes = []
+        self.hilos = []
+
+    def emit(self, record):
+        self.mensajes.append(self.format(record))
+        self.hilos.append(threading.current_thread().name)
+
+
+class _Rastreador:
+    """Argumento de log que recuerda en qué hilo se convirtió a texto"""
+
+    def __init__(self):
+        self.hilo = None
+
+    def __str__(self):
+        self.hilo = threading.current_thread().name
+        return 'valor'
+
+
+@pytest.fixture
+def logger_cola():
+    """Logger aislado con ColaLogHandler y un QueueListener"""
+    destino = _Lista()
+    cola = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(cola, destino, respect_handler_level=True)
+    listener.start()
+
+    logger = logging.getLogger('test.logging_asincrono')
+    logger.propagate = False
+    logger.setLevel(logging.DEBUG)
+    handler = ColaLogHandler(cola, [destino])
+    logger.addHandler(handler)
+    yield logger, destino, listener, handler
+    logger.removeHandler(handler)
+    if listener._thread is not None:
+        listener.stop()
+
+
+class TestColaLogHandler:
+    """Tests del handler de cola"""
+
+    def test_escribe_en_otro_hilo(self, logger_cola):
+        """Test: El mensaje se formatea y escribe en el hilo del listener"""
+        logger, destino, listener, _ = logger_cola
+        argumento = _Rastreador()
+
+        logger.info("dato: %s", argumento)
+        listener.stop()
+
+        assert destino.mensajes == ['dato: valor']
+        assert destino.hilos[0] != threading.current_thread().name
+        assert argumento.hilo != threading.current_thread().name
+
+    def test_excepciones(self, logger_cola):
+        """Test: El traceback llega al handler real"""
+        logger, destino, listener, _ = logger_cola
+        try:
+            raise ValueError('fallo')
+        except ValueError:
+            logger.exception("error %d", 1)
+        listener.stop()
+
+        assert destino.mensajes[0].startswith('error 1')
+        assert 'ValueError: fallo' in destino.mensajes[0]
+
+    def test_respeta_nivel_del_handler(self, logger_cola):
+        """Test: Los niveles de los handlers reales se siguen aplicando"""
+        logger, destino, listener, _ = logger_cola
+        destino.setLevel(logging.WARNING)
+        logger.info("ignorado")
+        logger.warning("visible")
+        listener.stop()
+
+        assert destino.mensajes == ['visible']
+
+    def test_proceso_hijo_escribe_directo(self, logger_cola):
+        """Test: En un proceso hijo (sin hilo escritor) escribe en los handlers sin cola"""
+        logger, destino, listener, handler = logger_cola
+        handler._pid = -1
+        logger.info("desde hijo")
+
+        assert destino.mensajes == ['desde hijo']
+        assert destino.hilos == [threading.current_thread().name]
+
+
+def _registro(nombre='src.factura_processor', nivel=logging.INFO, **campos):
+    record = logging.LogRecord(nombre, nivel, __file__, 1, 'mensaje %s', ('uno',), None)
+    for clave, valor in campos.items():
+        setattr(record, clave, valor)
+    return record
+
+
+class TestFormatoJSON:
+    """Tests del formato estructurado y del contexto"""
+
+    def test_campos(self):
+        """Test: Mensaje formateado, nivel y campos de extra= como claves"""
+        linea = FormateadorJSON().format(_registro(etapa='ocr', duracion_ms=12.5))
+        datos = json.loads(linea)
+
+        assert datos['mensaje'] == 'mensaje uno'
+        assert datos['nivel'] == 'INFO'
+        assert datos['logger'] == 'src.factura_processor'
+        assert datos['etapa'] == 'ocr'
+        assert datos['duracion_ms'] == 12.5
+        assert 'args' not in datos
+
+    def test_excepcion(self):
+        """Test: El traceback va en su propio campo"""
+        try:
+            raise ValueError('fallo')
+        except ValueError:
+            import sys
+            record = logging.LogRecord('x', logging.ERROR, __file__, 1, 'error', (), sys.exc_info())
+        datos = json.loads(FormateadorJSON().format(record))
+        assert 'ValueError: fallo' in datos['excepcion']
+
+    def test_contexto(self):
+        """Test: Los campos de contexto_log se añaden y se retiran al salir"""
+        filtro = FiltroContexto()
+        with contexto_log(request_id=7, usuario_id=3):
+            with contexto_log(etapa='ocr'):
+                dentro = _registro()
+                filtro.filter(dentro)
+        fuera = _registro()
+        filtro.filter(fuera)
+
+        assert (dentro.request_id, dentro.usuario_id, dentro.etapa) == (7, 3, 'ocr')
+        assert not hasattr(fuera, 'request_id')
+
+    async def test_contexto_en_hilo_de_bd(self):
+        """Test: ejecutar_en_db propaga el contexto al hilo de BD"""
+        def leer():
+            record = _registro()
+            FiltroContexto().filter(record)
+            return record.request_id, threading.current_thread().name
+
+        with contexto_log(request_id=99):
+            request_id, hilo = await ejecutar_en_db(leer)
+
+        assert request_id == 99
+        assert hilo != threading.current_thread().name
+
+    async def test_contexto_entre_tareas(self):
+        """Test: Dos tareas concurrentes no mezclan su contexto"""
+        async def tarea(numero):
+            with contexto_log(request_id=numero):
+                await asyncio.sleep(0)
+                record = _registro()
+                FiltroContexto().filter(record)
+                return record.request_id
+
+        assert await asyncio.gather(tarea(1), tarea(2)) == [1, 2]
+
+
+class TestMuestreo:
+    """Tests del muestreo y del límite por logger"""
+
+    def test_parsear_reglas(self):
+        """Test: Formato logger=valor separado por comas, ignorando basura"""
+        assert parsear_reglas('src.a=0.5, src.b=10,roto,=3,c=x') == {'src.a': 0.5, 'src.b': 10.0}
+        assert parsear_reglas('') == {}
+
+    def test_errores_siempre_pasan(self):
+        """Test: Con tasa 0 se descartan las trazas pero no los avisos ni errores"""
+        filtro = FiltroMuestreo({'src.factura_processor': 0.0})
+
+        assert not filtro.filter(_registro())
+        assert filtro.filter(_registro(nivel=logging.WARNING))
+        assert filtro.filter(_registro(nivel=logging.ERROR))
+        assert filtro.descartados == 1
+
+    def test_prefijo(self):
+        """Test: La regla aplica a los sub-loggers y no a otros módulos"""
+        filtro = FiltroMuestreo({'src': 0.0, 'src.ocr_cache': 1.0})
+
+        assert not filtro.filter(_registro('src.factura_processor'))
+        assert filtro.filter(_registro('src.ocr_cache'))
+        assert filtro.filter(_registro('srcx'))
+        assert filtro.filter(_registro('discord.gateway'))
+
+    def test_traza_completa_por_peticion(self):
+        """Test: Todas las líneas de una petición comparten la decisión"""
+        filtro = FiltroMuestreo({'src.factura_processor': 0.5})
+        for request_id in range(50):
+            decisiones = {filtro.filter(_registro(request_id=request_id)) for _ in range(5)}
+            assert len(decisiones) == 1
+
+    def test_tasa_aproximada(self):
+        """Test: Con 1% se conserva aproximadamente una de cada cien peticiones"""
+        filtro = FiltroMuestreo({'src.factura_processor': 0.01})
+        conservadas = sum(
+            filtro.filter(_registro(request_id=10**17 + i * 7919)) for i in range(10000)
+        )
+        assert 50 <= conservadas <= 150
+
+    def test_limite_por_segundo(self, monkeypatch):
+        """Test: La cubeta deja pasar n registros y se recarga con el tiempo"""
+        from types import SimpleNamespace
+        from src.config import logging_config
+        reloj = [100.0]
+        monkeypatch.setattr(logging_config, 'time', SimpleNamespace(monotonic=lambda: reloj[0]))
+        filtro = FiltroMuestreo(limites={'src.ocr_executor': 3})
+
+        pasan = [filtro.filter(_registro('src.ocr_executor')) for _ in range(5)]
+        assert pasan == [True, True, True, False, False]
+
+        reloj[0] += 1.0
+        assert filtro.filter(_registro('src.ocr_executor'))
+        assert filtro.filter(_registro('src.ocr_executor', nivel=logging.ERROR))
+
+
+    def test_filtros_una_vez_por_registro(self):
+        """Test: Con varios handlers de salida el límite se aplica una sola vez por registro"""
+        consola, archivo = _Lista(), _Lista()
+        despacho = DespachoLogHandler([consola, archivo])
+        filtro = FiltroMuestreo(limites={'src.ocr_executor': 2})
+        despacho.addFilter(filtro)
+
+        logger = logging.getLogger('src.ocr_executor.test_despacho')
+        logger.propagate = False
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(despacho)
+        try:
+            for numero in range(4):
+                logger.info("registro %d", numero)
+        finally:
+            logger.removeHandler(despacho)
+
+        assert consola.mensajes == archivo.mensajes == ['registro 0', 'registro 1']
+        assert filtro.descartados == 2
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,169 @@
+"""
+Tests para las métricas en formato Prometheus
+"""
+import pytest
+
+from src.metrics import (
+    RegistroMetricas,
+    duracion_consultas_db,
+    duracion_etapas_factura,
+    duracion_plantillas,
+    instrumentar_metodos,
+    medir,
+)
+from src.repository import GastoRepository
+from src.services import TemplateService
+from src.factura_processor import _extraer_informacion
+
+
+class TestRegistro:
+    """Tests del formato de exposición"""
+
+    def test_contador(self):
+        """Test: Cabeceras HELP/TYPE y una línea por serie"""
+        registro = RegistroMetricas()
+        contador = registro.contador('gastos_total', 'Gastos creados', etiquetas=('origen',))
+        contador.incrementar(origen='factura')
+        contador.incrementar(2, origen='csv')
+
+        texto = registro.exponer()
+        assert '# TYPE gastos_total counter' in texto
+        assert 'gastos_total{origen="csv"} 2' in texto
+        assert 'gastos_total{origen="factura"} 1' in texto
+
+    def test_histograma_acumulado(self):
+        """Test: Buckets acumulados, +Inf, suma y cuenta"""
+        registro = RegistroMetricas()
+        histograma = registro.histograma('latencia', 'Latencia', buckets=(0.1, 1.0))
+        for valor in (0.05, 0.5, 0.5, 3.0):
+            histograma.observar(valor)
+
+        texto = registro.exponer()
+        assert 'latencia_bucket{le="0.1"} 1' in texto
+        assert 'latencia_bucket{le="1"} 3' in texto
+        assert 'latencia_bucket{le="+Inf"} 4' in texto
+        assert 'latencia_sum 4.05' in texto
+        assert 'latencia_count 4' in texto
+
+    def test_medidor_con_etiquetas(self):
+        """Test: El medidor lee su valor al exponer"""
+        registro = RegistroMetricas()
+        valores = {'cola': 3}
+        registro.medidor('cola', 'Profundidad', lambda: valores['cola'])
+        registro.medidor('ratio', 'Ratio', lambda: {('ocr',): 0.5}, etiquetas=('cache',))
+        valores['cola'] = 7
+
+        texto = registro.exponer()
+        assert 'cola 7' in texto
+        assert 'ratio{cache="ocr"} 0.5' in texto
+
+    def test_escapa_etiquetas(self):
+        """Test: Comillas y saltos de línea en valores de etiquetas"""
+        registro = RegistroMetricas()
+        registro.contador('c', 'C', etiquetas=('x',)).incrementar(x='a"b\nc')
+        assert 'c{x="a\\"b\\nc"} 1' in registro.exponer()
+
+    def test_etiquetas_incorrectas(self):
+        """Test: Observar con otras etiquetas es un error"""
+        histograma = RegistroMetricas().histograma('h', 'H', etiquetas=('etapa',))
+        with pytest.raises(ValueError):
+            histograma.observar(1.0, otra='x')
+
+    def test_duplicada(self):
+        """Test: No se puede registrar dos veces el mismo nombre"""
+        registro = RegistroMetricas()
+        registro.contador('x', 'X')
+        with pytest.raises(ValueError):
+            registro.contador('x', 'X')
+
+    def test_medidor_roto(self):
+        """Test: Un medidor que falla no impide exponer el resto"""
+        registro = RegistroMetricas()
+        registro.medidor('roto', 'Roto', lambda: 1 / 0)
+        registro.medidor('sano', 'Sano', lambda: 1)
+        texto = registro.exponer()
+        assert '# ERROR roto' in texto
+        assert 'sano 1' in texto
+
+
+class TestInstrumentacion:
+    """Tests de los decoradores y de los puntos instrumentados"""
+
+    async def test_medir_sync_y_async(self):
+        """Test: El decorador mide funciones síncronas y corrutinas"""
+        histograma = RegistroMetricas().histograma('h', 'H', etiquetas=('f',))
+
+        @medir(histograma, f='sync')
+        def sincrona():
+            return 1
+
+        @medir(histograma, f='async')
+        async def asincrona():
+            return 2
+
+        assert sincrona() == 1
+        assert await asincrona() == 2
+        assert histograma.cuenta(f='sync') == histograma.cuenta(f='async') == 1
+
+    def test_instrumentar_metodos(self):
+        """Test: Mide los métodos estáticos públicos y deja los generadores"""
+        histograma = RegistroMetricas().histograma('h', 'H', etiquetas=('operacion',))
+
+        @instrumentar_metodos(histograma, 'operacion')
+        class Ejemplo:
+            @staticmethod
+            def uno():
+                return 1
+
+            @staticmethod
+            def lista():
+                yield 1
+
+            @staticmethod
+            def _privado():
+                return 0
+
+        assert Ejemplo.uno() == 1
+        assert list(Ejemplo.lista()) == [1]
+        assert Ejemplo._privado() == 0
+        assert histograma.cuenta(operacion='uno') == 1
+        assert histograma.cuenta(operacion='lista') == 0
+
+    def test_repository_y_plantillas(self, sesiones):
+        """Test: Las operaciones del repository y los render quedan medidos"""
+        antes_db = duracion_consultas_db.cuenta(operacion='crear_gasto')
+        antes_render = duracion_plantillas.cuenta(plantilla='resumen_total')
+        antes_extraccion = duracion_etapas_factura.cuenta(etapa='extraccion')
+
+        GastoRepository.crear_gasto(1, 'Pan', 3.0, 'Comida')
+        TemplateService(cache_dir=None).render_resumen_total(3.0, 1, 3.0)
+        _extraer_informacion("TIENDA\nTOTAL 3.00")
+
+        assert duracion_consultas_db.cuenta(operacion='crear_gasto') == antes_db + 1
+        assert duracion_plantillas.cuenta(plantilla='resumen_total') == antes_render + 1
+        assert duracion_etapas_factura.cuenta(etapa='extraccion') == antes_extraccion + 1
+
+
+class TestEndpoint:
+    """Tests de /metrics"""
+
+    def test_metrics(self):
+        """Test: El servidor web expone la cola OCR y las cachés"""
+        from src import web_server
+
+        respuesta = web_server.app.test_client().get('/metrics')
+        texto = respuesta.get_data(as_text=True)
+
+        assert respuesta.status_code == 200
+        assert respuesta.mimetype == 'text/plain'
+        for nombre in (
+            'bot_ocr_cola_profundidad',
+            'bot_ocr_cache_ratio_aciertos',
+            'bot_embeds_cache_ratio_aciertos',
+            'bot_db_operacion_segundos',
+        ):
+            assert f'# TYPE {nombre}' in texto
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,204 @@
+"""
+Tests para las migraciones del esquema
+"""
+from datetime import date, datetime
+import pytest
+from sqlalchemy import create_engine, desc, inspect, select, func, text
+from sqlalchemy.orm import Session
+
+from src.models import Base, Gasto, GastoDiario
+from src.models import migraciones
+from src.models.migraciones import (
+    MIGRACIONES,
+    Migracion,
+    actualizar_indices,
+    agregar_columna,
+    migrar,
+    pendientes
+)
+
+# Esquema de gastos.db anterior a los índices compuestos
+ESQUEMA_ANTIGUO = [
+    """CREATE TABLE gastos (
+        id INTEGER NOT NULL PRIMARY KEY,
+        usuario_id INTEGER NOT NULL,
+        descripcion VARCHAR NOT NULL,
+        monto FLOAT NOT NULL,
+        categoria VARCHAR,
+        fecha VARCHAR NOT NULL,
+        imagen_url VARCHAR,
+        datos_ocr JSON,
+        timestamp DATETIME
+    )""",
+    "CREATE INDEX ix_gastos_id ON gastos (id)",
+    "CREATE INDEX ix_gastos_usuario_id ON gastos (usuario_id)",
+    "CREATE INDEX ix_gastos_timestamp ON gastos (timestamp)",
+    "CREATE INDEX idx_usuario_id ON gastos (usuario_id)",
+    "CREATE INDEX idx_fecha ON gastos (fecha)",
+    "CREATE INDEX idx_categoria ON gastos (categoria)",
+    "INSERT INTO gastos (usuario_id, descripcion, monto, categoria, fecha, timestamp) "
+    "VALUES (1, 'Antiguo', 10.0, 'Comida', '2024-03-05', '2024-03-05 12:00:00.000000')",
+]
+
+
+def _crear_engine(ruta, filas=0):
+    """BD en archivo con el esquema anterior y `filas` gastos con fecha DD/MM/YYYY"""
+    engine = create_engine(f'sqlite:///{ruta}')
+    with engine.begin() as conn:
+        for sentencia in ESQUEMA_ANTIGUO:
+            conn.execute(text(sentencia))
+        for i in range(filas):
+            conn.execute(text(
+                "INSERT INTO gastos (usuario_id, descripcion, monto, categoria, fecha, timestamp) "
+                "VALUES (2, 'G', 1.0, 'Otros', '05/03/2024', '2024-03-05 12:00:00.000000')"
+            ))
+    Base.metadata.create_all(bind=engine)
+    return engine
+
+
+@pytest.fixture
+def engine_antiguo():
+    """Base de datos en memoria con el esquema anterior"""
+    engine = create_engine('sqlite://')
+    with engine.begin() as conn:
+        for sentencia in ESQUEMA_ANTIGUO:
+            conn.execute(text(sentencia))
+    yield engine
+    engine.dispose()
+
+
+def _indices(engine):
+    return {indice['name'] for indice in inspect(engine).get_indexes('gastos')}
+
+
+class TestActualizarIndices:
+    """Tests de la migración de índices"""
+
+    def test_reemplaza_indices(self, engine_antiguo):
+        """Test: Se eliminan los índices sueltos y se crean los compuestos"""
+        assert actualizar_indices(engine_antiguo)
+        assert _indices(engine_antiguo) == {
+            'idx_gastos_usuario_timestamp_listado',
+            'idx_gastos_usuario_categoria_timestamp',
+        }
+
+    def test_idempotente(self, engine_antiguo):
+        """Test: La segunda ejecución no cambia nada"""
+        actualizar_indices(engine_antiguo)
+        assert not actualizar_indices(engine_antiguo)
+
+    def test_filas_antiguas_legibles(self, engine_antiguo):
+        """Test: Las fechas guardadas como texto se leen como date"""
+        actualizar_indices(engine_antiguo)
+        with Session(engine_antiguo) as db:
+            gasto = db.scalars(select(Gasto)).one()
+            assert gasto.fecha == date(2024, 3, 5)
+
+    def test_consultas_por_rango_usan_indice_cubriente(self, engine_antiguo):
+        """Test: La suma por usuario y rango se resuelve solo con el índice"""
+        actualizar_indices(engine_antiguo)
+        consulta = select(func.sum(Gasto.monto)).where(
+            Gasto.usuario_id == 1, Gasto.timestamp >= datetime(2024, 1, 1)
+        ).compile(engine_antiguo, compile_kwargs={'literal_binds': True})
+        with engine_antiguo.connect() as conn:
+            plan = ' '.join(fila[-1] for fila in conn.execute(text(f'EXPLAIN QUERY PLAN {consulta}')))
+        assert 'COVERING INDEX idx_gastos_usuario_timestamp_listado' in plan
+
+    def test_listado_paginado_usa_indice_cubriente(self, engine_antiguo):
+        """Test: La página de gastos sale ordenada del índice, sin leer la tabla"""
+        actualizar_indices(engine_antiguo)
+        consulta = select(
+            Gasto.id, Gasto.descripcion, Gasto.monto, Gasto.categoria, Gasto.fecha, Gasto.timestamp
+        ).where(
+            Gasto.usuario_id == 1, Gasto.timestamp >= datetime(2024, 1, 1)
+        ).order_by(desc(Gasto.timestamp), desc(Gasto.id)).limit(11).compile(
+            engine_antiguo, compile_kwargs={'literal_binds': True}
+        )
+        with engine_antiguo.connect() as conn:
+            plan = ' '.join(fila[-1] for fila in conn.execute(text(f'EXPLAIN QUERY PLAN {consulta}')))
+        assert 'COVERING INDEX idx_gastos_usuario_timestamp_listado' in plan
+        assert 'TEMP B-TREE' not in plan
+
+
+class TestFechaISO:
+    """Tests del tipo de columna fecha"""
+
+    @pytest.mark.parametrize('valor', ['2024-11-30', date(2024, 11, 30), datetime(2024, 11, 30, 8, 15)])
+    def test_acepta_texto_date_y_datetime(self, valor):
+        """Test: Distintas entradas se guardan como la misma fecha"""
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(engine)
+        with Session(engine) as db:
+            db.add(Gasto(usuario_id=1, descripcion='X', monto=1, fecha=valor))
+            db.commit()
+            assert db.scalars(select(Gasto.fecha)).one() == date(2024, 11, 30)
+            assert db.execute(text('SELECT fecha FROM gastos')).scalar() == '2024-11-30'
+        engine.dispose()
+
+
+class TestMotorMigraciones:
+    """Tests del motor de migraciones versionadas"""
+
+    def test_aplica_todas_en_orden(self, tmp_path):
+        """Test: Una BD antigua queda en la última versión con datos normalizados"""
+        engine = _crear_engine(tmp_path / 'gastos.db', filas=7)
+        migrar(engine, tam_lote=3, pausa=0)
+
+        assert pendientes(engine) == []
+        with Session(engine) as db:
+            fechas = set(db.scalars(select(Gasto.fecha).where(Gasto.usuario_id == 2)))
+            assert fechas == {date(2024, 3, 5)}
+            diario = db.get(GastoDiario, (2, '2024-03-05', 'Otros'))
+            assert (diario.total, diario.cantidad) == (7.0, 7)
+        engine.dispose()
+
+    def test_reanuda_tras_caida(self, tmp_path, monkeypatch):
+        """Test: Tras un fallo a mitad el relleno continúa desde el punto de control"""
+        engine = _crear_engine(tmp_path / 'gastos.db', filas=10)
+        migrar(engine, pausa=0)
+        lotes = []
+
+        def rellenar(conn, desde, hasta):
+            if desde == 4 and 'caida' not in lotes:
+                lotes.append('caida')
+                raise RuntimeError("caída simulada")
+            lotes.append((desde, hasta))
+            return conn.execute(
+                text("UPDATE gastos SET descripcion = 'migrado' WHERE id > :d AND id <= :h"),
+                {'d': desde, 'h': hasta}
+            ).rowcount
+
+        monkeypatch.setitem(MIGRACIONES, 99, Migracion(99, 'Prueba', lambda conn: None, rellenar))
+
+        with pytest.raises(RuntimeError):
+            migrar(engine, tam_lote=2, pausa=0)
+        migrar(engine, tam_lote=2, pausa=0)
+
+        assert lotes == [(0, 2), (2, 4), 'caida', (4, 6), (6, 8), (8, 10), (10, 11)]
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT count(*) FROM gastos WHERE descripcion != 'migrado'")).scalar() == 0
+            assert 99 in migraciones.versiones_aplicadas(conn)
+            assert conn.execute(text("SELECT count(*) FROM migracion_progreso")).scalar() == 0
+        engine.dispose()
+
+    def test_relleno_en_segundo_plano(self, tmp_path):
+        """Test: Con en_segundo_plano los rellenos corren en un hilo"""
+        engine = _crear_engine(tmp_path / 'gastos.db', filas=5)
+        hilo = migrar(engine, en_segundo_plano=True, tam_lote=2, pausa=0)
+
+        assert hilo is not None
+        hilo.join(timeout=10)
+        assert pendientes(engine) == []
+        engine.dispose()
+
+    def test_agregar_columna_idempotente(self, engine_antiguo):
+        """Test: Agregar una columna existente no hace nada"""
+        with engine_antiguo.begin() as conn:
+            assert agregar_columna(conn, 'gastos', 'moneda', "VARCHAR DEFAULT 'S/.'")
+            assert not agregar_columna(conn, 'gastos', 'moneda', "VARCHAR DEFAULT 'S/.'")
+        columnas = {c['name'] for c in inspect(engine_antiguo).get_columns('gastos')}
+        assert 'moneda' in columnas
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
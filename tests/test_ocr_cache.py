@@ -0,0 +1,132 @@
+"""
+Tests para la caché de resultados OCR
+"""
+import threading
+import time
+import pytest
+
+from src.cache_lru import CacheLRU
+from src.ocr_cache import OCRCache, calcular_clave
+
+
+class TestCacheLRU:
+    """Tests de la caché LRU en memoria"""
+
+    def test_expulsa_menos_usado(self):
+        """Test: Al superar el límite se expulsa la entrada menos usada"""
+        cache = CacheLRU(max_entradas=2)
+        cache.guardar('a', 1)
+        cache.guardar('b', 2)
+        cache.obtener('a')
+        cache.guardar('c', 3)
+
+        assert 'a' in cache
+        assert 'b' not in cache
+        assert cache.expulsiones == 1
+
+    def test_expira_por_ttl(self):
+        """Test: Las entradas expiran después del TTL"""
+        cache = CacheLRU(max_entradas=10, ttl=0.05)
+        cache.guardar('a', 1)
+        assert cache.obtener('a') == 1
+        time.sleep(0.06)
+        assert cache.obtener('a') is None
+
+    def test_contadores(self):
+        """Test: Se cuentan aciertos y fallos"""
+        cache = CacheLRU()
+        cache.guardar('a', 1)
+        cache.obtener('a')
+        cache.obtener('x')
+
+        assert cache.aciertos == 1
+        assert cache.fallos == 1
+        assert cache.ratio_aciertos == 0.5
+
+
+class TestOCRCache:
+    """Tests de la caché OCR en dos niveles"""
+
+    @pytest.fixture
+    def cache(self, tmp_path):
+        """Caché con base de datos temporal"""
+        cache = OCRCache(ruta_db=tmp_path / 'ocr_cache.db', max_memoria=2, max_disco=3, ttl=3600)
+        yield cache
+        cache.cerrar()
+
+    def test_clave_depende_de_idiomas(self):
+        """Test: La misma imagen con otros idiomas tiene otra clave"""
+        datos = b'imagen'
+        assert calcular_clave(datos, 'spa+eng') == calcular_clave(datos, 'spa+eng')
+        assert calcular_clave(datos, 'spa+eng') != calcular_clave(datos, 'eng')
+        assert calcular_clave(datos, 'spa') != calcular_clave(b'otra', 'spa')
+
+    def test_acierto_en_memoria(self, cache):
+        """Test: Un texto guardado se recupera desde memoria"""
+        cache.guardar('k1', 'TOTAL 10.00')
+        assert cache.obtener('k1') == 'TOTAL 10.00'
+        assert cache.estadisticas()['aciertos_memoria'] == 1
+
+    def test_acierto_en_disco(self, cache, tmp_path):
+        """Test: El nivel SQLite persiste entre instancias"""
+        cache.guardar('k1', 'TOTAL 10.00')
+        cache.cerrar()
+
+        nueva = OCRCache(ruta_db=tmp_path / 'ocr_cache.db', max_memoria=2, max_disco=3, ttl=3600)
+        try:
+            assert nueva.obtener('k1') == 'TOTAL 10.00'
+            assert nueva.estadisticas()['aciertos_disco'] == 1
+            # La segunda consulta ya se sirve desde memoria
+            assert nueva.obtener('k1') == 'TOTAL 10.00'
+            assert nueva.estadisticas()['aciertos_memoria'] == 1
+        finally:
+            nueva.cerrar()
+
+    def test_fallo(self, cache):
+        """Test: Una clave desconocida cuenta como fallo"""
+        assert cache.obtener('nada') is None
+        assert cache.estadisticas()['fallos'] == 1
+        assert cache.estadisticas()['ratio_aciertos'] == 0.0
+
+    def test_purga_respeta_limite_disco(self, cache):
+        """Test: La purga deja solo las filas más recientes"""
+        for i in range(5):
+            cache.guardar(f'k{i}', f'texto {i}')
+        cache.purgar()
+        cache.memoria.limpiar()
+
+        assert cache.obtener('k4') == 'texto 4'
+        assert cache.obtener('k0') is None
+
+    async def test_async_disco_fuera_del_loop(self, cache, tmp_path, monkeypatch):
+        """Test: Las variantes async leen y escriben SQLite en otro hilo"""
+        hilos = []
+
+        def anotar_hilo(funcion):
+            def envoltura(*args):
+                hilos.append(threading.current_thread())
+                return funcion(*args)
+            return envoltura
+
+        monkeypatch.setattr(cache, '_obtener_disco', anotar_hilo(cache._obtener_disco))
+        monkeypatch.setattr(cache, '_guardar_disco', anotar_hilo(cache._guardar_disco))
+
+        await cache.guardar_async('k1', 'TOTAL 10.00')
+        cache.memoria.limpiar()
+        assert await cache.obtener_async('k1') == 'TOTAL 10.00'
+        assert await cache.obtener_async('nada') is None
+
+        assert len(hilos) == 3
+        assert threading.main_thread() not in hilos
+        assert cache.estadisticas()['aciertos_disco'] == 1
+        assert cache.estadisticas()['fallos'] == 1
+
+    async def test_async_acierto_en_memoria_sin_hilo(self, cache, monkeypatch):
+        """Test: Un acierto en memoria no consulta el disco"""
+        await cache.guardar_async('k1', 'TOTAL 10.00')
+        monkeypatch.setattr(cache, '_obtener_disco', lambda clave: pytest.fail('consultó el disco'))
+        assert await cache.obtener_async('k1') == 'TOTAL 10.00'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
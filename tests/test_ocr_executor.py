@@ -0,0 +1,115 @@
+"""
+Tests para el ejecutor de OCR fuera del event loop
+"""
+import asyncio
+import io
+import threading
+import pytest
+from PIL import Image
+
+from src.ocr_executor import OCRExecutor, ColaOCRLlenaError, abrir_imagen
+
+
+def _sumar(a, b):
+    return a + b
+
+
+class TestOCRExecutor:
+    """Tests del pool acotado de OCR"""
+
+    async def test_ejecutar_en_hilo(self):
+        """Test: La función se ejecuta en el pool y retorna su resultado"""
+        executor = OCRExecutor(max_workers=1, max_cola=0, timeout_cola=1, modo='hilo')
+        try:
+            assert await executor.ejecutar(_sumar, 2, 3) == 5
+            assert executor.pendientes == 0
+        finally:
+            executor.cerrar()
+
+    async def test_no_bloquea_event_loop(self):
+        """Test: El event loop sigue atendiendo mientras el OCR está en curso"""
+        executor = OCRExecutor(max_workers=1, max_cola=0, timeout_cola=1, modo='hilo')
+        liberar = threading.Event()
+        try:
+            tarea = asyncio.create_task(executor.ejecutar(liberar.wait, 5))
+            await asyncio.sleep(0.05)
+
+            # El loop responde aunque el trabajo sigue bloqueado en el worker
+            assert not tarea.done()
+            assert executor.pendientes == 1
+
+            liberar.set()
+            assert await tarea is True
+        finally:
+            liberar.set()
+            executor.cerrar()
+
+    async def test_cola_llena_rechaza(self):
+        """Test: Con la capacidad agotada se rechaza tras el timeout"""
+        executor = OCRExecutor(max_workers=1, max_cola=1, timeout_cola=0.05, modo='hilo')
+        liberar = threading.Event()
+        try:
+            tareas = [asyncio.create_task(executor.ejecutar(liberar.wait, 5)) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            assert executor.profundidad_cola == 1
+
+            with pytest.raises(ColaOCRLlenaError):
+                await executor.ejecutar(_sumar, 1, 1)
+
+            liberar.set()
+            await asyncio.gather(*tareas)
+            assert executor.pendientes == 0
+        finally:
+            liberar.set()
+            executor.cerrar()
+
+    async def test_espera_hueco_libre(self):
+        """Test: Un trabajo en espera entra cuando se libera un hueco"""
+        executor = OCRExecutor(max_workers=1, max_cola=0, timeout_cola=2, modo='hilo')
+        liberar = threading.Event()
+        try:
+            primera = asyncio.create_task(executor.ejecutar(liberar.wait, 5))
+            await asyncio.sleep(0.05)
+            segunda = asyncio.create_task(executor.ejecutar(_sumar, 1, 2))
+            await asyncio.sleep(0.05)
+            assert executor.profundidad_cola == 1
+
+            liberar.set()
+            assert await primera is True
+            assert await segunda == 3
+        finally:
+            liberar.set()
+            executor.cerrar()
+
+
+class TestImagenEnMemoria:
+    """Tests para abrir imágenes sin archivos temporales"""
+
+    @pytest.fixture
+    def png_bytes(self):
+        """Imagen PNG de prueba en memoria"""
+        buffer = io.BytesIO()
+        Image.new('RGB', (120, 80), color='white').save(buffer, format='PNG')
+        return buffer.getvalue()
+
+    def test_abrir_desde_bytes(self, png_bytes):
+        """Test: Se abre una imagen desde bytes"""
+        with abrir_imagen(png_bytes) as imagen:
+            assert imagen.size == (120, 80)
+            assert imagen.format == 'PNG'
+
+    def test_abrir_desde_memoryview(self, png_bytes):
+        """Test: Se abre y decodifica una imagen desde un memoryview"""
+        with abrir_imagen(memoryview(bytearray(png_bytes))) as imagen:
+            imagen.load()
+            assert imagen.size == (120, 80)
+            assert imagen.getpixel((0, 0)) == (255, 255, 255)
+
+    def test_buffer_segun_modo(self, png_bytes):
+        """Test: Los procesos reciben bytes y los hilos un memoryview"""
+        assert isinstance(OCRExecutor(modo='proceso')._preparar_buffer(bytearray(png_bytes)), bytes)
+        assert isinstance(OCRExecutor(modo='hilo')._preparar_buffer(png_bytes), memoryview)
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
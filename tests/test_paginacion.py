@@ -0,0 +1,132 @@
+"""
+Tests para la paginación por clave de !gastos
+"""
+from datetime import datetime, timedelta
+import pytest
+
+from src.models import Gasto
+from src.repository import GastoRepository
+from src.controller.paginador_gastos import PaginadorGastos
+
+
+@pytest.fixture
+def sesiones(sesiones):
+    """Repository sobre una BD en memoria con 23 gastos (algunos con el mismo timestamp)"""
+    fabrica = sesiones
+    ahora = datetime.utcnow()
+    db = fabrica()
+    for i in range(23):
+        # Grupos de tres gastos comparten timestamp para probar el desempate por id
+        db.add(Gasto(
+            usuario_id=1, descripcion=f'Gasto {i}', monto=float(i), fecha='2024-01-01',
+            timestamp=ahora - timedelta(minutes=i // 3)
+        ))
+    db.add(Gasto(usuario_id=2, descripcion='Ajeno', monto=1.0, fecha='2024-01-01'))
+    db.commit()
+    db.close()
+    return fabrica
+
+
+def _ids(pagina):
+    return [gasto.id for gasto in pagina['gastos']]
+
+
+class TestPaginacionPorClave:
+    """Tests de GastoRepository.obtener_pagina_gastos"""
+
+    def test_recorre_todo_sin_repetir(self, sesiones):
+        """Test: Las páginas hacia adelante cubren todos los gastos una vez, en orden"""
+        vistos = []
+        pagina = GastoRepository.obtener_pagina_gastos(1, limite=10)
+        assert not pagina['hay_anterior']
+        while True:
+            vistos.extend(_ids(pagina))
+            if not pagina['hay_siguiente']:
+                break
+            pagina = GastoRepository.obtener_pagina_gastos(1, limite=10, cursor=pagina['ultimo'])
+
+        assert len(vistos) == 23
+        assert len(set(vistos)) == 23
+        claves = [(g.timestamp, g.id) for g in self._todos(sesiones)]
+        assert vistos == [gasto_id for _, gasto_id in sorted(claves, reverse=True)]
+
+    def test_volver_atras(self, sesiones):
+        """Test: La página anterior es exactamente la que se mostró antes"""
+        primera = GastoRepository.obtener_pagina_gastos(1, limite=10)
+        segunda = GastoRepository.obtener_pagina_gastos(1, limite=10, cursor=primera['ultimo'])
+        tercera = GastoRepository.obtener_pagina_gastos(1, limite=10, cursor=segunda['ultimo'])
+        assert len(tercera['gastos']) == 3
+        assert not tercera['hay_siguiente']
+
+        atras = GastoRepository.obtener_pagina_gastos(
+            1, limite=10, cursor=tercera['primero'], hacia_atras=True
+        )
+        assert _ids(atras) == _ids(segunda)
+        assert atras['hay_anterior'] and atras['hay_siguiente']
+
+        inicio = GastoRepository.obtener_pagina_gastos(
+            1, limite=10, cursor=atras['primero'], hacia_atras=True
+        )
+        assert _ids(inicio) == _ids(primera)
+        assert not inicio['hay_anterior']
+
+    @staticmethod
+    def _todos(sesiones):
+        db = sesiones()
+        try:
+            return db.query(Gasto).filter(Gasto.usuario_id == 1).all()
+        finally:
+            db.close()
+
+
+class _Respuesta:
+    def __init__(self):
+        self.ediciones = []
+        self.mensajes = []
+
+    async def edit_message(self, **kwargs):
+        self.ediciones.append(kwargs)
+
+    async def send_message(self, *args, **kwargs):
+        self.mensajes.append((args, kwargs))
+
+
+class _Interaccion:
+    def __init__(self, usuario_id):
+        self.user = type('Usuario', (), {'id': usuario_id})()
+        self.response = _Respuesta()
+
+
+class TestPaginadorGastos:
+    """Tests de la vista con botones"""
+
+    async def test_botones_y_navegacion(self, sesiones):
+        """Test: Los botones reflejan la posición y editan el mensaje"""
+        pagina = GastoRepository.obtener_pagina_gastos(1, limite=10)
+        paginador = PaginadorGastos(1, 30, 23, pagina)
+        assert paginador.anterior.disabled
+        assert not paginador.siguiente.disabled
+
+        interaccion = _Interaccion(1)
+        await paginador._mover(interaccion, hacia_atras=False)
+        await paginador._mover(interaccion, hacia_atras=False)
+
+        assert paginador.numero == 3
+        assert paginador.siguiente.disabled
+        assert not paginador.anterior.disabled
+        embed = interaccion.response.ediciones[-1]['embed']
+        assert 'Página 3 de 3' in embed.description
+        assert '21. ' in embed.description
+
+    async def test_solo_el_autor(self, sesiones):
+        """Test: Otros usuarios no pueden paginar"""
+        pagina = GastoRepository.obtener_pagina_gastos(1, limite=10)
+        paginador = PaginadorGastos(1, 30, 23, pagina)
+        interaccion = _Interaccion(99)
+
+        assert not await paginador.interaction_check(interaccion)
+        assert interaccion.response.mensajes
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,122 @@
+"""
+Tests para el arranque diferido y el perfil de importación
+"""
+import subprocess
+import sys
+import threading
+import pytest
+
+from benchmarks.perfil_importacion import (
+    RAIZ,
+    agrupar_por_paquete,
+    main,
+    medir,
+    parsear_importtime,
+)
+from src.config import tesseract_config
+
+SALIDA_IMPORTTIME = """import time: self [us] | cumulative | imported package
+import time:       120 |        120 |   _io
+import time:      3000 |       5000 |     sqlalchemy.sql
+import time:      1500 |       6500 |   sqlalchemy
+import time:       400 |       7020 | src.config
+"""
+
+
+def _importar_en_proceso_nuevo(codigo: str) -> str:
+    resultado = subprocess.run(
+        [sys.executable, '-c', codigo], cwd=RAIZ, capture_output=True, text=True
+    )
+    assert resultado.returncode == 0, resultado.stderr
+    return resultado.stdout.strip()
+
+
+class TestPerfil:
+    """Tests del script de perfil"""
+
+    def test_parsear(self):
+        """Test: Tiempos en ms y profundidad según la sangría"""
+        modulos = parsear_importtime(SALIDA_IMPORTTIME)
+
+        assert [m['modulo'] for m in modulos] == ['_io', 'sqlalchemy.sql', 'sqlalchemy', 'src.config']
+        assert modulos[1] == {'modulo': 'sqlalchemy.sql', 'propio_ms': 3.0, 'acumulado_ms': 5.0, 'nivel': 2}
+        assert (modulos[2]['nivel'], modulos[3]['nivel']) == (1, 0)
+
+    def test_agrupar_por_paquete(self):
+        """Test: Suma el tiempo propio por paquete de primer nivel"""
+        paquetes = agrupar_por_paquete(parsear_importtime(SALIDA_IMPORTTIME))
+        assert list(paquetes) == ['sqlalchemy', 'src', '_io']
+        assert paquetes['sqlalchemy'] == 4.5
+
+    def test_config_no_importa_dependencias_pesadas(self):
+        """Test: Importar la configuración no carga discord ni SQLAlchemy"""
+        reporte = medir('src.config', repeticiones=1, top=1000)
+
+        assert reporte['importacion_ms'] is not None
+        assert 'discord' not in reporte['por_paquete']
+        assert 'sqlalchemy' not in reporte['por_paquete']
+
+    def test_limite(self, capsys):
+        """Test: --limite-ms falla si un módulo lo supera"""
+        assert main(['src', '--repeticiones', '1', '--limite-ms', '0.001']) == 1
+        assert '❌ src' in capsys.readouterr().out
+
+
+class TestArranqueDiferido:
+    """Tests de la búsqueda de Tesseract y del paquete src perezosos"""
+
+    def test_importar_no_busca_tesseract(self):
+        """Test: Importar src.config no lanza la búsqueda de Tesseract"""
+        salida = _importar_en_proceso_nuevo(
+            "import src.config, importlib\n"
+            "print(importlib.import_module('src.config.tesseract_config').tesseract_detectado())"
+        )
+        assert salida.splitlines()[-1] == 'False'
+
+    def test_paquete_src_perezoso(self):
+        """Test: `import src` no carga los modelos ni discord hasta usarlos"""
+        salida = _importar_en_proceso_nuevo(
+            "import sys, src\n"
+            "print('discord' in sys.modules, 'sqlalchemy' in sys.modules)\n"
+            "print(src.GastoDAO.__name__, src.COMMAND_PREFIX == src.config.COMMAND_PREFIX)"
+        )
+        assert salida.splitlines()[-2:] == ['False False', 'GastoDAO True']
+
+    def test_importar_submodulo_primero(self):
+        """Test: Importar un submódulo antes que src.config no crea importaciones circulares"""
+        salida = _importar_en_proceso_nuevo("import src.utils\nprint('ok')")
+        assert salida.splitlines()[-1] == 'ok'
+
+    def test_atributo_inexistente(self):
+        """Test: Un nombre desconocido sigue dando AttributeError"""
+        import src
+        with pytest.raises(AttributeError):
+            src.no_existe
+
+    def test_deteccion_una_sola_vez(self, monkeypatch):
+        """Test: Llamadas concurrentes buscan Tesseract una sola vez y comparten el resultado"""
+        llamadas = []
+
+        def buscar():
+            llamadas.append(1)
+            return tesseract_config.DeteccionTesseract('/usr/bin/tesseract', True)
+
+        monkeypatch.setattr(tesseract_config, '_deteccion', None)
+        monkeypatch.setattr(tesseract_config, '_buscar_tesseract', buscar)
+
+        hilos = [threading.Thread(target=tesseract_config.detectar_tesseract) for _ in range(8)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+
+        assert len(llamadas) == 1
+        assert tesseract_config.TESSERACT_CMD == '/usr/bin/tesseract'
+        assert tesseract_config.TESSERACT_ENCONTRADO is True
+
+        from src.config import TESSERACT_CMD
+        assert TESSERACT_CMD == '/usr/bin/tesseract'
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
@@ -0,0 +1,168 @@
+"""
+Tests para el renderizado de plantillas y su caché
+"""
+import pytest
+
+from src.cache_lru import CacheLRU
+from src.repository import GastoRepository, AsyncGastoRepository
+from src.services import GastoService, TemplateService
+from src.services import gasto_service
+from src.versiones_datos import VersionesDatos
+
+
+@pytest.fixture
+def servicio(tmp_path):
+    """TemplateService con caché de bytecode en una carpeta temporal"""
+    return TemplateService(cache_dir=tmp_path / 'plantillas')
+
+
+@pytest.fixture
+def repositorio(sesiones, monkeypatch):
+    """Repository en memoria, con caché de embeds vacía"""
+    monkeypatch.setattr(gasto_service, 'template_service', TemplateService(cache_dir=None))
+    monkeypatch.setattr(GastoService, 'cache_embeds', CacheLRU(max_entradas=8))
+    return GastoRepository
+
+
+class TestTemplateService:
+    """Tests de compilación y renderizado"""
+
+    def test_bytecode_en_disco(self, servicio, tmp_path):
+        """Test: Las plantillas compiladas se guardan en la carpeta de caché"""
+        servicio.render_resumen_total(10.0, 2, 5.0)
+        assert list((tmp_path / 'plantillas').iterdir())
+
+    def test_plantilla_compilada_una_vez(self, servicio):
+        """Test: La misma plantilla se reutiliza sin volver a cargarla"""
+        assert servicio.plantilla('resumen_total.md') is servicio.plantilla('resumen_total.md')
+
+    def test_categorias_con_porcentajes(self, servicio):
+        """Test: Porcentajes y promedios precalculados"""
+        contenido = servicio.render_gastos_categorias([('Comida', 75.0, 3), ('Transporte', 25.0, 1)])
+        assert '75.0%' in contenido
+        assert '25.0%' in contenido
+        assert 'S/. 25.00' in contenido
+
+    def test_categorias_con_total_cero(self, servicio):
+        """Test: Un total general de cero no divide por cero"""
+        contenido = servicio.render_gastos_categorias([('Otros', 0.0, 2)])
+        assert '0.0%' in contenido
+
+
+class TestVersionesDatos:
+    """Tests de los contadores de versión"""
+
+    def test_incrementar_por_usuario(self):
+        """Test: Cada usuario tiene su propia versión"""
+        versiones = VersionesDatos()
+        antes = versiones.obtener(1)
+        versiones.incrementar(1)
+        assert versiones.obtener(1) != antes
+        assert versiones.obtener(2) == (0, 0)
+
+    def test_invalidar_todo(self):
+        """Test: Invalidar todo cambia la versión de cualquier usuario"""
+        versiones = VersionesDatos()
+        antes = versiones.obtener(5)
+        versiones.invalidar_todo()
+        assert versiones.obtener(5) != antes
+
+
+class TestCacheEmbeds:
+    """Tests de la caché de embeds en GastoService"""
+
+    async def test_repetir_no_consulta_bd(self, repositorio, monkeypatch):
+        """Test: El segundo !total usa el resultado guardado"""
+        llamadas = []
+        original = AsyncGastoRepository.obtener_resumen
+
+        async def contar(*args):
+            llamadas.append(args)
+            return await original(*args)
+
+        monkeypatch.setattr(AsyncGastoRepository, 'obtener_resumen', staticmethod(contar))
+        repositorio.crear_gasto(1, 'Pan', 4.0, 'Comida')
+
+        primero = await GastoService.crear_embed_total(1)
+        segundo = await GastoService.crear_embed_total(1)
+
+        assert len(llamadas) == 1
+        assert primero.description == segundo.description
+
+    async def test_escritura_invalida(self, repositorio):
+        """Test: Después de una escritura se vuelve a calcular"""
+        repositorio.crear_gasto(2, 'Pan', 4.0, 'Comida')
+        antes = await GastoService.crear_embed_categorias(2)
+        repositorio.crear_gasto(2, 'Taxi', 6.0, 'Transporte')
+        despues = await GastoService.crear_embed_categorias(2)
+
+        assert 'Transporte' not in antes.description
+        assert 'Transporte' in despues.description
+
+    async def test_devuelve_copias(self, repositorio):
+        """Test: Modificar un embed devuelto no altera el guardado"""
+        repositorio.crear_gasto(3, 'Pan', 4.0, 'Comida')
+        primero = await GastoService.crear_embed_total(3)
+        primero.set_footer(text='solo esta respuesta')
+        segundo = await GastoService.crear_embed_total(3)
+
+        assert primero is not segundo
+        assert segundo.footer.text is None
+
+    async def test_hora_al_enviar(self, repositorio, monkeypatch):
+        """Test: Un embed de la caché lleva la hora de cada respuesta, no la del render"""
+        from datetime import datetime, timezone
+        from src.services import gasto_service
+
+        class Reloj(datetime):
+            actual = datetime(2024, 5, 1, 10, 0, tzinfo=timezone.utc)
+
+            @classmethod
+            def now(cls, tz=None):
+                return cls.actual
+
+        monkeypatch.setattr(gasto_service, 'datetime', Reloj)
+        repositorio.crear_gasto(4, 'Pan', 4.0, 'Comida')
+        primero = await GastoService.crear_embed_total(4)
+        Reloj.actual = datetime(2024, 5, 1, 18, 30, tzinfo=timezone.utc)
+        segundo = await GastoService.crear_embed_total(4)
+
+        assert primero.description == segundo.description
+        assert primero.timestamp.hour == 10
+        assert segundo.timestamp.hour == 18
+        assert 'Última actualización' not in segundo.description
+
+    async def test_vista_gastos_pagina_propia(self, repositorio):
+        """Test: Cada vista de !gastos recibe su propia página para paginar"""
+        repositorio.crear_gasto(4, 'Pan', 4.0, 'Comida')
+        _, primero = await GastoService.crear_vista_gastos(4)
+        primero['pagina']['gastos'] = []
+        _, segundo = await GastoService.crear_vista_gastos(4)
+
+        assert len(segundo['pagina']['gastos']) == 1
+
+    async def test_eliminar_invalida(self, repositorio):
+        """Test: Eliminar un gasto invalida los embeds del usuario"""
+        gasto = repositorio.crear_gasto(5, 'Pan', 4.0, 'Comida')
+        antes = await GastoService.crear_embed_total(5)
+        repositorio.eliminar_gasto(gasto.id, 5)
+        despues = await GastoService.crear_embed_total(5)
+
+        assert antes.description != despues.description
+
+    async def test_estadisticas(self, repositorio):
+        """Test: Ratio de aciertos y límite de entradas"""
+        repositorio.crear_gasto(6, 'Pan', 4.0, 'Comida')
+        for _ in range(4):
+            await GastoService.crear_embed_total(6)
+        for dias in range(1, 20):
+            await GastoService.crear_embed_categorias(6, dias)
+
+        datos = GastoService.estadisticas_cache()
+        assert datos['aciertos'] == 3
+        assert datos['entradas'] == datos['max_entradas'] == 8
+        assert datos['expulsiones'] > 0
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])
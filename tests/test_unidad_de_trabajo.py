@@ -0,0 +1,128 @@
+"""
+Tests para la unidad de trabajo y la configuración de conexiones
+"""
+import pytest
+from sqlalchemy import create_engine, event, text
+
+from src.config import DB_BUSY_TIMEOUT_MS
+from src.config.db_persistence import set_sqlite_pragma
+from src.models import Gasto, base, unidad_de_trabajo, abrir_sesion, cerrar_sesion
+from src.repository import GastoRepository
+from src.versiones_datos import versiones_datos
+
+
+@pytest.fixture
+def sesiones(sesiones, monkeypatch):
+    """Fábrica de sesiones en memoria que cuenta las sesiones abiertas"""
+    fabrica = sesiones
+    abiertas = []
+
+    def abrir():
+        db = fabrica()
+        abiertas.append(db)
+        return db
+
+    abrir.abiertas = abiertas
+    monkeypatch.setattr(base, 'SessionLocal', abrir)
+    return abrir
+
+
+class TestUnidadDeTrabajo:
+    """Tests de la sesión compartida"""
+
+    def test_comparte_una_sesion(self, sesiones):
+        """Test: Varias operaciones del repository usan una sola sesión"""
+        with unidad_de_trabajo() as db:
+            GastoRepository.crear_gasto(1, 'Pan', 2.0, 'Comida')
+            GastoRepository.obtener_resumen(1)
+            GastoRepository.obtener_gastos_recientes(1)
+            assert abrir_sesion() is db
+
+        assert len(sesiones.abiertas) == 1
+
+    def test_sin_unidad_abre_sesion_por_llamada(self, sesiones):
+        """Test: Fuera de una unidad cada llamada abre y cierra su sesión"""
+        GastoRepository.obtener_resumen(1)
+        GastoRepository.obtener_resumen(1)
+        assert len(sesiones.abiertas) == 2
+
+    def test_anidada_reutiliza(self, sesiones):
+        """Test: Una unidad anidada usa la sesión exterior"""
+        with unidad_de_trabajo() as exterior:
+            with unidad_de_trabajo() as interior:
+                assert interior is exterior
+        assert len(sesiones.abiertas) == 1
+
+    def test_error_deshace(self, sesiones):
+        """Test: Un error dentro del bloque deshace lo no confirmado"""
+        with pytest.raises(RuntimeError):
+            with unidad_de_trabajo() as db:
+                db.add(Gasto(usuario_id=1, descripcion='X', monto=1, fecha='2024-01-01'))
+                db.flush()
+                raise RuntimeError("fallo")
+
+        db = sesiones()
+        assert db.query(Gasto).count() == 0
+        db.close()
+
+    def test_escrituras_atomicas(self, sesiones):
+        """Test: Si la segunda escritura falla, la primera tampoco se guarda"""
+        version = versiones_datos.obtener(1)
+        with pytest.raises(Exception):
+            with unidad_de_trabajo():
+                GastoRepository.crear_gasto(1, 'Pan', 2.0, 'Comida')
+                GastoRepository.crear_gasto(1, None, 3.0, 'Comida')
+
+        db = sesiones()
+        assert db.query(Gasto).count() == 0
+        db.close()
+        # Sin commit no cambia la versión de datos (las cachés siguen válidas)
+        assert versiones_datos.obtener(1) == version
+
+    def test_commit_al_salir(self, sesiones):
+        """Test: Dentro del bloque nada se confirma hasta salir; la versión cambia después"""
+        version = versiones_datos.obtener(1)
+        commits = []
+        with unidad_de_trabajo() as db:
+            event.listen(db, 'after_commit', lambda sesion: commits.append(1))
+            GastoRepository.crear_gasto(1, 'Pan', 2.0, 'Comida')
+            GastoRepository.crear_lote(1, [{'descripcion': 'Leche', 'monto': 3.0}])
+
+            assert commits == []
+            assert versiones_datos.obtener(1) == version
+
+        assert commits == [1]
+        db = sesiones()
+        assert db.query(Gasto).count() == 2
+        db.close()
+        assert versiones_datos.obtener(1) != version
+
+    def test_cerrar_sesion_respeta_la_unidad(self, sesiones):
+        """Test: cerrar_sesion no cierra la sesión compartida"""
+        with unidad_de_trabajo() as db:
+            cerrar_sesion(db)
+            assert db.execute(text('SELECT 1')).scalar() == 1
+
+
+class TestPragmas:
+    """Tests de la configuración por conexión"""
+
+    def test_pragmas_por_conexion(self):
+        """Test: Cada conexión nueva recibe busy_timeout y foreign_keys"""
+        engine = create_engine('sqlite:///:memory:')
+        event.listen(engine, 'connect', set_sqlite_pragma)
+        with engine.connect() as conn:
+            assert conn.execute(text('PRAGMA busy_timeout')).scalar() == DB_BUSY_TIMEOUT_MS
+            assert conn.execute(text('PRAGMA foreign_keys')).scalar() == 1
+        engine.dispose()
+
+    def test_no_afecta_otros_engines(self):
+        """Test: Los engines ajenos conservan la configuración por defecto"""
+        engine = create_engine('sqlite:///:memory:')
+        with engine.connect() as conn:
+            assert conn.execute(text('PRAGMA foreign_keys')).scalar() == 0
+        engine.dispose()
+
+
+if __name__ == '__main__':
+    pytest.main([__file__, '-v'])